@@ -32,6 +32,10 @@ LINKS = {
         "object_reference.meta/object_reference/sforce_api_objects_lead.htm",
         "Lead Object Reference",
     ),
+    "BULK_QUERY": MarkdownLink(
+        "https://developer.salesforce.com/docs/atlas.en-us.api_asynch.meta/api_asynch/queries.htm",
+        "Bulk API 2.0 Query documentation",
+    ),
 }
 
 USERNAME_DESCRIPTION = "Username of the Salesforce Account. This is typically your email address."
@@ -42,3 +46,16 @@ token to access your data.
 
 Refer to the {LINKS["TOKEN_DOCU"]} to learn how to retrieve or reset your token.
 """
+
+CHECK_CREDENTIALS_DESCRIPTION = """
+Login with the configured credentials (or reuse a cached session). A failed check is
+remembered for a minute, so that repeated checks do not lock the account.
+"""
+
+API_RESERVE_DESCRIPTION = """
+Percentage of the daily API requests of your org which is kept free for other
+integrations. The usage is read from each response: when the remaining requests
+approach the reserve, requests are paced (and larger write batches are used); when
+the reserve is reached, the task fails. Concurrent requests are reduced and retried
+with backoff when Salesforce throttles them.
+"""
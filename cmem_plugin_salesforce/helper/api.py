@@ -0,0 +1,52 @@
+"""Low level Salesforce REST API access.
+
+The helper modules only import `simple_salesforce` where it is used at runtime, so that
+importing the plugins (e.g. on plugin discovery) does not load it. Once a connection
+exists, these deferred imports are free.
+"""
+
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any
+
+import requests
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+
+def request(salesforce: "Salesforce", method: str, url: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+    """Send a request with the session and headers of a salesforce connection
+
+    This is used for endpoints which are not (or not lazily enough) covered by
+    simple_salesforce. Error responses are raised with the simple_salesforce
+    exception types (except `304 Not Modified` answers to conditional requests).
+    Expired sessions of pooled connections are renewed once.
+    """
+    from simple_salesforce.util import exception_handler  # noqa: PLC0415
+
+    from cmem_plugin_salesforce.helper.session import PooledSalesforce  # noqa: PLC0415
+
+    additional_headers = kwargs.pop("headers", {})
+    headers = {**salesforce.headers, **additional_headers}
+    response = salesforce.session.request(method, url, headers=headers, **kwargs)
+    if is_invalid_session(response) and isinstance(salesforce, PooledSalesforce):
+        salesforce.refresh_session()
+        headers = {**salesforce.headers, **additional_headers}
+        response = salesforce.session.request(method, url, headers=headers, **kwargs)
+    if response.status_code >= 300 and response.status_code != HTTPStatus.NOT_MODIFIED:  # noqa: PLR2004
+        exception_handler(response, name=url)
+    limit_info = response.headers.get("Sforce-Limit-Info")
+    if limit_info:
+        salesforce.api_usage = salesforce.parse_api_usage(limit_info)
+    return response
+
+
+def is_invalid_session(response: requests.Response) -> bool:
+    """Check if the request failed because of an expired or invalid session"""
+    if response.status_code != HTTPStatus.UNAUTHORIZED:
+        return False
+    try:
+        errors = response.json()
+    except requests.JSONDecodeError:
+        return False
+    return isinstance(errors, list) and errors[0].get("errorCode") == "INVALID_SESSION_ID"
@@ -0,0 +1,110 @@
+"""Batching and pipelining of record streams for write operations."""
+
+import json
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from cmem_plugin_salesforce.helper.retry import get_error_code
+
+DEFAULT_BATCH_SIZE = 10000
+"""Maximum number of records of a Bulk API batch"""
+DEFAULT_DELETE_BATCH_SIZE = 2000
+"""Number of records of a delete batch (smaller, as deletes lock the parent records)"""
+DEFAULT_BATCH_BYTES = 10_000_000
+"""Maximum size of a Bulk API batch (JSON payload)"""
+MAX_ERROR_MESSAGES = 100
+"""Maximum number of distinct error messages kept in a result summary"""
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+
+def get_record_size(record: dict[str, Any]) -> int:
+    """Get the size of a record in a JSON array payload (incl. the separator)"""
+    # json.dumps escapes non-ASCII characters, so the length is the size in bytes
+    return len(json.dumps(record, default=str)) + 2
+
+
+def iter_batches(
+    records: Iterable[dict[str, Any]],
+    max_records: int | Callable[[], int] = DEFAULT_BATCH_SIZE,
+    max_bytes: int = DEFAULT_BATCH_BYTES,
+) -> Iterator[list[dict[str, Any]]]:
+    """Cut a stream of records into batches limited by record count and payload size
+
+    A single record larger than the size limit is emitted as a batch of its own.
+    The record limit can be a function, which is asked at the start of each batch.
+    """
+    get_limit = max_records if callable(max_records) else lambda: max_records
+    limit = get_limit()
+    batch: list[dict[str, Any]] = []
+    size = 0
+    for record in records:
+        record_size = get_record_size(record)
+        if batch and (len(batch) >= limit or size + record_size > max_bytes):
+            yield batch
+            batch, size = [], 0
+            limit = get_limit()
+        batch.append(record)
+        size += record_size
+    if batch:
+        yield batch
+
+
+def iter_pipelined(items: Iterable[Item], function: Callable[[Item], Result]) -> Iterator[Result]:
+    """Apply a function to each item in a background thread and yield the results in order
+
+    While the function processes an item, the next item is taken from the input, so
+    producing and processing overlap. At most two items are held at the same time.
+    """
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline") as executor:
+        pending: Future[Result] | None = None
+        for item in items:
+            submitted = executor.submit(function, item)
+            if pending is not None:
+                yield pending.result()
+            pending = submitted
+        if pending is not None:
+            yield pending.result()
+
+
+@dataclass
+class ResultSummary:
+    """Incrementally updated counts of Bulk API write results
+
+    The successful results of deletes are counted as deleted records.
+    """
+
+    deletes: bool = False
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    failed: int = 0
+    retried: int = 0
+    skipped: int = 0
+    error_messages: set[str] = field(default_factory=set)
+    error_codes: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def total(self) -> int:
+        """Get the number of processed records"""
+        return self.created + self.updated + self.deleted + self.failed
+
+    def add(self, results: Iterable[dict[str, Any]]) -> None:
+        """Count the results of a batch"""
+        for record in results:
+            if record["success"] and self.deletes:
+                self.deleted += 1
+            elif record["success"] and record["created"]:
+                self.created += 1
+            elif record["success"]:
+                self.updated += 1
+            else:
+                self.failed += 1
+            for error in record["errors"]:
+                self.error_codes[get_error_code(error)] += 1
+                if len(self.error_messages) < MAX_ERROR_MESSAGES:
+                    self.error_messages.add(f"{error}")
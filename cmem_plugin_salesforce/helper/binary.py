@@ -0,0 +1,147 @@
+"""Parallel streaming download of binary fields to project resources."""
+
+import hashlib
+import io
+import re
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, TYPE_CHECKING, Any, TypeGuard
+
+from cmem.cmempy.workspace.projects.resources.resource import create_resource
+from cmem_plugin_base.dataintegration.context import UserContext
+from cmem_plugin_base.dataintegration.utils import setup_cmempy_user_access
+
+from cmem_plugin_salesforce.helper.api import request
+from cmem_plugin_salesforce.helper.dataset import IteratorReader
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+BLOB_URL = re.compile(r"/services/data/v[\d.]+/sobjects/(?P<object>\w+)/(?P<id>\w+)/(?P<field>\w+)")
+"""Pattern of the values of binary fields in query results"""
+CHUNK_SIZE = 1024 * 1024
+"""Size of the chunks in which binaries are downloaded and uploaded"""
+DEFAULT_WORKERS = 4
+"""Number of binaries which are downloaded concurrently"""
+SIZE_SUFFIX = "Size"
+HASH_SUFFIX = "Sha256"
+RESOURCE_SUFFIX = "Resource"
+
+Upload = Callable[[str, str, IO, UserContext | None], Any]
+
+
+def upload_resource(
+    project_id: str, resource_name: str, file: IO, user: UserContext | None = None
+) -> Any:  # noqa: ANN401
+    """Upload a file stream as project file resource (an existing resource is replaced)"""
+    setup_cmempy_user_access(context=user)
+    return create_resource(project_id, resource_name, file_resource=file, replace=True)
+
+
+def is_blob_url(value: object) -> TypeGuard[str]:
+    """Check if a field value is the URL of a binary field"""
+    return isinstance(value, str) and BLOB_URL.fullmatch(value) is not None
+
+
+def get_blob_fields(records: Iterable[dict[str, Any]]) -> list[str]:
+    """Get the (top level) fields with binary field URLs, in order of appearance"""
+    fields: dict[str, None] = {}
+    for record in records:
+        fields.update((field, None) for field, value in record.items() if is_blob_url(value))
+    return list(fields)
+
+
+def get_resource_name(prefix: str, url: str, extension: str | None = None) -> str:
+    """Get the resource name of a binary (`<prefix><object>-<Id>-<field>[.<extension>]`)"""
+    match = BLOB_URL.fullmatch(url)
+    if match is None:
+        raise ValueError(f"Not a binary field URL: {url}")
+    name = f"{prefix}{match['object']}-{match['id']}-{match['field']}"
+    return f"{name}.{extension}" if extension else name
+
+
+class BinaryDownloader:
+    """Download of the binary fields of query results to project file resources
+
+    Query results only contain the URLs of binary fields (e.g. `ContentVersion.VersionData`
+    or `Attachment.Body`). The binaries of a result page are downloaded on a pool of
+    workers. Each binary is streamed in chunks from Salesforce to the resource upload,
+    so it is never held in memory. The records get the size, the SHA-256 hash and the
+    resource name of each binary (`<field>Size`, `<field>Sha256`, `<field>Resource`).
+
+    The binary fields are detected in the first result page with records.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        salesforce: "Salesforce",
+        project_id: str,
+        user: UserContext | None = None,
+        prefix: str = "",
+        workers: int = DEFAULT_WORKERS,
+        upload: Upload | None = None,
+    ) -> None:
+        self.salesforce = salesforce
+        self.project_id = project_id
+        self.user = user
+        self.prefix = prefix
+        self.workers = max(workers, 1)
+        self.upload = upload or upload_resource
+        self.fields: list[str] | None = None
+
+    def iter_chunks(self, url: str) -> Iterator[bytes]:
+        """Stream the content of a binary field"""
+        response = request(
+            self.salesforce, "GET", f"https://{self.salesforce.sf_instance}{url}", stream=True
+        )
+        with response:
+            yield from response.iter_content(CHUNK_SIZE)
+
+    def download(self, url: str, resource_name: str) -> tuple[int, str]:
+        """Stream a binary to a resource and return its size and SHA-256 hash"""
+        digest = hashlib.sha256()
+        size = 0
+
+        def iter_hashed() -> Iterator[bytes]:
+            nonlocal size
+            for chunk in self.iter_chunks(url):
+                digest.update(chunk)
+                size += len(chunk)
+                yield chunk
+
+        chunks = iter_hashed()
+        reader = io.BufferedReader(IteratorReader(chunks), buffer_size=CHUNK_SIZE)
+        self.upload(self.project_id, resource_name, reader, self.user)
+        for _ in chunks:  # the upload may stop before the end of the stream
+            pass
+        return size, digest.hexdigest()
+
+    def enrich(self, record: dict[str, Any]) -> dict[str, Any]:
+        """Download the binaries of a record and add their size, hash and resource name"""
+        enriched = dict(record)
+        for field in self.fields or []:
+            url = record.get(field)
+            size: int | None = None
+            sha256 = resource_name = None
+            if is_blob_url(url):
+                resource_name = get_resource_name(
+                    self.prefix, url, record.get("FileExtension") or None
+                )
+                size, sha256 = self.download(url, resource_name)
+            enriched[f"{field}{SIZE_SUFFIX}"] = size
+            enriched[f"{field}{HASH_SUFFIX}"] = sha256
+            enriched[f"{field}{RESOURCE_SUFFIX}"] = resource_name
+        return enriched
+
+    def iter_pages(self, pages: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        """Pass the result pages through, with the binaries of their records downloaded"""
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="binary-download"
+        ) as executor:
+            for page in pages:
+                if self.fields is None and page["records"]:
+                    self.fields = get_blob_fields(page["records"])
+                if not self.fields:
+                    yield page
+                    continue
+                yield {**page, "records": list(executor.map(self.enrich, page["records"]))}
@@ -0,0 +1,147 @@
+"""Salesforce Bulk API 2.0 helpers."""
+
+import csv
+import io
+import json
+import time
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING, Any
+
+from cmem_plugin_salesforce.helper.api import request
+from cmem_plugin_salesforce.helper.query import get_fields, has_clause
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+CSV_CONTENT_TYPE = "text/csv"
+DEFAULT_CHUNK_SIZE = 50000
+"""Maximum number of records requested per result chunk"""
+DEFAULT_POLL_INTERVAL = 0.5
+MAX_POLL_INTERVAL = 10.0
+DEFAULT_TIMEOUT = 86400
+FINAL_JOB_STATES = ("JobComplete", "Failed", "Aborted")
+
+
+def is_bulk_query(soql_query: str) -> bool:
+    """Check if a query is supported by the Bulk API 2.0
+
+    Not supported are aggregates, `OFFSET`, sub-queries, `TYPEOF` and `FIELDS()`.
+    """
+    if has_clause(soql_query, "GROUP BY") or has_clause(soql_query, "OFFSET"):
+        return False
+    return not any(
+        "(" in field or field.upper().startswith("TYPEOF") for field in get_fields(soql_query)
+    )
+
+
+class BulkQuery:
+    """A Bulk API 2.0 query job
+
+    The job is submitted with `submit`, polled until completion with `wait` and its
+    CSV result is streamed chunk by chunk (following the `Sforce-Locator` header)
+    with `iter_rows`.
+    """
+
+    job_id: str | None = None
+
+    def __init__(  # noqa: PLR0913
+        self,
+        salesforce: "Salesforce",
+        soql_query: str,
+        include_deleted: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.salesforce = salesforce
+        self.soql_query = soql_query
+        self.operation = "queryAll" if include_deleted else "query"
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    @property
+    def url(self) -> str:
+        """Get the URL of the query job resource"""
+        url = f"{self.salesforce.bulk2_url}query"
+        return f"{url}/{self.job_id}" if self.job_id else url
+
+    def submit(self) -> str:
+        """Create the query job and return its ID"""
+        payload = {"operation": self.operation, "query": self.soql_query}
+        response = request(self.salesforce, "POST", self.url, data=json.dumps(payload))
+        self.job_id = str(response.json()["id"])
+        return self.job_id
+
+    def get_job(self) -> dict[str, Any]:
+        """Get the job info"""
+        return dict(request(self.salesforce, "GET", self.url).json())
+
+    def wait(self) -> dict[str, Any]:
+        """Poll the job until it is finished and return the final job info"""
+        from simple_salesforce.exceptions import SalesforceOperationError  # noqa: PLC0415
+
+        if self.job_id is None:
+            self.submit()
+        deadline = time.monotonic() + self.timeout
+        interval = self.poll_interval
+        while True:
+            job = self.get_job()
+            if job["state"] == "JobComplete":
+                return job
+            if job["state"] in FINAL_JOB_STATES:
+                raise SalesforceOperationError(
+                    f"Bulk query job {self.job_id} ended in state {job['state']}: "
+                    f"{job.get('errorMessage', '')}"
+                )
+            if time.monotonic() > deadline:
+                raise SalesforceOperationError(
+                    f"Bulk query job {self.job_id} timed out in state {job['state']}"
+                )
+            time.sleep(interval)
+            interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+    def iter_rows(
+        self, locator: str = "", on_chunk: Callable[[str], None] | None = None
+    ) -> Iterator[list[str]]:
+        """Yield the CSV header followed by all result rows (from the given locator on)
+
+        Each result chunk is parsed while it is downloaded, so only the rows which are
+        currently processed are held in memory. After the rows of a chunk are consumed,
+        `on_chunk` is called with the locator of the next chunk (`null` after the last).
+        """
+        header_sent = False
+        while True:
+            params: dict[str, Any] = {"maxRecords": self.chunk_size}
+            if locator:
+                params["locator"] = locator
+            response = request(
+                self.salesforce,
+                "GET",
+                f"{self.url}/results",
+                params=params,
+                headers={"Accept": CSV_CONTENT_TYPE},
+                stream=True,
+            )
+            with response:
+                # keep the raw stream readable at EOF for the text wrapper
+                response.raw.auto_close = False
+                response.raw.decode_content = True
+                text = io.TextIOWrapper(response.raw, encoding="utf-8", newline="")  # type: ignore[type-var]
+                reader = csv.reader(text)
+                header = next(reader, None)
+                if header is not None and not header_sent:
+                    header_sent = True
+                    yield header
+                yield from reader
+                locator = response.headers.get("Sforce-Locator", "")
+            if on_chunk is not None:
+                on_chunk(locator or "null")
+            if locator in ("", "null"):
+                return
+
+    def execute(self) -> Iterator[list[str]]:
+        """Submit the job, wait for it and stream the result rows (header first)"""
+        self.submit()
+        self.wait()
+        return self.iter_rows()
@@ -0,0 +1,84 @@
+"""Change detection for write operations (content hashes of written records)."""
+
+import hashlib
+import json
+import sqlite3
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+INDEX_FILE = "changes.sqlite"
+"""File of the change index in the state directory"""
+
+
+def get_key_value(record: dict[str, str], key: str) -> str:
+    """Get the value of the key field of a record (empty if there is none)"""
+    key = key.lower()
+    return next((value for field, value in record.items() if field.lower() == key), "")
+
+
+def get_record_hash(record: dict[str, str], key: str) -> str:
+    """Get the content hash of a record (without its key fields and empty fields)"""
+    keys = {"id", key.lower()}
+    content = {
+        field: value for field, value in record.items() if value and field.lower() not in keys
+    }
+    data = json.dumps(content, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ChangeIndex:
+    """Content hashes of the records written to an object, to skip unchanged records
+
+    The hashes are stored in a SQLite database per scope (account and object) and key
+    value. Records with a key value and the hash of their last successful write are
+    skipped. Only successful writes are added, so failed records are sent again.
+    """
+
+    def __init__(self, path: Path, scope: str, key: str = "Id") -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS records "
+            "(scope TEXT, key TEXT, hash TEXT, PRIMARY KEY (scope, key)) WITHOUT ROWID"
+        )
+        self.scope = scope
+        self.key = key
+        self.skipped = 0
+
+    def is_unchanged(self, record: dict[str, str]) -> bool:
+        """Check if a record was written with the same content before"""
+        value = get_key_value(record, self.key)
+        if not value:
+            return False
+        row = self.connection.execute(
+            "SELECT hash FROM records WHERE scope = ? AND key = ?", (self.scope, value)
+        ).fetchone()
+        return row is not None and row[0] == get_record_hash(record, self.key)
+
+    def filter(self, records: Iterable[dict[str, str]]) -> Iterator[dict[str, str]]:
+        """Pass the changed (or new) records through and count the skipped ones"""
+        for record in records:
+            if self.is_unchanged(record):
+                self.skipped += 1
+                continue
+            yield record
+
+    def add(self, results: Iterable[dict[str, Any]]) -> None:
+        """Add the records of the successful results (the key of created records is the Id)"""
+        rows = []
+        for result in results:
+            record = result.get("record")
+            if not result["success"] or record is None:
+                continue
+            value = get_key_value(record, self.key)
+            if not value and self.key.lower() == "id":
+                value = result.get("id") or ""
+            if value:
+                rows.append((self.scope, value, get_record_hash(record, self.key)))
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?)", rows)
+
+    def close(self) -> None:
+        """Close the database"""
+        self.connection.close()
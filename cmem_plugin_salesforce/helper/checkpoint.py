@@ -0,0 +1,126 @@
+"""Checkpoints of long running executions, to resume them after a failure."""
+
+import hashlib
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, TypeVar
+
+from cmem_plugin_salesforce.helper.state import StateStore, get_state_directory
+
+CHECKPOINT_FILE = "checkpoints.json"
+"""File of the checkpoints in the state directory"""
+
+Item = TypeVar("Item")
+
+
+def get_checkpoint_store() -> StateStore:
+    """Get the checkpoint store in the configured state directory"""
+    return StateStore(get_state_directory() / CHECKPOINT_FILE)
+
+
+def get_fingerprint(*parts: object) -> str:
+    """Get the fingerprint of the configuration a checkpoint belongs to"""
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class Checkpoint:
+    """Progress of the execution of a task, stored durably after each completed step
+
+    The progress is only valid for the same configuration (given by the fingerprint),
+    so a changed task starts from the beginning. The checkpoint is removed when the
+    execution is finished.
+    """
+
+    def __init__(self, store: StateStore, key: str, fingerprint: str) -> None:
+        self.store = store
+        self.key = key
+        self.fingerprint = fingerprint
+        entry = store.get(key)
+        self.progress: dict[str, Any] = (
+            entry.get("progress", {}) if entry.get("fingerprint") == fingerprint else {}
+        )
+
+    def save(self, **progress: Any) -> None:  # noqa: ANN401
+        """Store the progress"""
+        self.progress = progress
+        self.store.put(self.key, {"fingerprint": self.fingerprint, "progress": progress})
+
+    def clear(self) -> None:
+        """Remove the checkpoint (the execution is finished)"""
+        self.progress = {}
+        self.store.delete(self.key)
+
+    def iter_pages(self, pages: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        """Pass query result pages through and store the cursor after each consumed page
+
+        A page counts as consumed when the next page is requested. After the last page,
+        the checkpoint is removed.
+        """
+        records = self.progress.get("records", 0)
+        for page in pages:
+            yield page
+            records += len(page["records"])
+            if page["done"]:
+                self.clear()
+            else:
+                self.save(next_records_url=page["nextRecordsUrl"], records=records)
+
+    def save_locator(self, job_id: str, locator: str) -> None:
+        """Store the locator of the next result chunk of a bulk query job
+
+        After the last chunk (locator `null`), the checkpoint is removed.
+        """
+        if locator in ("", "null"):
+            self.clear()
+        else:
+            self.save(job_id=job_id, locator=locator)
+
+
+class WriteProgress:
+    """Progress of a write: the number of input rows with final results
+
+    Input rows are numbered while they are read. The row number of each record sent
+    to the batching is queued, and when all results of a batch are consumed, the rows
+    up to its last record are complete (batches are written and their results are
+    yielded in input order). Rows without a sent record (skipped or rejected) are
+    complete with the next batch.
+    """
+
+    def __init__(self, checkpoint: Checkpoint, save: Callable[[int, int], None]) -> None:
+        self.checkpoint = checkpoint
+        self.save = save
+        self.skipped_inputs = int(checkpoint.progress.get("input", 0))
+        """Number of inputs which were completely written before"""
+        self.skipped_rows = int(checkpoint.progress.get("rows", 0))
+        """Number of rows of the next input which were written before"""
+        self.input = 0
+        self.read = 0
+        self.positions: deque[int] = deque()
+
+    def skip(self, rows: Iterable[Item], input_index: int) -> Iterator[Item]:
+        """Skip the rows of an input which were written before and number the others"""
+        self.input = input_index
+        self.read = 0
+        skip = self.skipped_rows if input_index == self.skipped_inputs else 0
+        for row in rows:
+            self.read += 1
+            if self.read > skip:
+                yield row
+
+    def track(self, records: Iterable[Item]) -> Iterator[Item]:
+        """Queue the row number of each record which is sent"""
+        for record in records:
+            self.positions.append(self.read)
+            yield record
+
+    def count(self, results: Iterable[Item]) -> Iterator[Item]:
+        """Pass the results of a batch through and save the progress after the last one"""
+        count = 0
+        for result in results:
+            count += 1
+            yield result
+        position = None
+        for _ in range(min(count, len(self.positions))):
+            position = self.positions.popleft()
+        if position is not None:
+            self.save(self.input, position)
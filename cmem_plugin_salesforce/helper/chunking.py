@@ -0,0 +1,179 @@
+"""Parallel extraction of SOQL queries in primary key (Id) ranges."""
+
+import string
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from queue import Full, Queue
+from typing import TYPE_CHECKING, Any
+
+from cmem_plugin_salesforce.helper.query import (
+    add_condition,
+    get_object_name,
+    has_clause,
+    iter_query_pages,
+)
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+BASE62 = string.digits + string.ascii_uppercase + string.ascii_lowercase
+"""Alphabet of record Ids (in the sort order Salesforce uses for Ids)"""
+ID_LENGTH = 15
+PAGES_PER_WORKER = 2
+"""Number of result pages buffered per worker"""
+QUEUE_TIMEOUT = 0.5
+
+PageProducer = Callable[[], Iterator[dict[str, Any]]]
+"""Function which starts a query and returns an iterator over its result pages"""
+
+
+def id_to_int(record_id: str) -> int:
+    """Convert a (15 or 18 characters) record Id to a number"""
+    value = 0
+    for char in record_id[:ID_LENGTH]:
+        value = value * len(BASE62) + BASE62.index(char)
+    return value
+
+
+def int_to_id(value: int) -> str:
+    """Convert a number to a 15 characters record Id"""
+    chars = []
+    for _ in range(ID_LENGTH):
+        value, remainder = divmod(value, len(BASE62))
+        chars.append(BASE62[remainder])
+    return "".join(reversed(chars))
+
+
+def split_id_range(first_id: str, last_id: str, chunks: int) -> list[str]:
+    """Get the inner boundaries which split an Id range into (at most) n chunks"""
+    first, last = id_to_int(first_id), id_to_int(last_id)
+    boundaries = [first + (last - first) * index // chunks for index in range(1, chunks)]
+    return [int_to_id(boundary) for boundary in sorted(set(boundaries)) if first < boundary]
+
+
+class ChunkedQuery:
+    """A SOQL query which is executed in Id ranges on a pool of workers
+
+    Similar to the PK chunking of the Bulk API, the Id space of the queried object is
+    split into ranges, and each range is fetched with its own paged sub-query.
+    The pages of all sub-queries are merged into one stream. An ordered merge emits
+    the chunks one after another (in Id order), an unordered merge emits pages as soon
+    as they arrive. In both cases, only a few pages per worker are buffered.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        salesforce: "Salesforce",
+        soql_query: str,
+        chunks: int,
+        workers: int,
+        ordered: bool,
+        include_deleted: bool = False,
+    ) -> None:
+        if has_clause(soql_query, "LIMIT") or has_clause(soql_query, "OFFSET"):
+            raise ValueError("Queries with LIMIT or OFFSET can not be executed in chunks.")
+        if has_clause(soql_query, "GROUP BY"):
+            raise ValueError("Aggregate queries can not be executed in chunks.")
+        self.salesforce = salesforce
+        self.soql_query = soql_query
+        self.chunks = max(chunks, 1)
+        self.workers = max(workers, 1)
+        self.ordered = ordered
+        self.include_deleted = include_deleted
+
+    def get_boundaries(self) -> list[str]:
+        """Get the Id boundaries of the chunks"""
+        object_name = get_object_name(self.soql_query)
+        first_last = []
+        for direction in ("ASC", "DESC"):
+            result = self.salesforce.query(
+                f"SELECT Id FROM {object_name} ORDER BY Id {direction} LIMIT 1",  # noqa: S608
+                include_deleted=self.include_deleted,
+            )
+            if not result["records"]:
+                return []
+            first_last.append(result["records"][0]["Id"])
+        return split_id_range(first_last[0], first_last[1], self.chunks)
+
+    def get_queries(self) -> list[str]:
+        """Get the sub-queries, one per Id range"""
+        boundaries = self.get_boundaries()
+        lower_bounds: list[str | None] = [None, *boundaries]
+        upper_bounds: list[str | None] = [*boundaries, None]
+        queries = []
+        for lower, upper in zip(lower_bounds, upper_bounds, strict=True):
+            conditions = []
+            if lower:
+                conditions.append(f"Id >= '{lower}'")
+            if upper:
+                conditions.append(f"Id < '{upper}'")
+            queries.append(
+                add_condition(self.soql_query, " AND ".join(conditions))
+                if conditions
+                else self.soql_query
+            )
+        return queries
+
+    def iter_pages(self, queries: list[str]) -> Iterator[tuple[int, dict[str, Any]]]:
+        """Execute the sub-queries in parallel and yield (chunk index, page) tuples
+
+        The last page of a chunk has `done` set. Errors of a worker are re-raised.
+        """
+        producers: list[PageProducer] = [
+            partial(iter_query_pages, self.salesforce, query, self.include_deleted)
+            for query in queries
+        ]
+        return iter_concurrent(producers, self.workers, self.ordered, "soql-chunk")
+
+
+def iter_concurrent(
+    producers: list[PageProducer], workers: int, ordered: bool, thread_name_prefix: str
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Consume several result page iterators on a pool of workers
+
+    Yields (producer index, page) tuples, either in producer order or as the pages
+    arrive. Each producer ends with a page which has `done` set. Only a few pages
+    per worker are buffered. Errors of a worker are re-raised.
+    """
+    stop = threading.Event()
+    buffer_size = PAGES_PER_WORKER * (1 if ordered else workers)
+    shared: Queue = Queue(maxsize=buffer_size)
+    queues = [Queue(maxsize=buffer_size) if ordered else shared for _ in producers]
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix)
+    for index, producer in enumerate(producers):
+        executor.submit(produce, index, producer, queues[index], stop)
+    try:
+        current = 0
+        while current < len(producers):
+            index, page = queues[current].get()
+            if isinstance(page, BaseException):
+                raise page
+            yield index, page
+            if page["done"]:
+                current += 1
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def produce(index: int, producer: PageProducer, target: Queue, stop: threading.Event) -> None:
+    """Fetch the pages of a producer into the target queue"""
+    try:
+        for page in producer():
+            if not put(target, (index, page), stop):
+                return
+    except Exception as error:  # noqa: BLE001
+        put(target, (index, error), stop)
+
+
+def put(target: Queue, item: tuple, stop: threading.Event) -> bool:
+    """Put an item into the queue unless the consumer stopped"""
+    while not stop.is_set():
+        try:
+            target.put(item, timeout=QUEUE_TIMEOUT)
+        except Full:
+            continue
+        return True
+    return False
@@ -0,0 +1,77 @@
+"""Salesforce sObject Collections API (synchronous writes of small record sets)."""
+
+import json
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from cmem_plugin_salesforce.helper.api import request
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+MAX_COLLECTION_SIZE = 200
+"""Maximum number of records of a sObject Collections request"""
+DEFAULT_COLLECTIONS_THRESHOLD = 1000
+"""Maximum number of input records, for which the collections are used automatically"""
+DEFAULT_WORKERS = 4
+"""Number of collection requests which are sent concurrently"""
+
+
+class SObjectCollections:
+    """Upsert record batches with concurrent sObject Collections requests
+
+    Each batch of up to 200 records is upserted with one synchronous request, so there
+    is no job overhead. At most `workers` requests are sent at the same time and the
+    results are yielded in the order of the batches.
+    """
+
+    def __init__(
+        self,
+        salesforce: "Salesforce",
+        object_name: str,
+        external_id_field: str = "Id",
+        workers: int = DEFAULT_WORKERS,
+    ) -> None:
+        self.salesforce = salesforce
+        self.object_name = object_name
+        self.external_id_field = external_id_field
+        self.workers = max(workers, 1)
+
+    @property
+    def url(self) -> str:
+        """Get the URL of the upsert resource"""
+        return (
+            f"{self.salesforce.base_url}composite/sobjects/"
+            f"{self.object_name}/{self.external_id_field}"
+        )
+
+    def upsert(self, batch: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Upsert a batch of records (partial success allowed)
+
+        The results have the format of the Bulk API results and contain the record.
+        """
+        payload = {
+            "allOrNone": False,
+            "records": [{"attributes": {"type": self.object_name}, **record} for record in batch],
+        }
+        response = request(self.salesforce, "PATCH", self.url, data=json.dumps(payload))
+        results: list[dict[str, Any]] = response.json()
+        for result, record in zip(results, batch, strict=False):
+            result.setdefault("created", False)
+            result["record"] = record
+        return results
+
+    def execute(self, batches: Iterable[list[dict[str, Any]]]) -> Iterator[list[dict[str, Any]]]:
+        """Upsert all batches and yield their results in order"""
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="sobject-collections"
+        ) as executor:
+            running: deque[Future[list[dict[str, Any]]]] = deque()
+            for batch in batches:
+                if len(running) >= self.workers:
+                    yield running.popleft().result()
+                running.append(executor.submit(self.upsert, batch))
+            while running:
+                yield running.popleft().result()
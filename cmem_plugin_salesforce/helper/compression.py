@@ -0,0 +1,61 @@
+"""Gzip compression of the HTTP transport."""
+
+import gzip
+import os
+import re
+
+COMPRESSION_ENV = "CMEM_PLUGIN_SALESFORCE_COMPRESSION"
+"""Environment variable to disable the compression (`false`), it is enabled by default"""
+ACCEPT_ENCODING = "gzip, deflate"
+"""Encodings accepted for responses (decoded by urllib3 while the body is read)"""
+GZIP = "gzip"
+COMPRESSION_LEVEL = 6
+"""Gzip level of request bodies (higher levels cost much more time for little gain)"""
+MIN_COMPRESSED_SIZE = 1024
+"""Minimum size of request bodies which are compressed"""
+UPLOAD_URL = re.compile(r"/jobs/ingest/\w+/batches/?$|/services/async/[\d.]+/job/\w+/batch/?$")
+"""Pattern of the bulk upload endpoints (Bulk API 2.0 and 1.0), which accept gzip bodies"""
+
+
+def is_enabled() -> bool:
+    """Check if the compression is enabled"""
+    return os.environ.get(COMPRESSION_ENV, "true").strip().lower() not in ("false", "0", "no")
+
+
+def get_accept_encoding() -> str:
+    """Get the `Accept-Encoding` header value"""
+    return ACCEPT_ENCODING if is_enabled() else "identity"
+
+
+def is_upload(method: str, url: str) -> bool:
+    """Check if a request uploads bulk data"""
+    return method.upper() in ("POST", "PUT") and UPLOAD_URL.search(url) is not None
+
+
+def compress(body: bytes | str) -> bytes:
+    """Compress a request body with gzip"""
+    data = body.encode() if isinstance(body, str) else body
+    return gzip.compress(data, compresslevel=COMPRESSION_LEVEL, mtime=0)
+
+
+def encode_request(method: str | bytes, url: str | bytes, kwargs: dict) -> dict:
+    """Get the request arguments with the encoding headers (and compressed upload data)
+
+    Bulk upload bodies (`bytes` or `str`) of at least 1 KiB are compressed and sent with
+    `Content-Encoding: gzip`. Streamed bodies are sent as they are.
+    """
+    method = method.decode() if isinstance(method, bytes) else method
+    url = url.decode() if isinstance(url, bytes) else url
+    headers = dict(kwargs.get("headers") or {})
+    headers.setdefault("Accept-Encoding", get_accept_encoding())
+    data = kwargs.get("data")
+    if (
+        is_enabled()
+        and isinstance(data, bytes | str)
+        and len(data) >= MIN_COMPRESSED_SIZE
+        and "Content-Encoding" not in headers
+        and is_upload(method, url)
+    ):
+        headers["Content-Encoding"] = GZIP
+        return {**kwargs, "headers": headers, "data": compress(data)}
+    return {**kwargs, "headers": headers}
@@ -0,0 +1,158 @@
+"""Streaming upload of query results to a dataset resource."""
+
+import io
+import json
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from queue import Empty, Full, Queue
+from typing import IO, Any
+
+from cmem_plugin_base.dataintegration.context import UserContext
+from cmem_plugin_base.dataintegration.utils import write_to_dataset
+
+FORMAT_JSON = "json"
+FORMAT_NDJSON = "ndjson"
+QUEUE_SIZE = 4
+"""Number of record batches buffered for the upload"""
+QUEUE_TIMEOUT = 0.5
+ROWS_PER_BATCH = 1000
+"""Number of Bulk API rows which are passed to the upload at once"""
+
+Upload = Callable[[str, IO, UserContext | None], Any]
+
+
+class IteratorReader(io.RawIOBase):
+    """Read-only binary file object which reads from an iterator of byte chunks"""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        super().__init__()
+        self.chunks = chunks
+        self.pending = b""
+
+    def readable(self) -> bool:
+        """Check if the file is readable (it is)"""
+        return True
+
+    def readinto(self, buffer: Any) -> int:  # noqa: ANN401
+        """Read the next bytes into the buffer (0 at the end)"""
+        while not self.pending:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return 0
+            self.pending = chunk
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def iter_json_array(batches: Iterable[list[dict[str, Any]]]) -> Iterator[bytes]:
+    """Serialize record batches as one JSON array (one record per line)"""
+    separator = b"[\n"
+    for batch in batches:
+        for record in batch:
+            yield separator + json.dumps(record).encode()
+            separator = b",\n"
+    yield b"[]\n" if separator == b"[\n" else b"\n]\n"
+
+
+def iter_ndjson(batches: Iterable[list[dict[str, Any]]]) -> Iterator[bytes]:
+    """Serialize record batches as newline delimited JSON"""
+    for batch in batches:
+        if batch:
+            yield b"".join(json.dumps(record).encode() + b"\n" for record in batch)
+
+
+class DatasetWriter:
+    """Upload of records to a dataset resource, while the records are produced
+
+    The records are passed to a background thread via a small bounded queue, which
+    serializes them and streams them as request body. So the memory usage only
+    depends on the size of the queue, not on the number of records.
+    """
+
+    def __init__(
+        self,
+        dataset_id: str,
+        user: UserContext | None = None,
+        output_format: str = FORMAT_JSON,
+        upload: Upload | None = None,
+    ) -> None:
+        self.dataset_id = dataset_id
+        self.user = user
+        self.serialize = iter_ndjson if output_format == FORMAT_NDJSON else iter_json_array
+        self.upload = upload or write_to_dataset
+        self.queue: Queue[list[dict[str, Any]] | None] = Queue(maxsize=QUEUE_SIZE)
+        self.thread = threading.Thread(target=self._run, name="dataset-writer", daemon=True)
+        self.error: BaseException | None = None
+
+    def start(self) -> None:
+        """Start the upload"""
+        self.thread.start()
+
+    def write(self, records: list[dict[str, Any]]) -> None:
+        """Pass records to the upload (blocks while the queue is full)"""
+        self._put(records)
+
+    def close(self) -> None:
+        """Finish the upload and wait for it (errors of the upload are raised)"""
+        if self.thread.is_alive():
+            self._put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def tee_pages(self, pages: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        """Pass REST API result pages through and upload their records"""
+        self.start()
+        try:
+            for page in pages:
+                self.write(page["records"])
+                yield page
+        finally:
+            self.close()
+
+    def tee_rows(self, header: list[str], rows: Iterable[list[str]]) -> Iterator[list[str]]:
+        """Pass Bulk API result rows through and upload them as records"""
+        self.start()
+        try:
+            batch = []
+            for row in rows:
+                batch.append(dict(zip(header, row, strict=False)))
+                if len(batch) >= ROWS_PER_BATCH:
+                    self.write(batch)
+                    batch = []
+                yield row
+            self.write(batch)
+        finally:
+            self.close()
+
+    def _put(self, item: list[dict[str, Any]] | None) -> None:
+        """Put an item into the queue unless the upload stopped"""
+        while self.thread.is_alive():
+            try:
+                self.queue.put(item, timeout=QUEUE_TIMEOUT)
+            except Full:
+                continue
+            return
+        if self.error is not None:
+            raise self.error
+
+    def _iter_batches(self) -> Iterator[list[dict[str, Any]]]:
+        """Get the record batches from the queue until the end marker"""
+        while True:
+            try:
+                batch = self.queue.get(timeout=QUEUE_TIMEOUT)
+            except Empty:
+                continue
+            if batch is None:
+                return
+            yield batch
+
+    def _run(self) -> None:
+        """Upload the serialized records"""
+        try:
+            reader = io.BufferedReader(IteratorReader(self.serialize(self._iter_batches())))
+            self.upload(self.dataset_id, reader, self.user)
+        except BaseException as error:  # noqa: BLE001
+            self.error = error
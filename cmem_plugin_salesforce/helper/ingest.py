@@ -0,0 +1,244 @@
+"""Salesforce Bulk API 2.0 ingest jobs."""
+
+import csv
+import io
+import json
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from cmem_plugin_salesforce.helper.api import request
+from cmem_plugin_salesforce.helper.bulk import (
+    CSV_CONTENT_TYPE,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_TIMEOUT,
+    FINAL_JOB_STATES,
+    MAX_POLL_INTERVAL,
+)
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+MAX_JOB_BYTES = 100_000_000
+"""Maximum size of the CSV data of an ingest job (before base64 encoding by Salesforce)"""
+DEFAULT_WORKERS = 4
+"""Number of ingest jobs which run concurrently"""
+
+
+def to_csv(records: list[dict[str, Any]]) -> bytes:
+    """Serialize records as CSV (columns in order of appearance, missing values empty)"""
+    columns = list(dict.fromkeys(column for record in records for column in record))
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=columns, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(records)
+    return output.getvalue().encode()
+
+
+def get_record(row: dict[str, str]) -> dict[str, str]:
+    """Get the submitted record of a result row (without result columns and empty fields)"""
+    return {key: value for key, value in row.items() if value and not key.startswith("sf__")}
+
+
+class IngestJob:
+    """A Bulk API 2.0 ingest job with a single CSV upload
+
+    The job is created with `create`, the data is uploaded with `upload`, processing is
+    started with `close` and polled until completion with `wait`. The record results
+    are streamed with `iter_outcomes`.
+    """
+
+    job_id: str | None = None
+
+    def __init__(  # noqa: PLR0913
+        self,
+        salesforce: "Salesforce",
+        object_name: str,
+        operation: str = "upsert",
+        external_id_field: str = "Id",
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.salesforce = salesforce
+        self.object_name = object_name
+        self.operation = operation
+        self.external_id_field = external_id_field
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.info: dict[str, Any] = {}
+
+    @property
+    def url(self) -> str:
+        """Get the URL of the ingest job resource"""
+        url = f"{self.salesforce.bulk2_url}ingest"
+        return f"{url}/{self.job_id}" if self.job_id else url
+
+    def create(self) -> str:
+        """Create the ingest job and return its ID"""
+        payload = {
+            "object": self.object_name,
+            "operation": self.operation,
+            "contentType": "CSV",
+            "lineEnding": "LF",
+        }
+        if self.operation == "upsert":
+            payload["externalIdFieldName"] = self.external_id_field
+        response = request(self.salesforce, "POST", self.url, data=json.dumps(payload))
+        self.info = dict(response.json())
+        self.job_id = str(self.info["id"])
+        return self.job_id
+
+    def upload(self, data: bytes) -> None:
+        """Upload the CSV data of the job"""
+        request(
+            self.salesforce,
+            "PUT",
+            f"{self.url}/batches",
+            data=data,
+            headers={"Content-Type": CSV_CONTENT_TYPE},
+        )
+
+    def close(self) -> None:
+        """Mark the upload as complete, so that Salesforce starts processing the job"""
+        payload = {"state": "UploadComplete"}
+        request(self.salesforce, "PATCH", self.url, data=json.dumps(payload))
+
+    def get_job(self) -> dict[str, Any]:
+        """Get the job info"""
+        self.info = dict(request(self.salesforce, "GET", self.url).json())
+        return self.info
+
+    def wait(self) -> dict[str, Any]:
+        """Poll the job until it is in a final state and return the job info"""
+        from simple_salesforce.exceptions import SalesforceOperationError  # noqa: PLC0415
+
+        deadline = time.monotonic() + self.timeout
+        interval = self.poll_interval
+        while True:
+            job = self.get_job()
+            if job["state"] in FINAL_JOB_STATES:
+                return job
+            if time.monotonic() > deadline:
+                raise SalesforceOperationError(
+                    f"Bulk ingest job {self.job_id} timed out in state {job['state']}"
+                )
+            time.sleep(interval)
+            interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+    def run(self, records: list[dict[str, Any]]) -> "IngestJob":
+        """Create the job, upload the records and wait until the job is finished"""
+        self.create()
+        self.upload(to_csv(records))
+        self.close()
+        self.wait()
+        return self
+
+    def iter_results(self, result_type: str) -> Iterator[dict[str, str]]:
+        """Stream the rows of a result (successfulResults, failedResults, ...)"""
+        response = request(
+            self.salesforce,
+            "GET",
+            f"{self.url}/{result_type}/",
+            headers={"Accept": CSV_CONTENT_TYPE},
+            stream=True,
+        )
+        with response:
+            # keep the raw stream readable at EOF for the text wrapper
+            response.raw.auto_close = False
+            response.raw.decode_content = True
+            text = io.TextIOWrapper(response.raw, encoding="utf-8", newline="")  # type: ignore[type-var]
+            yield from csv.DictReader(text)
+
+    def iter_outcomes(self) -> Iterator[dict[str, Any]]:
+        """Stream the record results in the format of the Bulk API (1.0) results
+
+        Records which were not processed (if the job failed or was aborted) are
+        reported as failed with the error message of the job. The results contain the
+        submitted record (without empty fields).
+        """
+        for row in self.iter_results("successfulResults"):
+            created = row.get("sf__Created", "").lower() == "true"
+            yield {
+                "id": row.get("sf__Id"),
+                "success": True,
+                "created": created,
+                "errors": [],
+                "record": get_record(row),
+            }
+        for row in self.iter_results("failedResults"):
+            yield {
+                "id": row.get("sf__Id") or None,
+                "success": False,
+                "created": False,
+                "errors": [row.get("sf__Error", "")],
+                "record": get_record(row),
+            }
+        if self.info.get("state") == "JobComplete":
+            return
+        message = f"Job {self.job_id} {self.info.get('state')}: {self.info.get('errorMessage')}"
+        for row in self.iter_results("unprocessedrecords"):
+            yield {
+                "id": None,
+                "success": False,
+                "created": False,
+                "errors": [message],
+                "record": get_record(row),
+            }
+
+
+class BulkIngest:
+    """Upload record batches to concurrent Bulk API 2.0 ingest jobs
+
+    Each batch becomes an ingest job. At most `workers` jobs are uploaded and polled
+    at the same time, so only the batches of the running jobs are held in memory.
+    The jobs are yielded in order of their batches (a finished job waits for the jobs
+    of the earlier batches), so that the results follow the input order.
+    The operation of the jobs is `upsert`, `delete` or `hardDelete`.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        salesforce: "Salesforce",
+        object_name: str,
+        operation: str = "upsert",
+        external_id_field: str = "Id",
+        workers: int = DEFAULT_WORKERS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.salesforce = salesforce
+        self.object_name = object_name
+        self.operation = operation
+        self.external_id_field = external_id_field
+        self.workers = max(workers, 1)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def run(self, records: list[dict[str, Any]]) -> IngestJob:
+        """Run an ingest job for one batch of records"""
+        job = IngestJob(
+            self.salesforce,
+            self.object_name,
+            operation=self.operation,
+            external_id_field=self.external_id_field,
+            poll_interval=self.poll_interval,
+            timeout=self.timeout,
+        )
+        return job.run(records)
+
+    def execute(self, batches: Iterable[list[dict[str, Any]]]) -> Iterator[IngestJob]:
+        """Run the jobs of all batches and yield them in order of the batches"""
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="bulk-ingest"
+        ) as executor:
+            pending: deque[Future[IngestJob]] = deque()
+            for batch in batches:
+                if len(pending) >= self.workers:
+                    yield pending.popleft().result()
+                while pending and pending[0].done():
+                    yield pending.popleft().result()
+                pending.append(executor.submit(self.run, batch))
+            while pending:
+                yield pending.popleft().result()
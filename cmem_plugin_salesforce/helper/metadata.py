@@ -0,0 +1,201 @@
+"""Cached sObject metadata (describe results)."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from email.utils import formatdate
+from http import HTTPStatus
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from cmem_plugin_salesforce.helper.api import request
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+CACHE_DIR_ENV = "CMEM_PLUGIN_SALESFORCE_CACHE_DIR"
+"""Environment variable with a directory for persistent caches (optional)"""
+DEFAULT_TTL = 15 * 60
+"""Seconds a describe result is used without revalidation"""
+DEFAULT_MAX_ENTRIES = 128
+
+CacheKey = tuple[str, str, str]
+"""Key of a describe result: org instance, user and object name"""
+
+
+@dataclass(frozen=True)
+class FieldInfo:
+    """Index entry of a field of an sObject"""
+
+    name: str
+    type: str
+    length: int
+    updateable: bool
+    createable: bool
+    nillable: bool
+
+    @classmethod
+    def from_describe(cls, field: dict[str, Any]) -> "FieldInfo":
+        """Create the index entry from a field of a describe result"""
+        return cls(
+            name=field["name"],
+            type=field.get("type", "string"),
+            length=field.get("length", 0),
+            updateable=field.get("updateable", False),
+            createable=field.get("createable", False),
+            nillable=field.get("nillable", True),
+        )
+
+
+class ObjectDescription:
+    """Describe result of an sObject with a field index"""
+
+    def __init__(self, describe: dict[str, Any], last_modified: str, fetched: float) -> None:
+        self.describe = describe
+        self.last_modified = last_modified
+        self.fetched = fetched
+        self.fields = {
+            field["name"]: FieldInfo.from_describe(field) for field in describe["fields"]
+        }
+
+    @property
+    def name(self) -> str:
+        """Get the API name of the object"""
+        return str(self.describe["name"])
+
+    def to_json(self) -> str:
+        """Serialize the description (for the disk cache)"""
+        return json.dumps(
+            {
+                "describe": self.describe,
+                "last_modified": self.last_modified,
+                "fetched": self.fetched,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, text: str) -> "ObjectDescription":
+        """Deserialize a description (from the disk cache)"""
+        data = json.loads(text)
+        return cls(data["describe"], data["last_modified"], data["fetched"])
+
+
+class DescribeCache:
+    """LRU cache of describe results with time to live, keyed by org, user and object
+
+    The user is part of the key, as the field-level security (and so the described
+    fields) can differ per user. Entries are kept in memory and, if a directory is
+    given (or returned by the given function), also on disk. Expired entries are
+    revalidated with a conditional request (`If-Modified-Since`), so unchanged
+    metadata is not downloaded again.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        directory: Path | Callable[[], Path | None] | None = None,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries: OrderedDict[CacheKey, ObjectDescription] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, salesforce: "Salesforce", object_name: str, user: str = "") -> ObjectDescription:
+        """Get the description of an object for a user, fetch or revalidate it if needed"""
+        key = (salesforce.sf_instance, user, object_name)
+        with self.lock:
+            cached = self.entries.get(key) or self.load(key)
+        if cached is not None and time.time() - cached.fetched < self.ttl:
+            self.put(key, cached)
+            return cached
+        description = self.fetch(salesforce, object_name, cached)
+        self.put(key, description)
+        self.save(key, description)
+        return description
+
+    def fetch(
+        self, salesforce: "Salesforce", object_name: str, cached: ObjectDescription | None
+    ) -> ObjectDescription:
+        """Fetch the describe result, conditionally if there is a cached one"""
+        headers = {"If-Modified-Since": cached.last_modified} if cached else {}
+        response = request(
+            salesforce,
+            "GET",
+            f"{salesforce.base_url}sobjects/{object_name}/describe/",
+            headers=headers,
+        )
+        now = time.time()
+        if cached is not None and response.status_code == HTTPStatus.NOT_MODIFIED:
+            return ObjectDescription(cached.describe, cached.last_modified, now)
+        last_modified = (
+            response.headers.get("Last-Modified")
+            or response.headers.get("Date")
+            or formatdate(now, usegmt=True)
+        )
+        return ObjectDescription(response.json(), last_modified, now)
+
+    def put(self, key: CacheKey, description: ObjectDescription) -> None:
+        """Add an entry to the memory cache and evict the least recently used ones"""
+        with self.lock:
+            self.entries[key] = description
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def path(self, key: CacheKey) -> Path | None:
+        """Get the disk cache file of an entry"""
+        directory = self.directory() if callable(self.directory) else self.directory
+        if directory is None:
+            return None
+        scope = hashlib.sha256(f"{key[0]}\0{key[1]}".encode()).hexdigest()[:16]
+        return directory / f"describe-{scope}-{key[2]}.json"
+
+    def load(self, key: CacheKey) -> ObjectDescription | None:
+        """Load an entry from the disk cache"""
+        path = self.path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            return ObjectDescription.from_json(path.read_text(encoding="utf-8"))
+        except (ValueError, KeyError):
+            return None
+
+    def save(self, key: CacheKey, description: ObjectDescription) -> None:
+        """Write an entry to the disk cache"""
+        path = self.path(key)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(description.to_json(), encoding="utf-8")
+        temporary.replace(path)
+
+    def clear(self) -> None:
+        """Forget all entries in memory"""
+        with self.lock:
+            self.entries.clear()
+
+
+def get_cache_directory() -> Path | None:
+    """Get the configured directory for persistent caches"""
+    directory = os.environ.get(CACHE_DIR_ENV, "")
+    return Path(directory) if directory else None
+
+
+DESCRIBE_CACHE = DescribeCache(directory=get_cache_directory)
+"""The describe cache shared by all plugin instances of the process
+
+The cache directory is resolved on use, so a later change of the environment applies.
+"""
+
+
+def describe(salesforce: "Salesforce", object_name: str, user: str = "") -> ObjectDescription:
+    """Get the (cached) description of an object for a user"""
+    return DESCRIBE_CACHE.get(salesforce, object_name, user)
@@ -0,0 +1,239 @@
+"""Execution metrics (phase timing and API usage)."""
+
+import json
+import os
+import threading
+import time
+from collections.abc import Generator, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, TypeVar
+
+import requests
+
+from cmem_plugin_salesforce.helper.compression import encode_request
+from cmem_plugin_salesforce.helper.throttle import (
+    DEFAULT_RESERVE,
+    MAX_RETRIES,
+    RateLimiter,
+    parse_api_usage,
+)
+
+METRICS_FILE_ENV = "CMEM_PLUGIN_SALESFORCE_METRICS_FILE"
+"""Environment variable with a file to which the metrics of each execution are appended"""
+
+Item = TypeVar("Item")
+
+
+def format_bytes(size: float) -> str:
+    """Format a byte count with a binary unit"""
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:  # noqa: PLR2004
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def get_body_size(body: object) -> int:
+    """Get the size of a request body (0 for streamed bodies)"""
+    if isinstance(body, bytes | str):
+        return len(body)
+    return 0
+
+
+def get_received_size(response: requests.Response) -> int:
+    """Get the size of a (read) response body as transferred (compressed, if it was)"""
+    tell = getattr(response.raw, "tell", None)
+    if callable(tell):
+        return int(tell())
+    return len(response.content or b"")
+
+
+def get_stream_size(raw: object) -> int:
+    """Get the number of bytes read from a streamed response body (as transferred)"""
+    tell = getattr(raw, "tell", None)
+    return int(tell()) if callable(tell) else 0
+
+
+class Metrics:
+    """Wall time per phase and HTTP usage of an execution
+
+    Phases are timed with `phase` (or `iter_phase` for lazy iterators). The time of a
+    nested phase is only counted for the nested phase, so the phases of a thread add up
+    to its wall time. Phases of concurrent threads are summed.
+    HTTP round trips (and how many were throttled), transferred (wire) bytes and the latest
+    `Sforce-Limit-Info` API usage are recorded by the responses of a `MeteredSession`.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.phases: dict[str, float] = {}
+        self.requests = 0
+        self.throttled = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.api_usage: tuple[int, int] | None = None
+        self.streams: list[Any] = []
+        """Raw bodies of streamed responses which are not closed yet"""
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase (nested phases are excluded)"""
+        stack: list[float] = self.local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested
+
+    def iter_phase(self, items: Iterable[Item], name: str) -> Generator[Item]:
+        """Pass the items through and time the production of each item as phase
+
+        Closing the returned generator also closes the given iterator.
+        """
+        iterator = iter(items)
+        try:
+            while True:
+                with self.phase(name):
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def add_response(
+        self, response: requests.Response, stream: bool = False, throttled: bool = False
+    ) -> None:
+        """Record a round trip (streamed bodies are counted when they are closed)"""
+        usage = parse_api_usage(response.headers)
+        with self.lock:
+            self.requests += 1
+            self.throttled += throttled
+            self.bytes_sent += get_body_size(response.request.body)
+            self.collect_streams()
+            if stream:
+                self.streams.append(response.raw)
+            else:
+                self.bytes_received += get_received_size(response)
+            if usage:
+                self.api_usage = usage
+
+    def collect_streams(self) -> None:
+        """Count the bytes of the closed (consumed) streams and drop them (lock is held)"""
+        streams = []
+        for raw in self.streams:
+            if getattr(raw, "closed", True):
+                self.bytes_received += get_stream_size(raw)
+            else:
+                streams.append(raw)
+        self.streams = streams
+
+    def get_bytes_received(self) -> int:
+        """Get the number of received (body) bytes, including the streamed ones"""
+        with self.lock:
+            self.collect_streams()
+            return self.bytes_received + sum(get_stream_size(raw) for raw in self.streams)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get the metrics as JSON compatible dict"""
+        with self.lock:
+            phases = {name: round(seconds, 6) for name, seconds in self.phases.items()}
+            api_usage = self.api_usage
+        return {
+            "seconds": round(time.perf_counter() - self.started, 6),
+            "phases": phases,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.get_bytes_received(),
+            "api_usage": {"used": api_usage[0], "max": api_usage[1]} if api_usage else None,
+        }
+
+    def get_summary(self) -> list[tuple[str, str]]:
+        """Get the metrics as execution report summary"""
+        data = self.to_dict()
+        summary = [("Total time", f"{data['seconds']:.2f} s")]
+        summary.extend(
+            (f"Time: {name}", f"{seconds:.2f} s") for name, seconds in data["phases"].items()
+        )
+        summary.append(("HTTP requests", str(data["requests"])))
+        if data["throttled"]:
+            summary.append(("Throttled requests", str(data["throttled"])))
+        summary.append(("Bytes sent", format_bytes(data["bytes_sent"])))
+        summary.append(("Bytes received", format_bytes(data["bytes_received"])))
+        if data["api_usage"]:
+            usage = data["api_usage"]
+            summary.append(("API usage", f"{usage['used']}/{usage['max']} requests (24h)"))
+        return summary
+
+
+class MeteredSession(requests.Session):
+    """HTTP session which sends all requests with another session and records them
+
+    This way, pooled connections share the HTTP connections of the pool, while each
+    execution gets its own metrics. Compressed responses are accepted and bulk uploads
+    are compressed (see `compression`). If a rate limiter is given, each request waits
+    for a slot (timed as phase `throttle`) and throttled requests are repeated.
+    """
+
+    def __init__(
+        self,
+        http: requests.Session,
+        metrics: Metrics,
+        limiter: RateLimiter | None = None,
+        reserve: float = DEFAULT_RESERVE,
+    ) -> None:
+        super().__init__()
+        self.http = http
+        self.metrics = metrics
+        self.limiter = limiter
+        self.reserve = reserve
+
+    def request(self, method: str | bytes, url: str | bytes, *args, **kwargs) -> requests.Response:  # type: ignore[no-untyped-def, override]  # noqa: ANN002, ANN003
+        """Send the request with the wrapped session and record the response"""
+        kwargs = encode_request(method, url, kwargs)
+        stream = bool(kwargs.get("stream"))
+        if self.limiter is None:
+            response = self.http.request(method, url, *args, **kwargs)
+            self.metrics.add_response(response, stream=stream)
+            return response
+        retries = 0
+        while True:
+            with self.metrics.phase("throttle"):
+                self.limiter.acquire(self.reserve)
+            try:
+                response = self.http.request(method, url, *args, **kwargs)
+            except BaseException:
+                self.limiter.release(None)
+                raise
+            throttled = self.limiter.release(response)
+            self.metrics.add_response(response, stream=stream, throttled=throttled)
+            if not throttled or retries >= MAX_RETRIES:
+                return response
+            retries += 1
+            response.close()
+
+
+def export_metrics(record: Mapping[str, Any]) -> None:
+    """Append a metrics record as JSON line to the configured file (if any)"""
+    path = os.environ.get(METRICS_FILE_ENV, "")
+    if not path:
+        return
+    line = json.dumps({"time": datetime.now(tz=UTC).isoformat(), **record})
+    file = Path(path)
+    file.parent.mkdir(parents=True, exist_ok=True)
+    with file.open("a", encoding="utf-8") as output:
+        output.write(line + "\n")
@@ -0,0 +1,134 @@
+"""Concurrent execution of several SOQL queries in one task."""
+
+import json
+from collections import Counter
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, Any
+from urllib.parse import quote_plus
+
+from cmem_plugin_base.dataintegration.entity import Entity, EntityPath, EntitySchema
+
+from cmem_plugin_salesforce.helper.api import request
+from cmem_plugin_salesforce.helper.chunking import PageProducer, iter_concurrent
+from cmem_plugin_salesforce.helper.projection import TYPE_URI, Projector
+from cmem_plugin_salesforce.helper.query import get_object_name, iter_more_pages
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+MAX_BATCH_REQUESTS = 25
+"""Maximum number of subrequests of a Composite Batch request"""
+QUERY_PATH = "query"
+"""Path of the entities which tells the query of a record"""
+QUERY_INDEX = "queryIndex"
+"""Key of the result pages with the index of their query"""
+
+
+def get_labels(queries: list[str]) -> list[str]:
+    """Get a label per query (the object name, numbered if several queries use it)"""
+    names = [get_object_name(query) for query in queries]
+    totals = Counter(names)
+    seen: Counter[str] = Counter()
+    labels = []
+    for name in names:
+        seen[name] += 1
+        labels.append(f"{name} ({seen[name]})" if totals[name] > 1 else name)
+    return labels
+
+
+class MultiQuery:
+    """Several SOQL queries, executed concurrently over one connection
+
+    The first result pages of all queries are fetched with Composite Batch requests
+    (up to 25 queries per request, several requests are sent concurrently). Small
+    queries are complete with this page. The further pages of larger queries are
+    fetched on a pool of workers while the results are consumed.
+    """
+
+    def __init__(self, salesforce: "Salesforce", queries: list[str], workers: int = 4) -> None:
+        self.salesforce = salesforce
+        self.queries = queries
+        self.workers = max(workers, 1)
+
+    def fetch_first_pages(self, offset: int) -> list[dict[str, Any]]:
+        """Fetch the first result pages of up to 25 queries with one Composite Batch request"""
+        from simple_salesforce.exceptions import SalesforceOperationError  # noqa: PLC0415
+
+        queries = self.queries[offset : offset + MAX_BATCH_REQUESTS]
+        payload = {
+            "batchRequests": [
+                {"method": "GET", "url": f"v{self.salesforce.sf_version}/query/?q={quote_plus(q)}"}
+                for q in queries
+            ]
+        }
+        url = f"{self.salesforce.base_url}composite/batch"
+        response = request(self.salesforce, "POST", url, data=json.dumps(payload))
+        pages = []
+        for index, result in enumerate(response.json()["results"]):
+            if result["statusCode"] >= 300:  # noqa: PLR2004
+                errors = result["result"] if isinstance(result["result"], list) else []
+                message = "; ".join(f"{e.get('errorCode')}: {e.get('message')}" for e in errors)
+                raise SalesforceOperationError(f"Query {offset + index + 1} failed: {message}")
+            pages.append({**result["result"], QUERY_INDEX: offset + index})
+        return pages
+
+    def get_first_pages(self) -> list[dict[str, Any]]:
+        """Fetch the first result pages of all queries"""
+        offsets = range(0, len(self.queries), MAX_BATCH_REQUESTS)
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="soql-batch"
+        ) as executor:
+            return [
+                page for pages in executor.map(self.fetch_first_pages, offsets) for page in pages
+            ]
+
+    def iter_pages(self, first_pages: list[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        """Yield the first pages and the further pages of all queries (as they arrive)
+
+        Each page has the index of its query as `queryIndex`.
+        """
+        yield from first_pages
+        pending = [page for page in first_pages if not page["done"]]
+        producers: list[PageProducer] = [
+            partial(iter_more_pages, self.salesforce, page) for page in pending
+        ]
+        for index, page in iter_concurrent(producers, self.workers, False, "soql-multi"):
+            if page is pending[index]:
+                continue
+            yield {**page, QUERY_INDEX: pending[index][QUERY_INDEX]}
+
+
+class TaggedProjector:
+    """Converter of the records of several queries to entities of one schema
+
+    The paths are the query label (`query`) and the columns of all queries. Each
+    entity has the values of the columns of its query.
+    """
+
+    def __init__(self, labels: list[str], projectors: list[Projector]) -> None:
+        self.labels = labels
+        self.projectors = projectors
+        paths = [QUERY_PATH]
+        for projector in projectors:
+            paths.extend(path for path in projector.paths if path not in paths)
+        self.paths = paths
+        self.positions = [[paths.index(path) for path in p.paths] for p in projectors]
+
+    @property
+    def schema(self) -> EntitySchema:
+        """Get the entity schema"""
+        return EntitySchema(type_uri=TYPE_URI, paths=[EntityPath(path=p) for p in self.paths])
+
+    def project(self, index: int, records: Iterable[Mapping[str, Any]]) -> Iterator[Entity]:
+        """Convert the records of a query to entities"""
+        label = [self.labels[index]]
+        positions = self.positions[index]
+        width = len(self.paths)
+        for entity in self.projectors[index].project(records):
+            values: list[list[str]] = [[] for _ in range(width)]
+            values[0] = label
+            for position, value in zip(positions, entity.values, strict=True):
+                values[position] = list(value)
+            yield Entity(uri=entity.uri, values=values)
@@ -0,0 +1,101 @@
+"""Pre-flight checks of SOQL queries: query plans (explain) and record counts."""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from cmem_plugin_salesforce.helper.api import request
+from cmem_plugin_salesforce.helper.query import get_clauses, get_count_query, has_clause
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+FULL_SCAN = "TableScan"
+"""Leading operation of a plan which reads all records of the object"""
+SELECTIVE_COST = 1.0
+"""Relative cost up to which the query optimizer considers a plan selective"""
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """The cheapest plan of the query optimizer for a query"""
+
+    cardinality: int
+    """Estimated number of result records"""
+    sobject_cardinality: int
+    """Estimated number of records of the queried object"""
+    leading_operation: str
+    relative_cost: float
+    notes: tuple[str, ...] = ()
+
+    @classmethod
+    def from_plan(cls, plan: dict[str, Any]) -> "QueryPlan":
+        """Create a plan from an entry of the explain response"""
+        return cls(
+            cardinality=int(plan.get("cardinality") or 0),
+            sobject_cardinality=int(plan.get("sobjectCardinality") or 0),
+            leading_operation=str(plan.get("leadingOperationType", "")),
+            relative_cost=float(plan.get("relativeCost") or 0),
+            notes=tuple(
+                f"{note['description']} ({', '.join(note.get('fields', []))})"
+                for note in plan.get("notes", [])
+            ),
+        )
+
+    @property
+    def is_full_scan(self) -> bool:
+        """Check if the plan is a non-selective scan of all records of the object"""
+        return self.leading_operation == FULL_SCAN or self.relative_cost > SELECTIVE_COST
+
+    def get_summary(self) -> list[tuple[str, str]]:
+        """Get the plan as report summary"""
+        return [
+            ("Query plan", self.leading_operation),
+            ("Query plan cost", f"{self.relative_cost:g}"),
+            ("Query plan cardinality", str(self.cardinality)),
+        ]
+
+    def get_warnings(self) -> list[str]:
+        """Get the warnings about an expensive plan (and the notes of the optimizer)"""
+        if not self.is_full_scan:
+            return []
+        return [
+            f"The query is not selective: {self.leading_operation} of about "
+            f"{self.sobject_cardinality} records (relative cost {self.relative_cost:g}). "
+            "Consider a filter on an indexed field.",
+            *self.notes,
+        ]
+
+
+def explain(salesforce: "Salesforce", soql_query: str) -> QueryPlan | None:
+    """Get the cheapest plan of a query (without executing it)
+
+    Returns None, if the optimizer has no plan for the query.
+    """
+    response = request(
+        salesforce, "GET", f"{salesforce.base_url}query/", params={"explain": soql_query}
+    )
+    plans = [QueryPlan.from_plan(plan) for plan in response.json().get("plans", [])]
+    return min(plans, key=lambda plan: plan.relative_cost, default=None)
+
+
+def count_records(salesforce: "Salesforce", soql_query: str, include_deleted: bool = False) -> int:
+    """Count the records of a query with a `COUNT()` query (respecting its limit)"""
+    total = int(
+        salesforce.query(get_count_query(soql_query), include_deleted=include_deleted)["totalSize"]
+    )
+    limit = get_limit(soql_query)
+    return total if limit is None else min(total, limit)
+
+
+def get_limit(soql_query: str) -> int | None:
+    """Get the limit of a query (None without limit or with a bind variable)"""
+    for position, clause in get_clauses(soql_query):
+        if clause == "LIMIT":
+            value = soql_query[position + len(clause) :].split()[0]
+            return int(value) if value.isdigit() else None
+    return None
+
+
+def is_splittable(soql_query: str) -> bool:
+    """Check if a query can be split into Id chunks"""
+    return not any(has_clause(soql_query, keyword) for keyword in ("LIMIT", "OFFSET", "GROUP BY"))
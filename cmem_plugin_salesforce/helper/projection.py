@@ -0,0 +1,142 @@
+"""Projection of SOQL result records to entities."""
+
+import json
+import uuid
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from operator import itemgetter
+from typing import Any
+
+from cmem_plugin_base.dataintegration.entity import Entity, EntityPath, EntitySchema
+
+TYPE_URI = "https://example.org/vocab/salesforce"
+URI_PREFIX = "urn:salesforce:"
+
+Getter = Callable[[Mapping[str, Any]], Any]
+
+
+def format_boolean(value: bool) -> str:
+    """Format a boolean like the Salesforce APIs do"""
+    return "true" if value else "false"
+
+
+def format_json(value: object) -> str:
+    """Format a structured value (e.g. a sub-query result or an address) as JSON"""
+    return json.dumps(value, default=str)
+
+
+FORMATTERS: dict[type, Callable[[Any], str]] = {
+    bool: format_boolean,
+    int: str,
+    float: repr,
+    dict: format_json,
+    list: format_json,
+}
+
+
+def convert(value: object) -> list[str]:
+    """Convert a JSON value of a record to entity values (null is no value)"""
+    if value.__class__ is str:
+        return [value]  # type: ignore[list-item]
+    if value is None:
+        return []
+    return [FORMATTERS.get(value.__class__, str)(value)]
+
+
+def is_relationship(value: object) -> bool:
+    """Check if a value of a REST API record is a (parent) relationship record"""
+    return isinstance(value, Mapping) and "attributes" in value
+
+
+def get_paths(record: Mapping[str, Any], fields: Iterable[str] = ()) -> list[str]:
+    """Get the dotted column paths of a REST API record
+
+    Relationship records are flattened (`Account.Name`). If a relationship is null in
+    the record, its columns are taken from the given field list of the query.
+    """
+    fields = list(fields)
+    paths: list[str] = []
+    for key, value in record.items():
+        if key == "attributes":
+            continue
+        prefix = f"{key.lower()}."
+        nested = [field[len(prefix) :] for field in fields if field.lower().startswith(prefix)]
+        if is_relationship(value):
+            paths.extend(f"{key}.{path}" for path in get_paths(value, nested))
+        elif value is None and nested:
+            paths.extend(f"{key}.{path}" for path in nested)
+        else:
+            paths.append(key)
+    return paths
+
+
+def compile_getter(path: str) -> Getter:
+    """Create a function which gets the value of a dotted path from a record"""
+    first, *rest = path.split(".")
+    if not rest:
+        return itemgetter(first)
+
+    def get(record: Mapping[str, Any]) -> Any:  # noqa: ANN401
+        value = record.get(first)
+        for key in rest:
+            if value is None:
+                return None
+            value = value.get(key)
+        return value
+
+    return get
+
+
+class Projector:
+    """Converter of result records to entities, compiled once per schema
+
+    REST API records (JSON with nested relationship records) are converted with
+    `project`, Bulk API rows (CSV cells in column order) with `project_row`.
+    Entity URIs are derived from the record `Id` (if selected), so that the same
+    record always gets the same URI.
+    """
+
+    def __init__(self, paths: list[str], object_name: str = "") -> None:
+        self.paths = paths
+        self.object_name = object_name
+        self.getters = [compile_getter(path) for path in paths]
+        self.id_index = paths.index("Id") if "Id" in paths else None
+        self.uri_prefix = f"{URI_PREFIX}{object_name}:" if object_name else URI_PREFIX
+
+    @classmethod
+    def from_record(
+        cls, record: Mapping[str, Any], object_name: str = "", fields: Iterable[str] = ()
+    ) -> "Projector":
+        """Create the projector for the columns of a REST API record"""
+        return cls(get_paths(record, fields), object_name)
+
+    @property
+    def schema(self) -> EntitySchema:
+        """Get the entity schema"""
+        return EntitySchema(
+            type_uri=TYPE_URI,
+            paths=[EntityPath(path=path) for path in self.paths],
+        )
+
+    def get_uri(self, record_id: str | None) -> str:
+        """Get the entity URI of a record"""
+        if record_id:
+            return f"{self.uri_prefix}{record_id}"
+        return f"urn:uuid:{uuid.uuid4()!s}"
+
+    def project(self, records: Iterable[Mapping[str, Any]]) -> Iterator[Entity]:
+        """Convert REST API records to entities"""
+        getters = self.getters
+        id_index = self.id_index
+        for record in records:
+            values = [convert(get(record)) for get in getters]
+            record_id = values[id_index] if id_index is not None else None
+            yield Entity(uri=self.get_uri(record_id[0] if record_id else None), values=values)
+
+    def project_row(self, rows: Iterable[list[str]]) -> Iterator[Entity]:
+        """Convert Bulk API CSV rows to entities (empty cells have no value)"""
+        id_index = self.id_index
+        for row in rows:
+            record_id = row[id_index] if id_index is not None else None
+            yield Entity(
+                uri=self.get_uri(record_id), values=[[value] if value else [] for value in row]
+            )
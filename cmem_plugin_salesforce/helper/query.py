@@ -0,0 +1,201 @@
+"""SOQL query helpers."""
+
+import re
+from collections.abc import Generator
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+
+def iter_query_pages(
+    salesforce: "Salesforce", soql_query: str, include_deleted: bool = False
+) -> Generator[dict[str, Any]]:
+    """Yield the result pages of a SOQL query one by one.
+
+    In contrast to `Salesforce.query_all`, only the current page is held in memory.
+    The next page is requested via `nextRecordsUrl` when the consumer asks for it.
+    Each page is the decoded response payload (`records`, `totalSize`, `done`, ...).
+    """
+    yield from iter_more_pages(
+        salesforce, salesforce.query(soql_query, include_deleted=include_deleted)
+    )
+
+
+def iter_more_pages(salesforce: "Salesforce", page: dict[str, Any]) -> Generator[dict[str, Any]]:
+    """Yield the given result page and the following pages of its query"""
+    while True:
+        yield page
+        if page["done"]:
+            return
+        page = salesforce.query_more(page["nextRecordsUrl"], identifier_is_url=True)
+
+
+CLAUSE = re.compile(
+    r"(FROM|WHERE|WITH|GROUP\s+BY|ORDER\s+BY|LIMIT|OFFSET|FOR\s+(?:VIEW|REFERENCE|UPDATE)"
+    r"|UPDATE\s+(?:TRACKING|VIEWSTAT))\b",
+    re.IGNORECASE,
+)
+"""Keywords which start a clause of a SOQL SELECT statement"""
+COUNT_ALIAS = "records"
+MODSTAMP_ALIAS = "modstamp"
+
+
+def is_word_char(char: str) -> bool:
+    """Check if the char can be part of an identifier"""
+    return char.isalnum() or char == "_"
+
+
+def get_clauses(soql_query: str) -> list[tuple[int, str]]:
+    """Get the positions and (normalized) keywords of the top level clauses
+
+    Keywords inside of string literals and sub-queries are ignored.
+    """
+    clauses = []
+    depth = 0
+    quoted = False
+    index = 0
+    while index < len(soql_query):
+        char = soql_query[index]
+        if quoted:
+            if char == "\\":
+                index += 1
+            elif char == "'":
+                quoted = False
+        elif char == "'":
+            quoted = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and (index == 0 or not is_word_char(soql_query[index - 1])):
+            match = CLAUSE.match(soql_query, index)
+            if match:
+                clauses.append((index, " ".join(match.group(1).upper().split())))
+                index = match.end()
+                continue
+        index += 1
+    return clauses
+
+
+def has_clause(soql_query: str, keyword: str) -> bool:
+    """Check if the query has a top level clause starting with the keyword"""
+    return any(clause.startswith(keyword) for _, clause in get_clauses(soql_query))
+
+
+def get_object_name(soql_query: str) -> str:
+    """Get the name of the queried object"""
+    for position, clause in get_clauses(soql_query):
+        if clause == "FROM":
+            return soql_query[position + len(clause) :].split()[0]
+    raise ValueError("SOQL query has no FROM clause.")
+
+
+def add_condition(soql_query: str, condition: str) -> str:
+    """Add a condition to the WHERE clause of a query (conjunctive)"""
+    clauses = get_clauses(soql_query)
+    where = next((position for position, clause in clauses if clause == "WHERE"), None)
+    following = [position for position, clause in clauses if clause not in ("FROM", "WHERE")]
+    end = following[0] if following else len(soql_query)
+    head, tail = soql_query[:end].rstrip(), soql_query[end:]
+    if where is None:
+        combined = f"{head} WHERE {condition}"
+    else:
+        existing = head[where + len("WHERE") :].strip()
+        combined = f"{head[:where]}WHERE ({existing}) AND ({condition})"
+    return f"{combined} {tail}".rstrip()
+
+
+def get_fields(soql_query: str) -> list[str]:
+    """Get the (top level) items of the field list of a query"""
+    start = soql_query.upper().index("SELECT") + len("SELECT")
+    end = next(position for position, clause in get_clauses(soql_query) if clause == "FROM")
+    fields = []
+    depth = 0
+    current = ""
+    for char in soql_query[start:end]:
+        if char == "," and depth == 0:
+            fields.append(current.strip())
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    fields.append(current.strip())
+    return [field for field in fields if field]
+
+
+def add_field(soql_query: str, field: str) -> str:
+    """Add a field to the field list of a query, unless it is already selected"""
+    if field.lower() in (selected.lower() for selected in get_fields(soql_query)):
+        return soql_query
+    end = next(position for position, clause in get_clauses(soql_query) if clause == "FROM")
+    return f"{soql_query[:end].rstrip()}, {field} {soql_query[end:]}"
+
+
+def split_queries(text: str) -> list[str]:
+    """Split a text into SOQL statements separated by `;` (outside of string literals)"""
+    queries = []
+    quoted = False
+    start = 0
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if quoted and char == "\\":
+            index += 1
+        elif char == "'":
+            quoted = not quoted
+        elif char == ";" and not quoted:
+            queries.append(text[start:index])
+            start = index + 1
+        index += 1
+    queries.append(text[start:])
+    return [query.strip() for query in queries if query.strip()]
+
+
+def get_scope(soql_query: str) -> str:
+    """Get the `FROM`, `WHERE` and `WITH` clauses of a query (the queried records)"""
+    clauses = get_clauses(soql_query)
+    start = next(position for position, clause in clauses if clause == "FROM")
+    following = [
+        position for position, clause in clauses if clause not in ("FROM", "WHERE", "WITH")
+    ]
+    end = following[0] if following else len(soql_query)
+    return soql_query[start:end].strip()
+
+
+def get_probe_query(soql_query: str) -> str:
+    """Get the aggregate query of the number of records and their latest modification
+
+    The probe has the object and the conditions of the query (without grouping, order
+    and limits), so its result changes if a record of the query is changed, added or
+    removed. Changes of related records (e.g. `Account.Name` of contacts) are not seen.
+    """
+    return (
+        f"SELECT COUNT(Id) {COUNT_ALIAS}, MAX(SystemModstamp) {MODSTAMP_ALIAS} "
+        f"{get_scope(soql_query)}"
+    )
+
+
+def get_count_query(soql_query: str) -> str:
+    """Get the `COUNT()` query of the records of a query (its result has no records)"""
+    return f"SELECT COUNT() {get_scope(soql_query)}"
+
+
+def normalize_query(soql_query: str) -> str:
+    """Collapse the whitespace of a query (outside of string literals)"""
+    normalized: list[str] = []
+    quoted = False
+    escaped = False
+    for char in soql_query.strip():
+        if quoted:
+            quoted = escaped or char != "'"
+            escaped = not escaped and char == "\\"
+        elif char == "'":
+            quoted = True
+        elif char.isspace():
+            if normalized and normalized[-1] == " ":
+                continue
+            char = " "  # noqa: PLW2901
+        normalized.append(char)
+    return "".join(normalized)
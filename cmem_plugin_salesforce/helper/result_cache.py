@@ -0,0 +1,158 @@
+"""Local cache of SOQL query results, validated with an aggregate probe query."""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections.abc import Generator, Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from cmem_plugin_salesforce.helper.metadata import get_cache_directory
+from cmem_plugin_salesforce.helper.query import (
+    COUNT_ALIAS,
+    MODSTAMP_ALIAS,
+    get_probe_query,
+    normalize_query,
+)
+from cmem_plugin_salesforce.helper.state import get_state_directory
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
+
+RESULT_CACHE_SIZE_ENV = "CMEM_PLUGIN_SALESFORCE_RESULT_CACHE_SIZE"
+"""Environment variable with the maximum size of the result cache in bytes (optional)"""
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+PAGE_SIZE = 2000
+"""Number of records per page served from the cache (as the REST API)"""
+DATA_SUFFIX = ".ndjson.gz"
+META_SUFFIX = ".json"
+COMPRESSION_LEVEL = 6
+
+
+@dataclass(frozen=True)
+class Probe:
+    """Number of records of a query and their latest modification"""
+
+    count: int
+    modstamp: str | None
+
+
+def probe(salesforce: "Salesforce", soql_query: str, include_deleted: bool = False) -> Probe:
+    """Run the probe query of a query (one request, no records are downloaded)"""
+    result = salesforce.query(get_probe_query(soql_query), include_deleted=include_deleted)
+    record = result["records"][0] if result["records"] else {}
+    return Probe(int(record.get(COUNT_ALIAS) or 0), record.get(MODSTAMP_ALIAS))
+
+
+def get_max_bytes() -> int:
+    """Get the configured maximum size of the result cache"""
+    value = os.environ.get(RESULT_CACHE_SIZE_ENV, "")
+    return int(value) if value.strip() else DEFAULT_MAX_BYTES
+
+
+class ResultCache:
+    """Query results on disk, as gzip compressed NDJSON file per query, org and user
+
+    An entry is served as long as it is younger than the time to live and the probe of
+    the query (number of records and latest `SystemModstamp`) did not change, so a hit
+    only costs the probe request. The least recently used entries are removed when
+    the cache exceeds its size.
+    """
+
+    def __init__(self, directory: Path, ttl: float, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def get_key(*parts: object) -> str:
+        """Get the key of a query (the query text is normalized)"""
+        text = "\0".join(
+            normalize_query(part) if isinstance(part, str) else str(part) for part in parts
+        )
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get_paths(self, key: str) -> tuple[Path, Path]:
+        """Get the data and the meta data file of an entry"""
+        return self.directory / f"{key}{DATA_SUFFIX}", self.directory / f"{key}{META_SUFFIX}"
+
+    def get(self, key: str, current: Probe) -> Generator[dict[str, Any]] | None:
+        """Get the result pages of an entry, if it is valid"""
+        data, meta = self.get_paths(key)
+        try:
+            entry = json.loads(meta.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry["created"] > self.ttl or Probe(**entry["probe"]) != current:
+            return None
+        if not data.exists():
+            return None
+        os.utime(data)  # the modification time is the last use
+        return self.iter_pages(data, current.count)
+
+    @staticmethod
+    def iter_pages(path: Path, total_size: int) -> Generator[dict[str, Any]]:
+        """Read the records of an entry in pages"""
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            records: list[dict[str, Any]] = []
+            for line in file:
+                records.append(json.loads(line))
+                if len(records) == PAGE_SIZE:
+                    yield {"totalSize": total_size, "done": False, "records": records}
+                    records = []
+            yield {"totalSize": total_size, "done": True, "records": records}
+
+    def put(
+        self, key: str, current: Probe, pages: Iterable[dict[str, Any]]
+    ) -> Generator[dict[str, Any]]:
+        """Pass the result pages through and store them as entry after the last page
+
+        The records are written to a temporary file while the pages are consumed. If
+        the pages are not consumed completely, nothing is stored.
+        """
+        data, meta = self.get_paths(key)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.directory / f"{uuid.uuid4().hex}.tmp"
+        complete = False
+        try:
+            with gzip.open(
+                temporary, "wt", encoding="utf-8", compresslevel=COMPRESSION_LEVEL
+            ) as file:
+                for page in pages:
+                    file.writelines(json.dumps(record) + "\n" for record in page["records"])
+                    complete = page["done"]
+                    yield page
+            if complete:
+                temporary.replace(data)
+                entry = {"created": time.time(), "probe": asdict(current)}
+                meta.write_text(json.dumps(entry), encoding="utf-8")
+                self.evict()
+        finally:
+            temporary.unlink(missing_ok=True)
+
+    def evict(self) -> None:
+        """Remove expired entries and the least recently used ones above the size limit"""
+        now = time.time()
+        entries = []
+        for data in self.directory.glob(f"*{DATA_SUFFIX}"):
+            stat = data.stat()
+            entries.append((stat.st_mtime, stat.st_size, data))
+        entries.sort(reverse=True)
+        size = 0
+        for used, entry_size, data in entries:
+            size += entry_size
+            # an entry unused for the time to live is expired (it was created before)
+            if size > self.max_bytes or now - used > self.ttl:
+                key = data.name.removesuffix(DATA_SUFFIX)
+                for path in self.get_paths(key):
+                    path.unlink(missing_ok=True)
+
+
+def get_result_cache(ttl: float) -> ResultCache:
+    """Get the result cache in the configured cache (or state) directory"""
+    directory = get_cache_directory() or get_state_directory()
+    return ResultCache(directory / "results", ttl, get_max_bytes())
@@ -0,0 +1,134 @@
+"""Retry of transient record failures and output of permanently failed records."""
+
+import json
+import tempfile
+import uuid
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import Any
+
+from cmem_plugin_base.dataintegration.entity import Entities, Entity, EntityPath, EntitySchema
+
+DEFAULT_RETRIES = 3
+"""Number of retries of records with a transient error"""
+INITIAL_DELAY = 2.0
+"""Seconds before the first retry (doubled for each further retry)"""
+MAX_DELAY = 60.0
+TRANSIENT_ERRORS = (
+    "UNABLE_TO_LOCK_ROW",
+    "REQUEST_RUNNING_TOO_LONG",
+    "SERVER_UNAVAILABLE",
+    "QUERY_TIMEOUT",
+)
+"""Status codes of record errors which may succeed on a retry"""
+SPOOL_SIZE = 1_000_000
+"""Bytes of failed records kept in memory before they are written to a temporary file"""
+ERROR_TYPE_URI = "https://vocab.eccenca.com/salesforce/error"
+ERROR_PATHS = ("errorStatusCode", "errorMessage", "attempts")
+
+
+def get_error_code(error: object) -> str:
+    """Get the status code of a record error (Bulk API dict or `CODE:message` text)"""
+    if isinstance(error, dict):
+        return str(error.get("statusCode", ""))
+    return str(error).split(":", 1)[0]
+
+
+def get_error_message(error: object) -> str:
+    """Get the message of a record error"""
+    if isinstance(error, dict):
+        return str(error.get("message", ""))
+    parts = str(error).split(":", 2)
+    return parts[1] if len(parts) > 1 else parts[0]
+
+
+def is_transient(result: dict[str, Any]) -> bool:
+    """Check if a failed record result has only errors which may succeed on a retry"""
+    errors = result["errors"]
+    return bool(errors) and all(
+        get_error_code(error) in TRANSIENT_ERRORS or "timed out" in get_error_message(error).lower()
+        for error in errors
+    )
+
+
+def get_retry_delay(retry: int) -> float:
+    """Get the delay before a retry (exponential backoff)"""
+    return float(min(INITIAL_DELAY * 2 ** (retry - 1), MAX_DELAY))
+
+
+def get_parent_fields(columns: Iterable[str], key: str) -> list[str]:
+    """Get the columns which (probably) reference a parent record (e.g. `AccountId`)"""
+    keys = {"id", key.lower()}
+    return [
+        column for column in columns if column.lower().endswith("id") and column.lower() not in keys
+    ]
+
+
+def group_records(records: list[dict[str, str]], key: str = "Id") -> list[dict[str, str]]:
+    """Order records by their parent references
+
+    Records of the same parent are then written in the same batch, so concurrent
+    batches do not compete for the lock of the parent record.
+    """
+    fields = list(dict.fromkeys(get_parent_fields((c for r in records for c in r), key)))
+    if not fields:
+        return records
+    return sorted(records, key=lambda record: tuple(record.get(field, "") for field in fields))
+
+
+def iter_grouped(
+    records: Iterable[dict[str, str]], size: int, key: str = "Id"
+) -> Iterator[dict[str, str]]:
+    """Order records by their parent references in windows of `size` records"""
+    records = iter(records)
+    while window := list(islice(records, size)):
+        yield from group_records(window, key)
+
+
+class FailedRecords:
+    """Permanently failed records, which are streamed as entities
+
+    The records are spooled to a temporary file, so only a small buffer is held in
+    memory. The entity paths are the columns of all failed records plus the error.
+    """
+
+    def __init__(self) -> None:
+        self.file = tempfile.SpooledTemporaryFile(  # noqa: SIM115
+            max_size=SPOOL_SIZE, mode="w+", encoding="utf-8"
+        )
+        self.columns: dict[str, None] = {}
+        self.count = 0
+
+    def add(self, record: dict[str, str], errors: list[Any], attempts: int) -> None:
+        """Add a failed record with its errors"""
+        for column in record:
+            self.columns.setdefault(column)
+        error = errors[0] if errors else ""
+        item = {
+            "record": record,
+            "code": get_error_code(error),
+            "message": get_error_message(error),
+            "attempts": attempts,
+        }
+        self.file.write(json.dumps(item) + "\n")
+        self.count += 1
+
+    def iter_entities(self) -> Iterator[Entity]:
+        """Read the failed records from the spool file"""
+        columns = list(self.columns)
+        self.file.seek(0)
+        with self.file:
+            for line in self.file:
+                item = json.loads(line)
+                record = item["record"]
+                values = [[record[column]] if record.get(column) else [] for column in columns]
+                values.extend([[item["code"]], [item["message"]], [str(item["attempts"])]])
+                yield Entity(uri=f"urn:uuid:{uuid.uuid4()!s}", values=values)
+
+    def get_entities(self) -> Entities:
+        """Get the failed records as entities"""
+        paths = [EntityPath(path=path) for path in [*self.columns, *ERROR_PATHS]]
+        return Entities(
+            entities=self.iter_entities(),
+            schema=EntitySchema(type_uri=ERROR_TYPE_URI, paths=paths),
+        )
@@ -0,0 +1,273 @@
+"""Typed serialization of input rows to Salesforce records (driven by describe metadata)."""
+
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from datetime import UTC, date, datetime, time
+from decimal import Decimal, InvalidOperation
+from typing import Any
+
+from cmem_plugin_salesforce.helper.metadata import FieldInfo, ObjectDescription
+from cmem_plugin_salesforce.helper.retry import get_parent_fields
+
+MULTI_PICKLIST_SEPARATOR = ";"
+VALUE_SEPARATOR = ","
+"""Separator of several values of a text field (as before the typed serialization)"""
+TRUE_VALUES = frozenset(("true", "1", "yes", "y", "on"))
+FALSE_VALUES = frozenset(("false", "0", "no", "n", "off"))
+INVALID_TYPE = "INVALID_TYPE_ON_FIELD_IN_RECORD"
+STRING_TOO_LONG = "STRING_TOO_LONG"
+MALFORMED_ID = "MALFORMED_ID"
+REQUIRED_FIELD_MISSING = "REQUIRED_FIELD_MISSING"
+TEXT_TYPES = frozenset(
+    (
+        "string",
+        "textarea",
+        "picklist",
+        "email",
+        "phone",
+        "url",
+        "combobox",
+        "encryptedstring",
+    )
+)
+"""Field types with a length limit"""
+
+ID_LENGTHS = (15, 18)
+
+Converter = Callable[[Sequence[str]], str]
+
+
+class InvalidValueError(ValueError):
+    """A value which does not match the type of its field"""
+
+    def __init__(self, field: str, status_code: str, message: str) -> None:
+        super().__init__(f"{field}: {message}")
+        self.field = field
+        self.status_code = status_code
+        self.message = message
+
+    def to_error(self) -> dict[str, Any]:
+        """Get the error as in Bulk API results"""
+        return {"statusCode": self.status_code, "message": self.message, "fields": [self.field]}
+
+
+class ValueTooLongError(ValueError):
+    """A text value which exceeds the length of its field"""
+
+
+def get_single(values: Sequence[str]) -> str:
+    """Get the only value of a typed field (stripped, empty without value)"""
+    if not values:
+        return ""
+    if len(values) > 1:
+        raise ValueError(f"expected one value, got {len(values)}")
+    return values[0].strip()
+
+
+def to_boolean(value: str) -> str:
+    """Convert a boolean value"""
+    lowered = value.lower()
+    if lowered in TRUE_VALUES:
+        return "true"
+    if lowered in FALSE_VALUES:
+        return "false"
+    raise ValueError(f"'{value}' is not a boolean")
+
+
+def to_decimal(value: str) -> Decimal:
+    """Parse a finite decimal number"""
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"'{value}' is not a number") from None
+    if not number.is_finite():
+        raise ValueError(f"'{value}' is not a number")
+    return number
+
+
+def to_id(value: str) -> str:
+    """Check a record Id (15 or 18 alphanumeric characters)"""
+    if len(value) not in ID_LENGTHS or not value.isalnum() or not value.isascii():
+        raise ValueError(f"'{value}' is not a record Id")
+    return value
+
+
+def to_number(value: str) -> str:
+    """Convert a double, currency or percent value (without exponent)"""
+    return format(to_decimal(value), "f")
+
+
+def to_integer(value: str) -> str:
+    """Convert an integer value (decimals without fraction are accepted)"""
+    number = to_decimal(value)
+    if number != number.to_integral_value():
+        raise ValueError(f"'{value}' is not an integer")
+    return str(int(number))
+
+
+def to_date(value: str) -> str:
+    """Convert a date value (an ISO 8601 date or the date of a date time)"""
+    try:
+        return date.fromisoformat(value[:10]).isoformat()
+    except ValueError:
+        raise ValueError(f"'{value}' is not an ISO 8601 date") from None
+
+
+def to_datetime(value: str) -> str:
+    """Convert a date time value to UTC (values without time zone are in UTC)"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{value}' is not an ISO 8601 date time") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed.astimezone(UTC).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def to_time(value: str) -> str:
+    """Convert a time value"""
+    try:
+        parsed = time.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{value}' is not an ISO 8601 time") from None
+    return f"{parsed.replace(tzinfo=None).isoformat(timespec='milliseconds')}Z"
+
+
+SINGLE_VALUE_CONVERTERS: dict[str, Callable[[str], str]] = {
+    "boolean": to_boolean,
+    "int": to_integer,
+    "long": to_integer,
+    "double": to_number,
+    "currency": to_number,
+    "percent": to_number,
+    "date": to_date,
+    "datetime": to_datetime,
+    "time": to_time,
+    "id": to_id,
+    "reference": to_id,
+}
+
+
+def join_multi_picklist(values: Sequence[str]) -> str:
+    """Join the values of a multi-select picklist"""
+    return MULTI_PICKLIST_SEPARATOR.join(value.strip() for value in values if value.strip())
+
+
+def get_converter(field: FieldInfo) -> Converter:
+    """Get the converter of the values of a field"""
+    if field.type == "multipicklist":
+        return join_multi_picklist
+    convert = SINGLE_VALUE_CONVERTERS.get(field.type)
+    if convert is not None:
+        return lambda values: convert(value) if (value := get_single(values)) else ""
+    if field.type in TEXT_TYPES and field.length > 0:
+        return lambda values: check_length(VALUE_SEPARATOR.join(values), field.length)
+    return VALUE_SEPARATOR.join
+
+
+def check_length(value: str, length: int) -> str:
+    """Check the length of a text value"""
+    if len(value) > length:
+        raise ValueTooLongError(f"{len(value)} characters exceed the field length of {length}")
+    return value
+
+
+class RecordSerializer:
+    """Serializer of input rows to records, compiled once per input schema
+
+    The converter of each column is chosen from the type of its field in the describe
+    result, so values are coerced (booleans, numbers, dates and date times in the
+    formats of the API, multi-select picklist values joined with `;`) and invalid
+    values (including malformed Ids and too long texts) are found before the upload.
+    Key columns (`Id` or the external ID field) without value are left out, so that
+    these records are created.
+    """
+
+    def __init__(self, columns: Sequence[str], description: ObjectDescription, key: str) -> None:
+        keys = {"id", key.lower()}
+        self.columns = list(columns)
+        self.key_indices = frozenset(
+            index for index, column in enumerate(self.columns) if column.lower() in keys
+        )
+        self.converters = [
+            get_converter(description.fields[column])
+            if column in description.fields
+            else VALUE_SEPARATOR.join
+            for column in self.columns
+        ]
+        self.fields = list(enumerate(zip(self.columns, self.converters, strict=True)))
+
+    def serialize(self, values: Sequence[Sequence[str]]) -> dict[str, str]:
+        """Convert the values of an input row to a record
+
+        Raises an InvalidValueError for the first value which does not match its field.
+        """
+        record = {}
+        for index, (column, convert) in self.fields:
+            value = values[index]
+            if not value and index in self.key_indices:
+                continue
+            try:
+                record[column] = convert(value)
+            except ValueTooLongError as error:
+                raise InvalidValueError(column, STRING_TOO_LONG, str(error)) from None
+            except ValueError as error:
+                raise InvalidValueError(column, INVALID_TYPE, str(error)) from None
+        return record
+
+    def get_raw_record(self, values: Sequence[Sequence[str]]) -> dict[str, str]:
+        """Get the untyped record of an input row (for the output of rejected rows)"""
+        return {
+            column: VALUE_SEPARATOR.join(values[index]) for index, column in enumerate(self.columns)
+        }
+
+    def iter_records(
+        self, rows: Iterable[Sequence[Sequence[str]]], rejected: list[dict[str, Any]]
+    ) -> Iterator[dict[str, str]]:
+        """Serialize rows, the results of rows with invalid values are added to `rejected`"""
+        for values in rows:
+            try:
+                yield self.serialize(values)
+            except InvalidValueError as error:
+                rejected.append(
+                    {
+                        "success": False,
+                        "created": False,
+                        "errors": [error.to_error()],
+                        "record": self.get_raw_record(values),
+                    }
+                )
+
+
+class IdSerializer(RecordSerializer):
+    """Serializer of input rows to records with the `Id` (for deletes)
+
+    Parent reference columns (e.g. `AccountId`) are kept, so that the records can be
+    ordered by parent, they are not uploaded. The other columns are ignored (but kept
+    in the output of rejected rows).
+    """
+
+    def __init__(self, columns: Sequence[str], description: ObjectDescription) -> None:
+        super().__init__(columns, description, "Id")
+        self.id_index = next(
+            index for index, column in enumerate(self.columns) if column.lower() == "id"
+        )
+        parents = set(get_parent_fields(self.columns, "Id"))
+        self.parent_indices = [
+            (index, column) for index, column in enumerate(self.columns) if column in parents
+        ]
+
+    def serialize(self, values: Sequence[Sequence[str]]) -> dict[str, str]:
+        """Get the record with the Id of an input row
+
+        Raises an InvalidValueError, if the row has no valid Id.
+        """
+        try:
+            record_id = get_single(values[self.id_index])
+            if record_id:
+                record = {"Id": to_id(record_id)}
+                for index, column in self.parent_indices:
+                    record[column] = VALUE_SEPARATOR.join(values[index])
+                return record
+        except ValueError as error:
+            raise InvalidValueError("Id", MALFORMED_ID, str(error)) from None
+        raise InvalidValueError("Id", REQUIRED_FIELD_MISSING, "a record Id is required")
@@ -0,0 +1,213 @@
+"""Process wide pool of Salesforce sessions."""
+
+import hashlib
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import requests
+from simple_salesforce import Salesforce, SalesforceLogin
+
+from cmem_plugin_salesforce.helper.metrics import MeteredSession, Metrics
+from cmem_plugin_salesforce.helper.throttle import DEFAULT_RESERVE, RateLimiter
+
+DEFAULT_SESSION_TIMEOUT = 2 * 60 * 60 - 5 * 60
+"""Seconds of inactivity after which a session is considered expired
+
+Salesforce expires sessions after 2 hours of inactivity by default, we keep a margin.
+"""
+FAILED_CHECK_TTL = 60.0
+"""Seconds for which a failed credential check is answered without a new login"""
+
+
+@dataclass
+class PooledSession:
+    """A cached Salesforce login with its HTTP connection pool and rate limiter"""
+
+    username: str
+    password: str
+    security_token: str
+    domain: str
+    http: requests.Session
+    session_id: str = ""
+    instance: str = ""
+    last_used: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    limiter: RateLimiter = field(default_factory=RateLimiter)
+
+    def touch(self, *_: object, **__: object) -> None:
+        """Mark the session as used (also usable as response hook)"""
+        self.last_used = time.monotonic()
+
+
+class PooledSalesforce(Salesforce):
+    """Salesforce connection which shares its session and connections via a pool
+
+    On an `INVALID_SESSION_ID` error, the session is re-authenticated once for all
+    connections of the pool entry, and the failed request is repeated.
+    The requests of the connection are recorded in its `metrics` and scheduled by the
+    rate limiter of the pool entry (keeping `reserve` percent of the API requests free).
+    """
+
+    def __init__(
+        self,
+        pooled: PooledSession,
+        pool: "SessionPool",
+        metrics: Metrics | None = None,
+        reserve: float = DEFAULT_RESERVE,
+    ) -> None:
+        self.metrics = metrics or Metrics()
+        self.reserve = reserve
+        super().__init__(
+            session_id=pooled.session_id,
+            instance=pooled.instance,
+            session=MeteredSession(pooled.http, self.metrics, pooled.limiter, reserve),
+        )
+        self.pooled = pooled
+        self.pool = pool
+        # enables the re-authentication of simple_salesforce on INVALID_SESSION_ID
+        self._salesforce_login_partial = self.renew_session  # type: ignore[assignment]
+
+    def renew_session(self) -> tuple[str, str]:
+        """Get a new session from the pool and return session id and instance"""
+        return self.pool.renew(self.pooled, self.session_id, self.metrics)
+
+    def refresh_session(self) -> None:
+        """Replace the session of this connection with a new one"""
+        self._refresh_session()
+
+
+class SessionPool:
+    """Cache of Salesforce sessions keyed by username, domain and credentials
+
+    Each entry keeps the session id of the last login and a `requests.Session`, so
+    that all connections of the same account share the HTTP connection pool.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], requests.Session] = requests.Session,
+        timeout: float = DEFAULT_SESSION_TIMEOUT,
+    ) -> None:
+        self.session_factory = session_factory
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.entries: dict[tuple[str, str, str], PooledSession] = {}
+        self.failed_checks: dict[tuple[str, str, str], tuple[float, Exception]] = {}
+        self.logins = 0
+
+    @staticmethod
+    def get_key(
+        username: str, password: str, security_token: str, domain: str = "login"
+    ) -> tuple[str, str, str]:
+        """Get the key of an account (the secrets are only kept as hash)"""
+        secret = hashlib.sha256(f"{password}\0{security_token}".encode()).hexdigest()
+        return (username, domain, secret)
+
+    def connect(  # noqa: PLR0913
+        self,
+        username: str,
+        password: str,
+        security_token: str,
+        domain: str = "login",
+        metrics: Metrics | None = None,
+        reserve: float = DEFAULT_RESERVE,
+    ) -> PooledSalesforce:
+        """Get a connection, login only if there is no valid cached session
+
+        The requests of the connection (including the login) are recorded in `metrics`.
+        """
+        key = self.get_key(username, password, security_token, domain)
+        with self.lock:
+            pooled = self.entries.get(key)
+            if pooled is None:
+                pooled = PooledSession(
+                    username=username,
+                    password=password,
+                    security_token=security_token,
+                    domain=domain,
+                    http=self.session_factory(),
+                )
+                pooled.http.hooks["response"].append(pooled.touch)
+                self.entries[key] = pooled
+        with pooled.lock:
+            if not pooled.session_id or time.monotonic() - pooled.last_used > self.timeout:
+                self.login(pooled, metrics)
+        return PooledSalesforce(pooled, self, metrics, reserve)
+
+    def validate(
+        self, username: str, password: str, security_token: str, domain: str = "login"
+    ) -> None:
+        """Check the credentials with a login, unless there is a valid cached session
+
+        A failed check is remembered for a minute and its error is raised again without
+        a login, as repeated failed logins can lock the account.
+        """
+        key = self.get_key(username, password, security_token, domain)
+        with self.lock:
+            failed = self.failed_checks.get(key)
+        if failed is not None and time.monotonic() - failed[0] < FAILED_CHECK_TTL:
+            raise failed[1]
+        try:
+            self.connect(username, password, security_token, domain)
+        except Exception as error:
+            with self.lock:
+                self.failed_checks[key] = (time.monotonic(), error)
+            raise
+        with self.lock:
+            self.failed_checks.pop(key, None)
+
+    def renew(
+        self, pooled: PooledSession, stale_session_id: str, metrics: Metrics | None = None
+    ) -> tuple[str, str]:
+        """Login again, unless another connection already renewed the stale session"""
+        with pooled.lock:
+            if pooled.session_id == stale_session_id:
+                self.login(pooled, metrics)
+            return pooled.session_id, pooled.instance
+
+    def login(self, pooled: PooledSession, metrics: Metrics | None = None) -> None:
+        """Login with the credentials of the entry (caller holds the entry lock)"""
+        pooled.session_id, pooled.instance = SalesforceLogin(
+            username=pooled.username,
+            password=pooled.password,
+            security_token=pooled.security_token,
+            domain=pooled.domain,
+            session=MeteredSession(pooled.http, metrics) if metrics else pooled.http,
+        )
+        pooled.touch()
+        self.logins += 1
+
+    def clear(self) -> None:
+        """Forget all cached sessions"""
+        with self.lock:
+            for pooled in self.entries.values():
+                pooled.http.close()
+            self.entries.clear()
+            self.failed_checks.clear()
+
+
+SESSION_POOL = SessionPool()
+"""The pool shared by all plugin instances of the process"""
+
+
+def connect(
+    username: str,
+    password: str,
+    security_token: str,
+    metrics: Metrics | None = None,
+    reserve: float = DEFAULT_RESERVE,
+) -> PooledSalesforce:
+    """Get a connection from the shared session pool"""
+    return SESSION_POOL.connect(
+        username, password, security_token, metrics=metrics, reserve=reserve
+    )
+
+
+def validate_credentials(username: str, password: str, security_token: str) -> None:
+    """Check Salesforce login credentials (cached in the shared session pool)
+
+    The plugins connect on first use, this is the explicit check of the credentials.
+    """
+    SESSION_POOL.validate(username, password, security_token)
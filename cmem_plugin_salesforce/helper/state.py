@@ -0,0 +1,82 @@
+"""Persistent plugin state (e.g. watermarks of incremental queries)."""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from cmem_plugin_base.dataintegration.context import ExecutionContext
+
+from cmem_plugin_salesforce.helper.metadata import CACHE_DIR_ENV
+
+STATE_DIR_ENV = "CMEM_PLUGIN_SALESFORCE_STATE_DIR"
+"""Environment variable with a directory for the plugin state (optional)"""
+STATE_FILE = "state.json"
+
+
+class StateStore:
+    """JSON file with one state entry (a dict) per key
+
+    Each update rewrites the file atomically, so a crash never leaves a partial file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+
+    def load(self) -> dict[str, Any]:
+        """Read all entries"""
+        if not self.path.exists():
+            return {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, key: str) -> dict[str, Any]:
+        """Get the state entry of a key (empty if there is none)"""
+        with self.lock:
+            return dict(self.load().get(key, {}))
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        """Replace the state entry of a key"""
+        with self.lock:
+            data = self.load()
+            data[key] = value
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            temporary.replace(self.path)
+
+    def delete(self, key: str) -> None:
+        """Remove the state entry of a key"""
+        with self.lock:
+            data = self.load()
+            if data.pop(key, None) is not None:
+                temporary = self.path.with_suffix(".tmp")
+                temporary.write_text(json.dumps(data, indent=2), encoding="utf-8")
+                temporary.replace(self.path)
+
+
+def get_state_directory() -> Path:
+    """Get the configured directory for the plugin state
+
+    Defaults to the cache directory, if configured, or a directory in the user home.
+    """
+    directory = os.environ.get(STATE_DIR_ENV, "") or os.environ.get(CACHE_DIR_ENV, "")
+    return Path(directory) if directory else Path.home() / ".cmem-plugin-salesforce"
+
+
+def get_state_store() -> StateStore:
+    """Get the state store in the configured directory"""
+    return StateStore(get_state_directory() / STATE_FILE)
+
+
+def get_task_key(context: ExecutionContext) -> str:
+    """Get the key of the executed task (project and task identifier)"""
+    task = getattr(context, "task", None)
+    if task is None:
+        return "default"
+    return f"{task.project_id()}/{task.task_id()}"
@@ -0,0 +1,164 @@
+"""Adaptive rate control of the Salesforce API usage."""
+
+import re
+import threading
+import time
+from collections.abc import Mapping
+from http import HTTPStatus
+
+import requests
+
+DEFAULT_RESERVE = 10
+"""Percentage of the daily API requests of the org which is kept free"""
+DEFAULT_MAX_CONCURRENCY = 16
+"""Maximum number of concurrent requests per account"""
+PACING_SHARE = 0.1
+"""Share of the daily API requests (above the reserve) below which requests are paced"""
+PACING_HORIZON = 3600.0
+"""Seconds over which the remaining requests are spread while pacing"""
+MIN_RATE = 0.05
+"""Minimum request rate (per second) while pacing"""
+MAX_RETRIES = 5
+"""Number of retries of a throttled request"""
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+WAIT_TIMEOUT = 1.0
+THROTTLING_STATUS = (HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE)
+LIMIT_EXCEEDED = "REQUEST_LIMIT_EXCEEDED"
+API_USAGE = re.compile(r"api-usage=(?P<used>\d+)/(?P<max>\d+)")
+
+
+class ApiLimitError(Exception):
+    """The daily API requests of the org are used up to the reserve"""
+
+
+def parse_api_usage(headers: Mapping[str, str]) -> tuple[int, int] | None:
+    """Get used and maximum daily API requests from the `Sforce-Limit-Info` header"""
+    usage = API_USAGE.search(headers.get("Sforce-Limit-Info", ""))
+    return (int(usage["used"]), int(usage["max"])) if usage else None
+
+
+def get_error(response: requests.Response) -> tuple[str, str]:
+    """Get code and message of the first error of an API error response"""
+    try:
+        errors = response.json()
+    except ValueError:
+        return "", ""
+    if isinstance(errors, list) and errors and isinstance(errors[0], dict):
+        return str(errors[0].get("errorCode", "")), str(errors[0].get("message", ""))
+    return "", ""
+
+
+def get_retry_delay(response: requests.Response) -> float | None:
+    """Get the delay requested by a `Retry-After` header (in seconds)"""
+    value = response.headers.get("Retry-After", "")
+    return float(value) if value.isdigit() else None
+
+
+class RateLimiter:
+    """Scheduler of the API requests of an account, shared by all its connections
+
+    Each request takes a slot before it is sent and frees it with its response:
+
+    - The number of concurrent requests is adapted like TCP congestion control: it is
+      halved on each throttling response (HTTP 429/503 or a concurrent request
+      limit) and increased by one after as many successful requests.
+    - Throttled requests are delayed with exponential backoff (or `Retry-After`).
+    - The daily API usage is read from the `Sforce-Limit-Info` header. Once the
+      requests left above the reserve drop below a share of the allotment, requests
+      are paced with a token bucket, so that they are spread over the next hour.
+      Requests beyond the reserve fail with `ApiLimitError`.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> None:
+        self.condition = threading.Condition()
+        self.max_concurrency = max(max_concurrency, 1)
+        self.concurrency = self.max_concurrency
+        self.active = 0
+        self.successes = 0
+        self.tokens = 1.0
+        self.refilled = time.monotonic()
+        self.backoff = 0.0
+        self.resume_at = 0.0
+        self.used: int | None = None
+        self.limit: int | None = None
+
+    def get_budget(self, reserve: float) -> int | None:
+        """Get the number of daily API requests left above the reserve (None if unknown)"""
+        if self.used is None or not self.limit:
+            return None
+        return self.limit - self.used - int(self.limit * reserve / 100)
+
+    def get_rate(self, reserve: float) -> float | None:
+        """Get the paced request rate per second (None if requests are not paced)"""
+        budget = self.get_budget(reserve)
+        if budget is None or self.limit is None or budget >= self.limit * PACING_SHARE:
+            return None
+        return max(budget / PACING_HORIZON, MIN_RATE)
+
+    def get_batch_size(self, configured: int, maximum: int, reserve: float) -> int:
+        """Get the batch size for the next write (the maximum while requests are paced)"""
+        with self.condition:
+            return maximum if self.get_rate(reserve) is not None else configured
+
+    def acquire(self, reserve: float = DEFAULT_RESERVE) -> None:
+        """Wait for a slot for the next request"""
+        with self.condition:
+            while True:
+                budget = self.get_budget(reserve)
+                if budget is not None and budget <= 0:
+                    raise ApiLimitError(
+                        f"{self.used} of {self.limit} daily API requests are used, "
+                        f"the remaining {reserve}% are reserved for other integrations."
+                    )
+                now = time.monotonic()
+                rate = self.get_rate(reserve)
+                if rate is None:
+                    self.tokens = 1.0
+                else:
+                    self.tokens = min(1.0, self.tokens + (now - self.refilled) * rate)
+                self.refilled = now
+                delay = self.resume_at - now
+                if delay <= 0 and rate is not None and self.tokens < 1:
+                    delay = (1 - self.tokens) / rate
+                if delay <= 0 and self.active < self.concurrency:
+                    self.active += 1
+                    if rate is not None:
+                        self.tokens -= 1
+                    return
+                self.condition.wait(delay if delay > 0 else WAIT_TIMEOUT)
+
+    def release(self, response: requests.Response | None) -> bool:
+        """Free the slot of a request and adapt to its response
+
+        Returns True, if the request was throttled and should be repeated.
+        """
+        throttled = False
+        exhausted = False
+        if response is not None and response.status_code in THROTTLING_STATUS:
+            throttled = True
+        elif response is not None and response.status_code == HTTPStatus.FORBIDDEN:
+            code, message = get_error(response)
+            exhausted = code == LIMIT_EXCEEDED and "TotalRequests" in message
+            throttled = code == LIMIT_EXCEEDED and not exhausted
+        with self.condition:
+            self.active -= 1
+            usage = parse_api_usage(response.headers) if response is not None else None
+            if usage:
+                self.used, self.limit = usage
+            if exhausted and self.limit:
+                self.used = self.limit
+            if throttled and response is not None:
+                self.concurrency = max(1, self.concurrency // 2)
+                self.successes = 0
+                self.backoff = min(self.backoff * 2 or INITIAL_BACKOFF, MAX_BACKOFF)
+                delay = get_retry_delay(response) or self.backoff
+                self.resume_at = max(self.resume_at, time.monotonic() + delay)
+            elif response is not None and response.ok:
+                self.backoff = 0.0
+                self.successes += 1
+                if self.successes >= self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self.successes = 0
+            self.condition.notify_all()
+        return throttled
@@ -1,28 +1,75 @@
 """Sales force CRUD operations module"""
 
+import sys
 import time
 import uuid
-from collections.abc import Sequence
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Sequence
+from functools import partial
+from itertools import chain, islice
 from typing import TYPE_CHECKING, Any
 
 from cmem_plugin_base.dataintegration.context import ExecutionContext, ExecutionReport
-from cmem_plugin_base.dataintegration.description import Plugin, PluginParameter
+from cmem_plugin_base.dataintegration.description import (
+    Plugin,
+    PluginAction,
+    PluginParameter,
+)
 from cmem_plugin_base.dataintegration.entity import (
     Entities,
     Entity,
     EntityPath,
     EntitySchema,
 )
+from cmem_plugin_base.dataintegration.parameter.choice import ChoiceParameterType
 from cmem_plugin_base.dataintegration.plugins import WorkflowPlugin
-from simple_salesforce import Salesforce
 
 from cmem_plugin_salesforce import (
+    API_RESERVE_DESCRIPTION,
+    CHECK_CREDENTIALS_DESCRIPTION,
     LINKS,
     SECURITY_TOKEN_DESCRIPTION,
     USERNAME_DESCRIPTION,
 )
+from cmem_plugin_salesforce.helper.batching import (
+    DEFAULT_BATCH_BYTES,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_DELETE_BATCH_SIZE,
+    ResultSummary,
+    iter_batches,
+    iter_pipelined,
+)
+from cmem_plugin_salesforce.helper.changes import INDEX_FILE, ChangeIndex
+from cmem_plugin_salesforce.helper.checkpoint import (
+    CHECKPOINT_FILE,
+    Checkpoint,
+    WriteProgress,
+    get_checkpoint_store,
+    get_fingerprint,
+)
+from cmem_plugin_salesforce.helper.composite import (
+    DEFAULT_COLLECTIONS_THRESHOLD,
+    MAX_COLLECTION_SIZE,
+    SObjectCollections,
+)
+from cmem_plugin_salesforce.helper.compression import COMPRESSION_ENV
+from cmem_plugin_salesforce.helper.ingest import DEFAULT_WORKERS, MAX_JOB_BYTES, BulkIngest
+from cmem_plugin_salesforce.helper.metadata import describe
+from cmem_plugin_salesforce.helper.metrics import METRICS_FILE_ENV, Metrics, export_metrics
+from cmem_plugin_salesforce.helper.retry import (
+    DEFAULT_RETRIES,
+    FailedRecords,
+    get_retry_delay,
+    group_records,
+    is_transient,
+    iter_grouped,
+)
+from cmem_plugin_salesforce.helper.serializer import IdSerializer, RecordSerializer
+from cmem_plugin_salesforce.helper.state import STATE_DIR_ENV, get_state_directory, get_task_key
+from cmem_plugin_salesforce.helper.throttle import DEFAULT_RESERVE
 
 if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
     from simple_salesforce.bulk import SFBulkType
 
 PLUGIN_DOCUMENTATION = f"""
@@ -39,6 +86,10 @@ data model (refer to  the {LINKS["OBJECT_REFERENCE"]}).
 between update/creation mode, means:
   - If there is NO id path available, a new object is created.
   - If there IS an id path available, an update is done if the object exists.
+- Instead of `id`, an external ID field of the object can be configured as the key
+of the upsert.
+- With the operation `delete` or `hardDelete`, the objects given by the `id` path are
+deleted (other paths are ignored).
 
 Example:
 - You want to create new Lead objects based on data from a Knowledge Graph.
@@ -52,8 +103,173 @@ SELECT DISTINCT FirstName, LastName, Email ...
 - You select `Lead` as the Object API Name of this task and you connect both task in
 the workflow in order get the result of the SPARQL task as in input for this task.
 - For each SPARQL result, a new Lead is created.
+
+The input entities are read as a stream and sent in batches, which are limited by
+the number of records and the size of the request payload. A batch is uploaded while
+the next one is built, so the memory usage does not depend on the size of the input.
+
+With the Bulk API 2.0 engine, each batch is uploaded as CSV to its own ingest job,
+and several jobs are uploaded and processed concurrently.
+
+Small inputs are written with the sObject Collections API instead: batches of up to
+200 records are upserted with concurrent synchronous requests, which avoids the
+overhead of bulk jobs (several seconds for job creation and polling). By default,
+this engine is chosen automatically for inputs up to a configurable number of records.
+
+The input values are converted according to the field types of the object (booleans,
+numbers, dates and date times in ISO 8601, multi-select picklist values joined with
+`;`, several values of text fields joined with `,`). Rows with values which do not
+match their fields (e.g. `abc` for a number or a text longer than the field) are
+not uploaded, but are output as failed records right away.
+
+Deletes are sent as Bulk API 2.0 ingest jobs (several jobs concurrently) by default,
+or with the sequential Bulk API. A hard delete removes the records right away instead
+of moving them to the recycle bin, which is much faster for large volumes (this needs
+the permission "Bulk API Hard Delete"). A delete locks the parent records of the
+deleted records, so delete batches are kept at the configured number of records
+(they are not enlarged while the requests are paced): the Ids are spread over several
+short jobs and a lock blocks only one batch. Rows without a valid Id are output as
+failed records, as are the Ids which could not be deleted (e.g.
+`ENTITY_IS_DELETED`).
+
+Records which fail with a transient error (such as `UNABLE_TO_LOCK_ROW` or a timeout)
+are retried after all input is written, with an increasing delay between the
+retries. The retried records are ordered by their parent references (e.g.
+`AccountId`), so that records of the same parent are written in the same batch and
+do not compete for its lock. Records which still fail are the output of the task:
+the input fields plus `errorStatusCode`, `errorMessage` and the number of
+`attempts`.
+
+If unchanged records are skipped, a content hash of each successfully written record
+is stored per account, object and key value (in a SQLite database in the directory
+`{STATE_DIR_ENV}`). Input records with a key value and the same content as on their
+last write are then not sent again. Note that changes made in Salesforce by others
+are not detected this way: delete the file `{INDEX_FILE}` to send all records again.
+
+If the execution is resumable, the progress is stored after each written batch (in
+the file `{CHECKPOINT_FILE}` in the directory `{STATE_DIR_ENV}`). When an execution
+fails, e.g. because of a network error or a restart of the worker, the next execution
+of the task skips the input rows which were written before (and retries the pending
+transient failures). This requires the same input in the same order. Batches which
+were in flight at the time of the failure are written again, so an `Id` or external
+ID key avoids duplicates. The report and the failed records of the resumed execution
+only cover the remaining rows.
+
+Besides the created and updated records, the execution report shows the time spent
+per phase (describe, reading the input, serialization, bulk jobs, ...), the number of
+HTTP requests, the transferred bytes and the API usage of the org. If the environment
+variable `{METRICS_FILE_ENV}` is set, these metrics are also appended to this file as
+JSON line.
+
+Responses are requested with gzip compression and bulk uploads are sent compressed,
+which saves most of the transferred bytes. Set the environment variable
+`{COMPRESSION_ENV}` to `false` to disable the compression.
+"""  # noqa: S608
+
+ENGINE_AUTO = "auto"
+ENGINE_BULK = "bulk"
+ENGINE_BULK2 = "bulk2"
+ENGINE_COLLECTIONS = "collections"
+ENGINES = OrderedDict(
+    {
+        ENGINE_AUTO: "Automatic (based on the input size)",
+        ENGINE_BULK: "Bulk API (sequential batches)",
+        ENGINE_BULK2: "Bulk API 2.0 (concurrent ingest jobs)",
+        ENGINE_COLLECTIONS: "sObject Collections API (concurrent requests)",
+    }
+)
+MAX_BATCH_SIZES = {ENGINE_BULK2: sys.maxsize, ENGINE_COLLECTIONS: MAX_COLLECTION_SIZE}
+"""Record limit of a batch per engine (other engines: the Bulk API limit)"""
+
+OPERATION_UPSERT = "upsert"
+OPERATION_DELETE = "delete"
+OPERATION_HARD_DELETE = "hardDelete"
+OPERATIONS = OrderedDict(
+    {
+        OPERATION_UPSERT: "Create or update (upsert)",
+        OPERATION_DELETE: "Delete (to the recycle bin)",
+        OPERATION_HARD_DELETE: "Hard delete (without recycle bin)",
+    }
+)
+
+OPERATION_DESCRIPTION = """
+The operation of the task: upsert the input records, or delete the records given by
+the `Id` path of the input. Deletes are only available with the Bulk API engines.
+Records to delete are ordered by the parent reference paths of the input (e.g.
+`AccountId`), so that the children of a parent are deleted in the same batch.
+"""
+
+ENGINE_DESCRIPTION = """
+The API used to upsert the records.
+
+The Bulk API uploads one batch at a time (while the next batch is built). The Bulk
+API 2.0 engine uploads the batches as CSV to several ingest jobs in parallel, which
+is faster for large loads. For this engine, larger batches are recommended
+(up to 100,000,000 bytes per batch, no record limit).
+
+The sObject Collections API upserts batches of up to 200 records with synchronous
+requests in parallel. It has no job overhead, so it is the fastest engine for small
+inputs, but it needs one API request per 200 records.
+
+With the automatic selection, the sObject Collections API is used for inputs up to the
+configured threshold and the Bulk API for larger inputs. Deletes are sent with the
+Bulk API 2.0.
+"""
+
+WORKERS_DESCRIPTION = """
+Number of Bulk API 2.0 ingest jobs (or sObject Collections requests) which are
+uploaded and processed concurrently.
+"""
+
+COLLECTIONS_THRESHOLD_DESCRIPTION = """
+Maximum number of input records for the automatic engine selection to use the sObject
+Collections API. Larger inputs are written with the Bulk API.
+"""
+
+EXTERNAL_ID_FIELD_DESCRIPTION = """
+The field which identifies existing records for the upsert, either `Id` or an
+external ID field of the object. Records without a value in this field are created.
+"""
+
+BATCH_SIZE_DESCRIPTION = """
+Maximum number of records sent to Salesforce in one batch (at most 10,000 for the
+Bulk API). With the default value, deletes are sent in batches of 2,000 records, as
+each deleted record locks its parent records.
+"""
+
+SKIP_UNCHANGED_DESCRIPTION = """
+Skip input records which were written by this plugin with the same field values
+before (based on a local index of content hashes per object and key value).
+"""
+
+RESUME_DESCRIPTION = """
+Store the progress after each written batch, so that an execution after a failed one
+continues with the input rows which were not written yet (the input needs to be the
+same, in the same order).
 """
 
+RETRIES_DESCRIPTION = """
+Number of retries of records which failed with a transient error (such as
+`UNABLE_TO_LOCK_ROW`). Other errors are not retried.
+"""
+
+BATCH_BYTES_DESCRIPTION = """
+Maximum size (in bytes) of the payload of one batch (at most 10,000,000 for the Bulk
+API and 100,000,000 for the Bulk API 2.0).
+"""
+
+
+def validate_operation(operation: str, engine: str, skip_unchanged: bool) -> None:
+    """Validate that the operation is available with the given options"""
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown operation '{operation}'.")
+    if operation == OPERATION_UPSERT:
+        return
+    if engine == ENGINE_COLLECTIONS:
+        raise ValueError("Records can only be deleted with the Bulk API engines.")
+    if skip_unchanged:
+        raise ValueError("Unchanged records can only be skipped for upserts.")
+
 
 @Plugin(
     label="Create/Update Salesforce Objects",
@@ -76,113 +292,541 @@ the workflow in order get the result of the SPARQL task as in input for this tas
             label="Object API Name",
             description="""Salesforce Object API Name""",
         ),
+        PluginParameter(
+            name="operation",
+            label="Operation",
+            description=OPERATION_DESCRIPTION,
+            param_type=ChoiceParameterType(OPERATIONS),
+            default_value=OPERATION_UPSERT,
+        ),
+        PluginParameter(
+            name="batch_size",
+            label="Batch Size",
+            description=BATCH_SIZE_DESCRIPTION,
+            advanced=True,
+            default_value=DEFAULT_BATCH_SIZE,
+        ),
+        PluginParameter(
+            name="batch_bytes",
+            label="Batch Size (Bytes)",
+            description=BATCH_BYTES_DESCRIPTION,
+            advanced=True,
+            default_value=DEFAULT_BATCH_BYTES,
+        ),
+        PluginParameter(
+            name="engine",
+            label="Write Engine",
+            description=ENGINE_DESCRIPTION,
+            param_type=ChoiceParameterType(ENGINES),
+            advanced=True,
+            default_value=ENGINE_AUTO,
+        ),
+        PluginParameter(
+            name="collections_threshold",
+            label="sObject Collections Threshold",
+            description=COLLECTIONS_THRESHOLD_DESCRIPTION,
+            advanced=True,
+            default_value=DEFAULT_COLLECTIONS_THRESHOLD,
+        ),
+        PluginParameter(
+            name="workers",
+            label="Concurrent Jobs",
+            description=WORKERS_DESCRIPTION,
+            advanced=True,
+            default_value=DEFAULT_WORKERS,
+        ),
+        PluginParameter(
+            name="external_id_field",
+            label="External ID Field",
+            description=EXTERNAL_ID_FIELD_DESCRIPTION,
+            advanced=True,
+            default_value="Id",
+        ),
+        PluginParameter(
+            name="api_reserve",
+            label="API Reserve (%)",
+            description=API_RESERVE_DESCRIPTION,
+            advanced=True,
+            default_value=DEFAULT_RESERVE,
+        ),
+        PluginParameter(
+            name="skip_unchanged",
+            label="Skip Unchanged Records",
+            description=SKIP_UNCHANGED_DESCRIPTION,
+            advanced=True,
+            default_value=False,
+        ),
+        PluginParameter(
+            name="retries",
+            label="Retries",
+            description=RETRIES_DESCRIPTION,
+            advanced=True,
+            default_value=DEFAULT_RETRIES,
+        ),
+        PluginParameter(
+            name="resume",
+            label="Resumable Execution",
+            description=RESUME_DESCRIPTION,
+            advanced=True,
+            default_value=False,
+        ),
+    ],
+    actions=[
+        PluginAction(
+            name="check_credentials",
+            label="Check credentials",
+            description=CHECK_CREDENTIALS_DESCRIPTION,
+        ),
     ],
 )
 class SobjectCreate(WorkflowPlugin):
     """Salesforce Create Record(s)"""
 
-    def __init__(
-        self, username: str, password: str, security_token: str, salesforce_object: str
+    def __init__(  # noqa: PLR0913
+        self,
+        username: str,
+        password: str,
+        security_token: str,
+        salesforce_object: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        batch_bytes: int = DEFAULT_BATCH_BYTES,
+        engine: str = ENGINE_AUTO,
+        collections_threshold: int = DEFAULT_COLLECTIONS_THRESHOLD,
+        workers: int = DEFAULT_WORKERS,
+        external_id_field: str = "Id",
+        api_reserve: int = DEFAULT_RESERVE,
+        skip_unchanged: bool = False,
+        retries: int = DEFAULT_RETRIES,
+        resume: bool = False,
+        operation: str = OPERATION_UPSERT,
     ) -> None:
         self.log.info("Salesforce Create Record(s)")
 
         if salesforce_object is None or salesforce_object == "":
             raise ValueError("Salesforce Object API Name is required.")
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown write engine '{engine}'.")
+        if batch_size <= 0:
+            raise ValueError("Batch size must be positive.")
+        if engine != ENGINE_BULK2 and batch_size > DEFAULT_BATCH_SIZE:
+            raise ValueError(f"Batch size of the Bulk API must be at most {DEFAULT_BATCH_SIZE}.")
+        max_batch_bytes = MAX_JOB_BYTES if engine == ENGINE_BULK2 else DEFAULT_BATCH_BYTES
+        if not 0 < batch_bytes <= max_batch_bytes:
+            raise ValueError(f"Batch size in bytes must be between 1 and {max_batch_bytes}.")
+        if not external_id_field:
+            raise ValueError("External ID field is required.")
+        if not 0 <= api_reserve < 100:  # noqa: PLR2004
+            raise ValueError("API reserve must be a percentage between 0 and 99.")
+        if retries < 0:
+            raise ValueError("Retries must not be negative.")
+        validate_operation(operation, engine, skip_unchanged)
+        self.operation = operation
         self.salesforce_object = salesforce_object
+        self.batch_size = batch_size
+        if operation != OPERATION_UPSERT and batch_size == DEFAULT_BATCH_SIZE:
+            self.batch_size = DEFAULT_DELETE_BATCH_SIZE
+        self.batch_bytes = batch_bytes
+        self.engine = engine
+        self.collections_threshold = collections_threshold
+        self.workers = workers
+        self.external_id_field = external_id_field
+        self.api_reserve = api_reserve
+        self.skip_unchanged = skip_unchanged
+        self.changes: ChangeIndex | None = None
+        self.retries = retries
+        self.resume = resume
+        self.progress: WriteProgress | None = None
 
         self.username = username
         self.password = password
         self.security_token = security_token
-        self.salesforce = Salesforce(
+        self.salesforce: Salesforce | None = None
+        self.metrics = Metrics()
+
+    def get_connection(self) -> "Salesforce":
+        """Get salesforce connection object (connects on first use)"""
+        if self.salesforce is None:
+            self.salesforce = self.connect()
+        return self.salesforce
+
+    def connect(self) -> "Salesforce":
+        """Get a connection from the session pool (recorded in the metrics)"""
+        from cmem_plugin_salesforce.helper.session import connect  # noqa: PLC0415
+
+        return connect(
             username=self.username,
             password=self.password,
             security_token=self.security_token,
+            metrics=self.metrics,
+            reserve=self.api_reserve,
         )
 
-    def get_connection(self) -> Salesforce:
-        """Get salesforce connection object"""
-        return self.salesforce
+    def check_credentials(self) -> str:
+        """Check the credentials with a login (plugin action)"""
+        from cmem_plugin_salesforce.helper.session import validate_credentials  # noqa: PLC0415
+
+        validate_credentials(self.username, self.password, self.security_token)
+        return f"Login as `{self.username}` successful."
 
     def execute(self, inputs: Sequence[Entities], context: ExecutionContext) -> Entities | None:
         """Execute create plugin flow"""
-        summary: list[tuple[str, str]] = []
         if not inputs:
             self.log.info("No Entities found")
             return None
-        results = []
+        self.metrics = Metrics()
+        with self.metrics.phase("login"):
+            self.salesforce = self.connect()
+        result_summary = ResultSummary(deletes=self.operation != OPERATION_UPSERT)
+        failed = FailedRecords()
+        retry: list[dict[str, str]] = []
+        checkpoint = self.get_checkpoint(inputs, context) if self.resume else None
+        if checkpoint is not None:
+            self.progress = self.resume_progress(checkpoint, retry)
+        if self.skip_unchanged:
+            self.changes = ChangeIndex(
+                get_state_directory() / INDEX_FILE,
+                scope=f"{self.username}/{self.salesforce_object}",
+                key=self.external_id_field,
+            )
         context.report.update(
             ExecutionReport(
                 entity_count=0,
                 operation="wait",
             )
         )
-        for entities_collection in inputs:
-            results.extend(self.process(entities_collection))
-            context.report.update(
-                ExecutionReport(
-                    entity_count=len(results),
-                    operation="wait",
-                )
-            )
-        created, updated, failed, error_messages = self.get_summary_from_result(results)
-        summary.append(("No. of entities created in Salesforce", f"{created}"))
-        summary.append(("No. of entities updated in Salesforce", f"{updated}"))
+        try:
+            self.write_inputs(inputs, retry, result_summary, failed, context)
+            self.retry(retry, result_summary, failed, context)
+            if checkpoint is not None:
+                checkpoint.clear()
+        finally:
+            self.progress = None
+            if self.changes is not None:
+                result_summary.skipped = self.changes.skipped
+                self.changes.close()
+                self.changes = None
 
         warnings = []
-        if failed > 0:
-            warnings.append(f"{failed} entities failed to create/update in Salesforce")
+        if result_summary.failed > 0:
+            action = "delete" if result_summary.deletes else "create/update"
+            warnings.append(f"{result_summary.failed} entities failed to {action} in Salesforce")
 
-        if error_messages:
-            warnings.append(f"Consolidated Errors: {error_messages}")
+        if result_summary.error_codes:
+            codes = ", ".join(
+                f"{code} ({count})" for code, count in result_summary.error_codes.most_common()
+            )
+            warnings.append(f"Errors: {codes} - the failed records are the output of the task")
 
         context.report.update(
             ExecutionReport(
-                entity_count=len(results),
+                entity_count=result_summary.total,
                 operation="read",
-                summary=summary,
+                summary=self.get_report_summary(result_summary) + self.metrics.get_summary(),
                 warnings=warnings,
             )
         )
-        return None
+        export_metrics(
+            {
+                "plugin": "SobjectCreate",
+                "task": get_task_key(context),
+                "engine": self.engine,
+                "operation": self.operation,
+                "entities": result_summary.total,
+                "created": result_summary.created,
+                "updated": result_summary.updated,
+                "deleted": result_summary.deleted,
+                "failed": result_summary.failed,
+                "retried": result_summary.retried,
+                "skipped": result_summary.skipped,
+                **self.metrics.to_dict(),
+            }
+        )
+        return failed.get_entities()
 
-    def validate_columns(self, columns: Sequence[str]) -> None:
-        """Validate the columns name against salesforce object"""
-        # TODO(saipraneeth): find an alternative to get SFType  #noqa: TD003
-        describe = self.get_connection().__getattr__(self.salesforce_object).describe()  # type: ignore[operator]
+    def write_inputs(
+        self,
+        inputs: Sequence[Entities],
+        retry: list[dict[str, str]],
+        result_summary: ResultSummary,
+        failed: FailedRecords,
+        context: ExecutionContext,
+    ) -> None:
+        """Write the inputs (without the ones completed before a resumed execution)"""
+        skipped = self.progress.skipped_inputs if self.progress is not None else 0
+        for index, entities_collection in enumerate(inputs):
+            if index < skipped:
+                continue
+            for results in self.process(entities_collection, index):
+                result_summary.add(self.sort_out(results, retry, failed, attempt=1))
+                self.report_progress(result_summary, context)
 
-        object_fields = [field["name"] for field in describe["fields"]]
-        columns_not_available = set(columns) - set(object_fields)
+    def get_checkpoint(self, inputs: Sequence[Entities], context: ExecutionContext) -> Checkpoint:
+        """Get the checkpoint of this task and input schema"""
+        columns = [[path.path for path in entities.schema.paths] for entities in inputs]
+        fingerprint = get_fingerprint(
+            self.salesforce_object, self.operation, self.external_id_field, columns
+        )
+        return Checkpoint(get_checkpoint_store(), get_task_key(context), fingerprint)
+
+    def resume_progress(self, checkpoint: Checkpoint, retry: list[dict[str, str]]) -> WriteProgress:
+        """Load the progress of a failed execution and save the progress after each batch"""
+        progress = checkpoint.progress
+        if progress:
+            retry.extend(progress.get("retry", []))
+            self.log.info(
+                f"Resume after {progress.get('rows', 0)} rows of input {progress.get('input', 0)}"
+            )
+        return WriteProgress(
+            checkpoint,
+            lambda input_index, rows: checkpoint.save(input=input_index, rows=rows, retry=retry),
+        )
+
+    def retry(
+        self,
+        records: list[dict[str, str]],
+        result_summary: ResultSummary,
+        failed: FailedRecords,
+        context: ExecutionContext,
+    ) -> None:
+        """Write the records with a transient error again (with increasing delay)"""
+        for attempt in range(2, self.retries + 2):
+            if not records:
+                break
+            delay = get_retry_delay(attempt - 1)
+            self.log.info(f"Retry {len(records)} records in {delay} seconds")
+            with self.metrics.phase("retry delay"):
+                time.sleep(delay)
+            batch, records = group_records(records, self.external_id_field), []
+            result_summary.retried += len(batch)
+            for results in self.write(batch):
+                result_summary.add(self.sort_out(results, records, failed, attempt))
+                self.report_progress(result_summary, context)
+
+    def sort_out(
+        self,
+        results: Iterable[dict[str, Any]],
+        retry: list[dict[str, str]],
+        failed: FailedRecords,
+        attempt: int,
+    ) -> Iterator[dict[str, Any]]:
+        """Pass the final results through and sort out the failed records
+
+        Records with a transient error are added to the records to retry (and their
+        results are not passed), as long as retries are left. Other failed records
+        are added to the failed records. Successfully written records are added to
+        the change index (if unchanged records are skipped).
+        """
+        written = []
+        for result in results:
+            if result["success"]:
+                written.append(result)
+                yield result
+                continue
+            record = result.get("record", {})
+            if attempt <= self.retries and is_transient(result):
+                retry.append(record)
+                continue
+            failed.add(record, result["errors"], attempt)
+            yield result
+        if self.changes is not None:
+            self.changes.add(written)
+
+    def report_progress(self, result_summary: ResultSummary, context: ExecutionContext) -> None:
+        """Update the execution report with the current counts"""
+        if self.changes is not None:
+            result_summary.skipped = self.changes.skipped
+        context.report.update(
+            ExecutionReport(
+                entity_count=result_summary.total,
+                operation="wait",
+                summary=self.get_report_summary(result_summary) + self.metrics.get_summary(),
+            )
+        )
+
+    @staticmethod
+    def get_report_summary(result_summary: ResultSummary) -> list[tuple[str, str]]:
+        """Get the execution report summary from the result counts"""
+        summary = (
+            [("No. of entities deleted in Salesforce", f"{result_summary.deleted}")]
+            if result_summary.deletes
+            else [
+                ("No. of entities created in Salesforce", f"{result_summary.created}"),
+                ("No. of entities updated in Salesforce", f"{result_summary.updated}"),
+            ]
+        )
+        if result_summary.retried:
+            summary.append(("No. of retried entities", f"{result_summary.retried}"))
+        if result_summary.skipped:
+            summary.append(("No. of unchanged entities skipped", f"{result_summary.skipped}"))
+        return summary
+
+    def validate_columns(self, columns: Sequence[str]) -> RecordSerializer:
+        """Validate the columns name against salesforce object and compile the serializer"""
+        description = describe(self.get_connection(), self.salesforce_object, self.username)
+        if self.operation != OPERATION_UPSERT:
+            if "id" not in (column.lower() for column in columns):
+                raise ValueError("Records are deleted by Id, but the input has no Id path.")
+            return IdSerializer(columns, description)
+        columns_not_available = set(columns) - set(description.fields)
         if columns_not_available:
             raise ValueError(
                 f"Columns {columns_not_available} are "
                 f"not available in Salesforce Object {self.salesforce_object}"
             )
+        if self.external_id_field.lower() != "id" and self.external_id_field not in columns:
+            raise ValueError(f"External ID field {self.external_id_field} is not in the input.")
+        return RecordSerializer(columns, description, self.external_id_field)
 
-    def process(self, entities_collection: Entities):  # noqa: ANN201
-        """Extract the data from entities and create in salesforce"""
+    def process(
+        self, entities_collection: Entities, input_index: int = 0
+    ) -> Iterator[Iterable[dict[str, Any]]]:
+        """Extract the data from entities and create in salesforce (batch by batch)
+
+        Yields the results of each batch. The next batch is built from the (lazily
+        read) entities while the current batch is uploaded. Rows with values which do
+        not match the types of their fields are not uploaded, their (failed) results
+        are yielded with the next batch results. For a resumable execution, the rows
+        written before are skipped and the progress is saved after each batch.
+        """
         columns = [ep.path for ep in entities_collection.schema.paths]
-        self.validate_columns(columns)
-        data = []
-        for entity in entities_collection.entities:
-            values = entity.values
-            record = {}
-            for index, column in enumerate(columns):
-                if column.lower() != "id" or values[index]:
-                    record[column] = ",".join(values[index])
-
-            data.append(record)
-
-        self.log.info(f"Data : {data}")
+        with self.metrics.phase("describe"):
+            serializer = self.validate_columns(columns)
+        entities: Iterator[Entity] = self.metrics.iter_phase(
+            entities_collection.entities, "read input"
+        )
+        if self.progress is not None:
+            entities = self.progress.skip(entities, input_index)
+        rejected: list[dict[str, Any]] = []
+        records = serializer.iter_records((entity.values for entity in entities), rejected)
+        if self.operation != OPERATION_UPSERT:
+            records = self.group_deletes(records)
+        if self.changes is not None:
+            records = self.changes.filter(records)
+        if self.progress is not None:
+            records = self.progress.track(records)
+        for results in self.write(records):
+            if rejected:
+                yield self.pop_rejected(rejected)
+            yield results if self.progress is None else self.progress.count(results)
+        if rejected:
+            yield self.pop_rejected(rejected)
+
+    def group_deletes(self, records: Iterable[dict[str, str]]) -> Iterator[dict[str, str]]:
+        """Order the records to delete by parent and reduce them to the Id
+
+        The records are ordered in windows of the batches of all workers, so that the
+        records of a parent are deleted in the same batch. Resumable executions keep
+        the input order, as their progress is counted in input rows.
+        """
+        if self.progress is None:
+            records = iter_grouped(records, self.batch_size * self.workers)
+        for record in records:
+            yield {"Id": record["Id"]}
+
+    def pop_rejected(self, rejected: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Take the results of the rejected rows (and log them)"""
+        results = rejected.copy()
+        rejected.clear()
+        self.log.info(f"{len(results)} records rejected before the upload")
+        return results
+
+    def write(self, records: Iterable[dict[str, str]]) -> Iterator[Iterable[dict[str, Any]]]:
+        """Write records in batches with the configured engine and yield the results
+
+        With the automatic engine selection, up to threshold + 1 records are read
+        ahead to decide between the sObject Collections API and the Bulk API (deletes
+        are sent with the Bulk API 2.0).
+        """
+        engine = self.engine
+        if engine == ENGINE_AUTO and self.operation != OPERATION_UPSERT:
+            engine = ENGINE_BULK2
+        elif engine == ENGINE_AUTO:
+            records = iter(records)
+            head = list(islice(records, self.collections_threshold + 1))
+            engine = ENGINE_BULK if len(head) > self.collections_threshold else ENGINE_COLLECTIONS
+            self.log.info(f"Write engine for {len(head)} (or more) records: {engine}")
+            records = chain(head, records)
+        batches = self.metrics.iter_phase(
+            iter_batches(records, partial(self.get_batch_size, engine), self.batch_bytes),
+            "serialize",
+        )
+        if engine == ENGINE_COLLECTIONS:
+            collections = SObjectCollections(
+                self.get_connection(),
+                self.salesforce_object,
+                external_id_field=self.external_id_field,
+                workers=self.workers,
+            )
+            yield from self.metrics.iter_phase(collections.execute(batches), "collections")
+        elif engine == ENGINE_BULK2:
+            ingest = BulkIngest(
+                self.get_connection(),
+                self.salesforce_object,
+                operation=self.operation,
+                external_id_field=self.external_id_field,
+                workers=self.workers,
+            )
+            for job in self.metrics.iter_phase(ingest.execute(batches), "bulk job"):
+                self.log.info(f"Ingest job {job.job_id} finished in state {job.info['state']}")
+                yield self.metrics.iter_phase(job.iter_outcomes(), "download")
+        else:
+            write = self.upsert if self.operation == OPERATION_UPSERT else self.delete
+            yield from self.metrics.iter_phase(iter_pipelined(batches, write), "bulk job")
+
+    def get_batch_size(self, engine: str) -> int:
+        """Get the record limit of the next batch for the selected engine
+
+        The configured batch size is capped to the limit of the engine. While the API
+        requests are paced, the largest possible Bulk API batches are used (the Bulk
+        API 2.0 batches are then only limited in bytes), as fewer batches need fewer
+        requests. Delete batches are not enlarged, as they lock parent records.
+        """
+        from cmem_plugin_salesforce.helper.session import PooledSalesforce  # noqa: PLC0415
+
+        maximum = MAX_BATCH_SIZES.get(engine, DEFAULT_BATCH_SIZE)
+        batch_size = min(self.batch_size, maximum)
+        salesforce = self.get_connection()
+        if (
+            engine == ENGINE_COLLECTIONS
+            or not isinstance(salesforce, PooledSalesforce)
+            or self.operation != OPERATION_UPSERT
+        ):
+            return batch_size
+        limiter = salesforce.pooled.limiter
+        return limiter.get_batch_size(batch_size, maximum, self.api_reserve)
+
+    def upsert(self, batch: list[dict[str, str]]) -> list[dict[str, Any]]:
+        """Upsert a batch of records with the Bulk API"""
+        self.log.info(f"Upsert batch of {len(batch)} records")
+        self.log.debug(f"Data : {batch}")
         # TODO(saipraneeth): find an alternative to get SFType  #noqa: TD003
         bulk_object_type: SFBulkType = self.get_connection().bulk.__getattr__(  # type: ignore[assignment, union-attr]
             self.salesforce_object
         )
-        result = bulk_object_type.upsert(data=data, external_id_field="Id")  # type: ignore[arg-type]
+        result = bulk_object_type.upsert(data=batch, external_id_field=self.external_id_field)  # type: ignore[arg-type]
+        return self.add_records(result, batch)  # type: ignore[arg-type]
+
+    def delete(self, batch: list[dict[str, str]]) -> list[dict[str, Any]]:
+        """Delete (or hard delete) a batch of records with the Bulk API"""
+        self.log.info(f"{self.operation} batch of {len(batch)} records")
+        bulk_object_type: SFBulkType = self.get_connection().bulk.__getattr__(  # type: ignore[assignment, union-attr]
+            self.salesforce_object
+        )
+        if self.operation == OPERATION_HARD_DELETE:
+            result = bulk_object_type.hard_delete(data=batch)  # type: ignore[arg-type]
+        else:
+            result = bulk_object_type.delete(data=batch)  # type: ignore[arg-type]
+        return self.add_records(result, batch)  # type: ignore[arg-type]
 
+    @staticmethod
+    def add_records(
+        result: list[dict[str, Any]], batch: list[dict[str, str]]
+    ) -> list[dict[str, Any]]:
+        """Add the timestamp and the submitted record to the results of a batch"""
         current_timestamp = round(time.time()) * 1000
-        for res in result:
+        for res, record in zip(result, batch, strict=False):
             res["timestamp"] = current_timestamp
-
+            res["record"] = record
         return result
 
     def create_entities_from_result(self, result: list[dict[str, Any]]) -> Entities:
@@ -205,19 +849,11 @@ class SobjectCreate(WorkflowPlugin):
     def get_summary_from_result(self, result: list[dict[str, Any]]) -> tuple[int, int, int, str]:
         """Get summary from result list"""
         self.log.info("Start of get_summary_from_result")
-        created: int = 0
-        updated: int = 0
-        error: int = 0
-        error_messages: set = set()
-        for record in result:
-            if record["success"] and record["created"]:
-                created += 1
-            elif record["success"]:
-                updated += 1
-            else:
-                error += 1
-
-            for errors in record["errors"]:
-                error_messages.add(f"{errors}")
-
-        return created, updated, error, ",".join(error_messages)
+        result_summary = ResultSummary()
+        result_summary.add(result)
+        return (
+            result_summary.created,
+            result_summary.updated,
+            result_summary.failed,
+            ",".join(result_summary.error_messages),
+        )
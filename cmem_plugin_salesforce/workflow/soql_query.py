@@ -1,32 +1,84 @@
 """Salesforce Integration Plugin"""
 
-import io
-import json
-import uuid
 from collections import OrderedDict
-from collections.abc import Sequence
+from collections.abc import Callable, Generator, Iterator, Sequence
+from functools import partial
+from itertools import chain
+from typing import TYPE_CHECKING, Any
 
-from cmem_plugin_base.dataintegration.context import ExecutionContext
-from cmem_plugin_base.dataintegration.description import Plugin, PluginParameter
+from cmem_plugin_base.dataintegration.context import ExecutionContext, ExecutionReport
+from cmem_plugin_base.dataintegration.description import (
+    Plugin,
+    PluginAction,
+    PluginParameter,
+)
 from cmem_plugin_base.dataintegration.entity import (
     Entities,
     Entity,
-    EntityPath,
-    EntitySchema,
 )
+from cmem_plugin_base.dataintegration.parameter.choice import ChoiceParameterType
 from cmem_plugin_base.dataintegration.parameter.dataset import DatasetParameterType
 from cmem_plugin_base.dataintegration.parameter.multiline import (
     MultilineStringParameterType,
 )
 from cmem_plugin_base.dataintegration.plugins import WorkflowPlugin
-from cmem_plugin_base.dataintegration.utils import write_to_dataset
-from simple_salesforce import Salesforce, SalesforceLogin
 
 from cmem_plugin_salesforce import (
+    API_RESERVE_DESCRIPTION,
+    CHECK_CREDENTIALS_DESCRIPTION,
     LINKS,
     SECURITY_TOKEN_DESCRIPTION,
     USERNAME_DESCRIPTION,
 )
+from cmem_plugin_salesforce.helper.binary import BinaryDownloader
+from cmem_plugin_salesforce.helper.bulk import BulkQuery, is_bulk_query
+from cmem_plugin_salesforce.helper.checkpoint import (
+    CHECKPOINT_FILE,
+    Checkpoint,
+    get_checkpoint_store,
+    get_fingerprint,
+)
+from cmem_plugin_salesforce.helper.chunking import ChunkedQuery
+from cmem_plugin_salesforce.helper.compression import COMPRESSION_ENV
+from cmem_plugin_salesforce.helper.dataset import FORMAT_JSON, FORMAT_NDJSON, DatasetWriter
+from cmem_plugin_salesforce.helper.delta import (
+    DELETIONS_GET_DELETED,
+    DELETIONS_NONE,
+    DELETIONS_QUERY_ALL,
+    WATERMARK_FIELDS,
+    DeltaSync,
+)
+from cmem_plugin_salesforce.helper.metadata import CACHE_DIR_ENV
+from cmem_plugin_salesforce.helper.metrics import METRICS_FILE_ENV, Metrics, export_metrics
+from cmem_plugin_salesforce.helper.multi import (
+    QUERY_INDEX,
+    MultiQuery,
+    TaggedProjector,
+    get_labels,
+)
+from cmem_plugin_salesforce.helper.plan import (
+    count_records,
+    explain,
+    is_splittable,
+)
+from cmem_plugin_salesforce.helper.projection import Projector
+from cmem_plugin_salesforce.helper.query import (
+    get_fields,
+    get_object_name,
+    iter_more_pages,
+    iter_query_pages,
+    split_queries,
+)
+from cmem_plugin_salesforce.helper.result_cache import (
+    RESULT_CACHE_SIZE_ENV,
+    get_result_cache,
+    probe,
+)
+from cmem_plugin_salesforce.helper.state import STATE_DIR_ENV, get_state_store, get_task_key
+from cmem_plugin_salesforce.helper.throttle import DEFAULT_RESERVE
+
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
 
 # fields are not validated by SOQL Parser
 EXAMPLE_FIELDS_QUERY = "SELECT FIELDS(STANDARD) FROM Lead"
@@ -62,6 +114,49 @@ Retrieve first name and last name of all Contact resources. (with parser validat
 
 Please refer to the {LINKS["OBJECT_REFERENCE"]} of the Salesforce Platform data
 model in order to get an overview of the available objects and fields.
+
+Fields of related objects (e.g. `Account.Name`) are returned as dotted columns.
+Empty (null) fields have no value, booleans are `true` or `false`. If the `Id` is
+selected, the entity URI is derived from it (`urn:salesforce:<object>:<Id>`).
+
+Several queries can be given, separated by `;`. They are executed concurrently over
+one connection: the first result pages of up to 25 queries are fetched with one
+request of the Composite Batch API, further pages of larger queries are fetched in
+parallel. The records of all queries are emitted as one stream: the path `query`
+tells the object of the query (numbered, if several queries use the same object),
+the other paths are the columns of all queries. Several queries are always executed
+with the REST API and can not be executed incrementally.
+
+Binary fields (e.g. `ContentVersion.VersionData` or `Attachment.Body`) are returned
+as URLs. With the advanced option Download Binaries, these binaries are downloaded
+concurrently and streamed to file resources of the project, so that they are never
+held in memory. The entities get the size, the SHA-256 hash and the resource name of
+each binary (paths `<field>Size`, `<field>Sha256` and `<field>Resource`).
+
+Results of repeated queries (e.g. of reference data) can be cached on disk for a
+configurable time (as gzip compressed NDJSON in the directory `{CACHE_DIR_ENV}`, or
+the state directory). Before each execution, an aggregate probe query (number of
+records and latest `SystemModstamp` with the conditions of the query) validates the
+cached result, so an unchanged result is served without downloading it again (changes
+of related records, e.g. `Account.Name` in a query of contacts, are not detected). The
+least recently used results are removed when the cache exceeds 256 MiB (or the size
+in bytes given by `{RESULT_CACHE_SIZE_ENV}`).
+
+Long running queries can be made resumable: the cursor of the REST API (or the job
+and result locator of the Bulk API 2.0) is stored after each consumed result page
+(in the file `{CHECKPOINT_FILE}` in the directory `{STATE_DIR_ENV}`). If an execution
+fails, the next execution of the same query continues after the last consumed page
+(as long as the cursor is valid: REST API cursors expire after 15 minutes of
+inactivity, Bulk API 2.0 results after 7 days), otherwise the query starts over.
+
+After all results are emitted, the execution report shows the time spent per phase
+(login, query, download, conversion, ...), the number of HTTP requests, the
+transferred bytes and the API usage of the org. If the environment variable
+`{METRICS_FILE_ENV}` is set, these metrics are also appended to this file as JSON line.
+
+Responses are requested with gzip compression and bulk uploads are sent compressed,
+which saves most of the transferred bytes. Set the environment variable
+`{COMPRESSION_ENV}` to `false` to disable the compression.
 """  # noqa: S608
 
 PARSE_SOQL_DESCRIPTION = f"""
@@ -78,20 +173,267 @@ The query text of your SOQL query.
 SOQL uses the SELECT statement combined with filtering statements to return sets
 of data, which can optionally be ordered. For a complete description of the syntax,
 see {LINKS["SOQL_SYNTAX"]}.
+
+Several queries can be separated by `;`: they are executed concurrently, and their
+records are emitted together, tagged with the queried object (path `query`).
+"""
+
+ENGINE_REST = "rest"
+ENGINE_BULK = "bulk"
+ENGINE_PARALLEL = "parallel"
+ENGINE_AUTO = "auto"
+ENGINES = OrderedDict(
+    {
+        ENGINE_AUTO: "Automatic (based on the result size)",
+        ENGINE_REST: "REST API (paged)",
+        ENGINE_BULK: "Bulk API 2.0",
+        ENGINE_PARALLEL: "REST API (parallel Id chunks)",
+    }
+)
+
+ENGINE_DESCRIPTION = f"""
+The API used to execute the query.
+
+The REST API fetches the result in pages of up to 2,000 records. The Bulk API 2.0
+runs the query as an asynchronous job and downloads the result as CSV in large chunks,
+which is much faster for large results. Note that the Bulk API does not support all
+SOQL features (e.g. sub-queries or `FIELDS()`).
+
+The parallel REST API engine splits the Id space of the queried object into ranges
+(similar to the primary key chunking of the Bulk API) and fetches these ranges
+concurrently. Queries with `LIMIT`, `OFFSET` or `GROUP BY` can not be split.
+
+With the automatic selection, the REST API is used up to the configured Bulk API
+threshold, above it the Bulk API (or the parallel engine, if the query is not supported
+by the Bulk API). The number of records is taken from the first result page, or with a
+query plan check, before the query is executed. Resumable executions do not use the
+parallel engine. Refer to the {LINKS["BULK_QUERY"]} for details.
 """
 
+BULK_THRESHOLD_DESCRIPTION = """
+Minimum number of result records for the automatic engine selection to switch to the
+Bulk API 2.0.
+"""
 
-def validate_credentials(username: str, password: str, security_token: str) -> None:
-    """Validate Salesforce login credentials"""
-    SalesforceLogin(username=username, password=password, security_token=security_token)
+CHUNKS_DESCRIPTION = """
+Number of Id ranges the query is split into by the parallel REST API engine.
+"""
 
+WORKERS_DESCRIPTION = """
+Number of Id ranges which are fetched concurrently by the parallel REST API engine
+(also the number of queries, resp. binaries, which are fetched concurrently).
+"""
 
-def get_projections(record: OrderedDict) -> list[str]:
-    """Get keys from dict"""
-    projections = list(record)
-    # Remove metadata keys
-    projections.remove("attributes")
-    return projections
+ORDERED_DESCRIPTION = """
+Emit the results of the parallel REST API engine in Id range order.
+If disabled, results are emitted as soon as they arrive, which is faster.
+"""
+
+PLAN_NONE = "none"
+PLAN_EXPLAIN = "explain"
+PLAN_COUNT = "count"
+PLANS = OrderedDict(
+    {
+        PLAN_NONE: "No check",
+        PLAN_EXPLAIN: "Query plan (explain)",
+        PLAN_COUNT: "Query plan and record count (COUNT())",
+    }
+)
+
+QUERY_PLAN_DESCRIPTION = """
+Check the query before it is executed. The query plan of the query optimizer (REST API
+`explain`, no records are read) gives the estimated number of records and the cost of
+the query, and a `COUNT()` query gives the exact number of records (one more request).
+
+Queries which are not selective (a full scan of the object, or a relative cost above 1)
+are reported with a warning before they are executed. With the automatic engine
+selection, the engine is selected from the estimated number of records. Only single
+queries are checked.
+"""
+
+DATASET_FORMATS = OrderedDict(
+    {FORMAT_JSON: "JSON array", FORMAT_NDJSON: "Newline delimited JSON (NDJSON)"}
+)
+
+DATASET_FORMAT_DESCRIPTION = """
+The format of the records written to the dataset. The records are uploaded while
+they are fetched, as returned by Salesforce (Bulk API results as flat objects).
+"""
+
+INCREMENTAL_DESCRIPTION = f"""
+Only emit records which changed since the last successful execution of this task.
+
+The task stores the time of each execution (minus a safety margin of one minute) as
+watermark and restricts the query of the next execution to records with a newer
+watermark field value. The first execution (or the first after a change of the query)
+emits all records. The watermarks are stored in a JSON file in the directory given
+by the environment variable `{STATE_DIR_ENV}` (default: the cache directory or
+`~/.cmem-plugin-salesforce`). Queries with `LIMIT`, `OFFSET` or `GROUP BY` can not
+be executed incrementally.
+"""
+
+WATERMARK_FIELD_DESCRIPTION = """
+The timestamp field of the incremental mode. `SystemModstamp` is indexed and also
+changes on system updates, `LastModifiedDate` only changes on user updates.
+"""
+
+DOWNLOAD_BINARIES_DESCRIPTION = """
+Download the binaries of the selected binary fields (e.g. `ContentVersion.VersionData`
+or `Attachment.Body`) to file resources of the project.
+
+The binaries are downloaded on a pool of workers and streamed in chunks to the
+resources. The entities get the size (`<field>Size`), the SHA-256 hash (`<field>Sha256`)
+and the resource name (`<field>Resource`) of each binary. The binary fields are
+detected in the first result page. Binaries can not be downloaded with the Bulk API.
+"""
+
+BINARY_RESOURCE_PREFIX_DESCRIPTION = """
+Prefix of the names of the downloaded binary resources. The name of a resource is
+`<prefix><object>-<Id>-<field>`, followed by the file extension, if the query selects
+the field `FileExtension`. Existing resources are replaced.
+"""
+
+CACHE_TTL_DESCRIPTION = """
+Seconds for which the result of the query is cached on disk (0 disables the cache).
+A cached result is only used if a probe query (number of records and latest
+`SystemModstamp`) returns the same values as for the cached result. The probe only
+covers the queried object: fields of related records (e.g. `Account.Name` in a
+query of contacts) are served from the cache, even if the related record changed.
+Only available for single queries with the REST API (the automatic engine selection
+keeps the REST API for cached queries), without incremental mode, resumable
+execution or binary download.
+"""
+
+RESUME_DESCRIPTION = """
+Store the query cursor after each consumed result page, so that an execution after a
+failed one continues with the remaining records. Not available for the parallel
+engine, several queries, the incremental mode, the dataset output and the result
+cache.
+"""
+
+DELETIONS = OrderedDict(
+    {
+        DELETIONS_NONE: "Ignore deletions",
+        DELETIONS_QUERY_ALL: "Query deleted records (queryAll)",
+        DELETIONS_GET_DELETED: "Fetch deleted Ids (getDeleted API)",
+    }
+)
+
+DELETIONS_DESCRIPTION = """
+How the incremental mode emits records deleted since the last execution.
+
+Both options add the field `IsDeleted` to the query. With `queryAll`, deleted records
+(which are still in the recycle bin) are emitted with all selected fields. With the
+getDeleted API, deleted records are emitted with `Id` and `IsDeleted` only (deletions
+of the last 30 days are available).
+"""
+
+
+def validate_choice(value: str, choices: OrderedDict[str, str], label: str) -> None:
+    """Validate that a value is one of the choices of a parameter"""
+    if value not in choices:
+        raise ValueError(f"Unknown {label} '{value}'.")
+
+
+def validate_download(engine: str, queries: int) -> None:
+    """Validate that binaries can be downloaded with the given options"""
+    if engine == ENGINE_BULK:
+        raise ValueError("Binaries can not be downloaded with the Bulk API.")
+    if queries > 1:
+        raise ValueError("Binaries can not be downloaded with several queries.")
+
+
+def validate_resume(engine: str, queries: int, incremental: bool, output: object) -> None:
+    """Validate that an execution with the given options can be resumed
+
+    The output is the dataset or the time to live of the result cache (if any).
+    """
+    if engine == ENGINE_PARALLEL or queries > 1:
+        raise ValueError("Only single queries with the REST or Bulk API can be resumed.")
+    if incremental or output:
+        raise ValueError(
+            "Incremental queries, dataset outputs and cached results can not be resumed."
+        )
+
+
+def validate_queries(engine: str, incremental: bool) -> None:
+    """Validate that several queries can be executed with the given options"""
+    if engine not in (ENGINE_AUTO, ENGINE_REST):
+        raise ValueError("Several queries can only be executed with the REST API.")
+    if incremental:
+        raise ValueError("Several queries can not be executed incrementally.")
+
+
+def validate_cache(
+    engine: str, queries: int, incremental: bool, download_binaries: bool, cache_ttl: int
+) -> None:
+    """Validate that the results of a query with the given options can be cached"""
+    if cache_ttl < 0:
+        raise ValueError("Cache time to live must not be negative.")
+    if engine not in (ENGINE_AUTO, ENGINE_REST) or queries > 1:
+        raise ValueError("Only single queries with the REST API can be cached.")
+    if incremental or download_binaries:
+        raise ValueError("Incremental queries and binary downloads can not be cached.")
+
+
+def get_projector(records: list[dict[str, Any]], soql_query: str) -> Projector:
+    """Compile the projector of a query result (the columns are taken from the first record)"""
+    object_name = get_object_name(soql_query)
+    if not records:
+        return Projector([], object_name)
+    return Projector.from_record(records[0], object_name, get_fields(soql_query))
+
+
+def iter_entities(
+    records: list[dict[str, Any]], pages: Iterator[dict], projector: Projector
+) -> Iterator[Entity]:
+    """Create entities from the given records and all remaining result pages
+
+    Pages are fetched lazily, so only the current page is kept in memory.
+    """
+    while True:
+        yield from projector.project(records)
+        page = next(pages, None)
+        if page is None:
+            return
+        records = page["records"]
+
+
+def iter_synced(
+    entities: Iterator[Entity], projector: Projector, sync: DeltaSync
+) -> Iterator[Entity]:
+    """Pass the entities through, add deleted records and commit the watermark at the end"""
+    yield from entities
+    for record in sync.iter_deleted():
+        values = [
+            [record["id"]] if path == "Id" else ["true"] if path == "IsDeleted" else []
+            for path in projector.paths
+        ]
+        yield Entity(uri=projector.get_uri(record["id"]), values=values)
+    sync.commit()
+
+
+def report_chunks(
+    pages: Iterator[tuple[int, dict]], chunks: int, context: ExecutionContext
+) -> Iterator[dict]:
+    """Report the progress of each chunk while passing through its pages"""
+    counts: list[int | None] = [None] * chunks
+    finished = [False] * chunks
+    for index, page in pages:
+        counts[index] = (counts[index] or 0) + len(page["records"])
+        finished[index] = page["done"]
+        summary = []
+        for chunk, count in enumerate(counts):
+            state = "done" if finished[chunk] else "pending" if count is None else "running"
+            summary.append((f"Chunk {chunk + 1}/{chunks}", f"{count or 0} records ({state})"))
+        context.report.update(
+            ExecutionReport(
+                entity_count=sum(count or 0 for count in counts),
+                operation="read",
+                summary=summary,
+            )
+        )
+        yield page
 
 
 @Plugin(
@@ -131,57 +473,559 @@ def get_projections(record: OrderedDict) -> list[str]:
             advanced=True,
             default_value="",
         ),
+        PluginParameter(
+            name="dataset_format",
+            label="Dataset Format",
+            description=DATASET_FORMAT_DESCRIPTION,
+            param_type=ChoiceParameterType(DATASET_FORMATS),
+            advanced=True,
+            default_value=FORMAT_JSON,
+        ),
+        PluginParameter(
+            name="engine",
+            label="Query Engine",
+            description=ENGINE_DESCRIPTION,
+            param_type=ChoiceParameterType(ENGINES),
+            advanced=True,
+            default_value=ENGINE_AUTO,
+        ),
+        PluginParameter(
+            name="query_plan",
+            label="Query Plan Check",
+            description=QUERY_PLAN_DESCRIPTION,
+            param_type=ChoiceParameterType(PLANS),
+            advanced=True,
+            default_value=PLAN_NONE,
+        ),
+        PluginParameter(
+            name="bulk_threshold",
+            label="Bulk API Threshold",
+            description=BULK_THRESHOLD_DESCRIPTION,
+            advanced=True,
+            default_value=100000,
+        ),
+        PluginParameter(
+            name="chunks",
+            label="Parallel Chunks",
+            description=CHUNKS_DESCRIPTION,
+            advanced=True,
+            default_value=8,
+        ),
+        PluginParameter(
+            name="workers",
+            label="Parallel Workers",
+            description=WORKERS_DESCRIPTION,
+            advanced=True,
+            default_value=4,
+        ),
+        PluginParameter(
+            name="ordered",
+            label="Ordered Merge",
+            description=ORDERED_DESCRIPTION,
+            advanced=True,
+            default_value=False,
+        ),
+        PluginParameter(
+            name="incremental",
+            label="Incremental",
+            description=INCREMENTAL_DESCRIPTION,
+            advanced=True,
+            default_value=False,
+        ),
+        PluginParameter(
+            name="watermark_field",
+            label="Watermark Field",
+            description=WATERMARK_FIELD_DESCRIPTION,
+            param_type=ChoiceParameterType(
+                OrderedDict({field: field for field in WATERMARK_FIELDS})
+            ),
+            advanced=True,
+            default_value=WATERMARK_FIELDS[0],
+        ),
+        PluginParameter(
+            name="deletions",
+            label="Deletions",
+            description=DELETIONS_DESCRIPTION,
+            param_type=ChoiceParameterType(DELETIONS),
+            advanced=True,
+            default_value=DELETIONS_NONE,
+        ),
+        PluginParameter(
+            name="download_binaries",
+            label="Download Binaries",
+            description=DOWNLOAD_BINARIES_DESCRIPTION,
+            advanced=True,
+            default_value=False,
+        ),
+        PluginParameter(
+            name="binary_resource_prefix",
+            label="Binary Resource Prefix",
+            description=BINARY_RESOURCE_PREFIX_DESCRIPTION,
+            advanced=True,
+            default_value="salesforce-",
+        ),
+        PluginParameter(
+            name="api_reserve",
+            label="API Reserve (%)",
+            description=API_RESERVE_DESCRIPTION,
+            advanced=True,
+            default_value=DEFAULT_RESERVE,
+        ),
+        PluginParameter(
+            name="cache_ttl",
+            label="Result Cache Time to Live (s)",
+            description=CACHE_TTL_DESCRIPTION,
+            advanced=True,
+            default_value=0,
+        ),
+        PluginParameter(
+            name="resume",
+            label="Resumable Execution",
+            description=RESUME_DESCRIPTION,
+            advanced=True,
+            default_value=False,
+        ),
+    ],
+    actions=[
+        PluginAction(
+            name="check_credentials",
+            label="Check credentials",
+            description=CHECK_CREDENTIALS_DESCRIPTION,
+        ),
     ],
 )
 class SoqlQuery(WorkflowPlugin):
     """Salesforce Integration Plugin"""
 
     # pylint: disable-msg=too-many-arguments
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         username: str,
         password: str,
         security_token: str,
         soql_query: str,
         dataset: str = "",
+        engine: str = ENGINE_AUTO,
+        bulk_threshold: int = 100000,
+        chunks: int = 8,
+        workers: int = 4,
+        ordered: bool = False,
+        incremental: bool = False,
+        watermark_field: str = WATERMARK_FIELDS[0],
+        deletions: str = DELETIONS_NONE,
+        dataset_format: str = FORMAT_JSON,
+        api_reserve: int = DEFAULT_RESERVE,
+        download_binaries: bool = False,
+        binary_resource_prefix: str = "salesforce-",
+        cache_ttl: int = 0,
+        resume: bool = False,
+        query_plan: str = PLAN_NONE,
     ) -> None:
-        validate_credentials(username, password, security_token)
+        validate_choice(engine, ENGINES, "query engine")
+        if watermark_field not in WATERMARK_FIELDS:
+            raise ValueError(f"Unknown watermark field '{watermark_field}'.")
+        validate_choice(deletions, DELETIONS, "deletions option")
+        validate_choice(dataset_format, DATASET_FORMATS, "dataset format")
+        validate_choice(query_plan, PLANS, "query plan check")
+        if not 0 <= api_reserve < 100:  # noqa: PLR2004
+            raise ValueError("API reserve must be a percentage between 0 and 99.")
+        self.queries = split_queries(soql_query)
+        if len(self.queries) > 1:
+            validate_queries(engine, incremental)
+        if download_binaries:
+            validate_download(engine, len(self.queries))
+        if resume:
+            validate_resume(engine, len(self.queries), incremental, dataset or cache_ttl)
+        if cache_ttl:
+            validate_cache(engine, len(self.queries), incremental, download_binaries, cache_ttl)
+        self.cache_ttl = cache_ttl
+        self.query_plan = query_plan
+        self.plan_summary: list[tuple[str, str]] = []
+        self.plan_warnings: list[str] = []
+        self.resume = resume
+        self.checkpoint: Checkpoint | None = None
+        self.download_binaries = download_binaries
+        self.binary_resource_prefix = binary_resource_prefix
+        self.api_reserve = api_reserve
+        self.dataset_format = dataset_format
+        self.incremental = incremental
+        self.watermark_field = watermark_field
+        self.deletions = deletions
+        self.engine = engine
+        self.bulk_threshold = bulk_threshold
+        self.chunks = chunks
+        self.workers = workers
+        self.ordered = ordered
 
         self.dataset = dataset
         self.username = username
         self.password = password
         self.security_token = security_token
         self.soql_query = soql_query
+        self.metrics = Metrics()
+
+    def check_credentials(self) -> str:
+        """Check the credentials with a login (plugin action)"""
+        from cmem_plugin_salesforce.helper.session import validate_credentials  # noqa: PLC0415
+
+        validate_credentials(self.username, self.password, self.security_token)
+        return f"Login as `{self.username}` successful."
 
     def execute(self, inputs: Sequence[Entities], context: ExecutionContext) -> Entities:
         """Execute SOQL query plugin flow"""
         self.log.info("Start Salesforce Plugin")
-        _ = inputs, context
-        salesforce = Salesforce(
-            username=self.username,
-            password=self.password,
-            security_token=self.security_token,
+        _ = inputs
+        self.metrics = Metrics()
+        self.plan_summary = []
+        self.plan_warnings = []
+        from cmem_plugin_salesforce.helper.session import connect  # noqa: PLC0415
+
+        with self.metrics.phase("login"):
+            salesforce = connect(
+                username=self.username,
+                password=self.password,
+                security_token=self.security_token,
+                metrics=self.metrics,
+                reserve=self.api_reserve,
+            )
+        if len(self.queries) > 1:
+            result = self.execute_queries(salesforce, context)
+            return Entities(
+                entities=self.report_metrics(result.entities, context), schema=result.schema
+            )
+        if not self.incremental:
+            if self.resume:
+                fingerprint = get_fingerprint(self.engine, self.soql_query)
+                self.checkpoint = Checkpoint(
+                    get_checkpoint_store(), get_task_key(context), fingerprint
+                )
+            result = self.execute_query(salesforce, self.soql_query, context)
+            return Entities(
+                entities=self.report_metrics(result.entities, context), schema=result.schema
+            )
+
+        sync = DeltaSync(
+            salesforce,
+            self.soql_query,
+            state=get_state_store(),
+            key=get_task_key(context),
+            field=self.watermark_field,
+            deletions=self.deletions,
         )
+        with self.metrics.phase("watermark"):
+            soql_query = sync.get_query()
+        self.log.info(f"Incremental query: {soql_query}")
+        result = self.execute_query(salesforce, soql_query, context, sync.include_deleted)
+        paths = [path.path for path in result.schema.paths] or get_fields(soql_query)
+        projector = Projector(paths, get_object_name(soql_query))
+        entities = iter_synced(result.entities, projector, sync)
+        return Entities(entities=self.report_metrics(entities, context), schema=projector.schema)
 
-        result = salesforce.query_all(self.soql_query)
-        records = result.pop("records")
-        projections = get_projections(records[0])
+    def execute_query(
+        self,
+        salesforce: "Salesforce",
+        soql_query: str,
+        context: ExecutionContext,
+        include_deleted: bool = False,
+    ) -> Entities:
+        """Execute the query with the configured engine"""
+        progress = self.checkpoint.progress if self.checkpoint is not None else {}
+        engine = self.engine
+        if self.query_plan != PLAN_NONE and not progress:
+            engine = self.check_plan(salesforce, soql_query, context, include_deleted)
+        if engine == ENGINE_BULK or "job_id" in progress:
+            return self.execute_bulk(salesforce, soql_query, context, include_deleted)
+        if engine == ENGINE_PARALLEL:
+            return self.execute_parallel(salesforce, soql_query, context, include_deleted)
+        pages = self.query_pages(salesforce, soql_query, include_deleted)
+        result = next(pages)
+        if engine == ENGINE_AUTO and not progress:
+            engine = self.select_engine(soql_query, result["totalSize"])
+            if engine != ENGINE_REST:
+                self.log.info(
+                    f"Query returns {result['totalSize']} records, using the engine '{engine}'."
+                )
+                pages.close()
+                execute = self.execute_bulk if engine == ENGINE_BULK else self.execute_parallel
+                return execute(salesforce, soql_query, context, include_deleted)
+        all_pages = self.download_pages(salesforce, chain([result], pages), context)
+        if self.download_binaries:
+            result = next(all_pages)
+            all_pages = chain([result], all_pages)
+        projector = get_projector(result["records"], soql_query)
         self.log.info(f"Config length: {len(self.config.get())}")
-        entities = []
-        for record in records:
-            entity_uri = f"urn:uuid:{uuid.uuid4()!s}"
-            values = [[f"{record.pop(projection)}"] for projection in projections]
-            entities.append(Entity(uri=entity_uri, values=values))
-
-        paths = [EntityPath(path=projection) for projection in projections]
-        # TODO(saipraneeth): rename type uri  # noqa: TD003
-        schema = EntitySchema(
-            type_uri="https://example.org/vocab/salesforce",
-            paths=paths,
+
+        self.log.info(f"Happy to serve {result['totalSize']} salesforce data.")
+        all_pages = self.tee_pages(all_pages, context)
+        if self.checkpoint is not None:
+            all_pages = self.checkpoint.iter_pages(all_pages)
+        entities = self.metrics.iter_phase(iter_entities([], all_pages, projector), "convert")
+        return Entities(entities=entities, schema=projector.schema)
+
+    def check_plan(
+        self,
+        salesforce: "Salesforce",
+        soql_query: str,
+        context: ExecutionContext,
+        include_deleted: bool = False,
+    ) -> str:
+        """Check the query plan (and count the records), report it and select the engine
+
+        The configured engine is kept, if no plan is available.
+        """
+        from simple_salesforce.exceptions import SalesforceError  # noqa: PLC0415
+
+        try:
+            with self.metrics.phase("query plan"):
+                plan = explain(salesforce, soql_query)
+                records = (
+                    count_records(salesforce, soql_query, include_deleted)
+                    if self.query_plan == PLAN_COUNT
+                    else None
+                )
+        except SalesforceError as error:
+            self.log.warning(f"Query plan is not available: {error}")
+            return self.engine
+        if plan is not None:
+            self.plan_summary.extend(plan.get_summary())
+            self.plan_warnings.extend(plan.get_warnings())
+            if records is None:
+                records = plan.cardinality
+        if records is None:
+            return self.engine
+        engine = self.select_engine(soql_query, records)
+        self.plan_summary.append(("Estimated records", str(records)))
+        self.log.info(f"Query plan estimates {records} records, using the engine '{engine}'.")
+        context.report.update(
+            ExecutionReport(
+                entity_count=0,
+                operation="wait",
+                summary=self.plan_summary,
+                warnings=self.plan_warnings,
+            )
         )
+        return engine
 
-        self.log.info(f"Happy to serve {result.pop('totalSize')} salesforce data.")
+    def select_engine(self, soql_query: str, records: int) -> str:
+        """Select the engine of a query by the number of records (automatic selection)
+
+        Queries with a result cache keep the REST API, as only its pages are cached.
+        """
+        if self.engine != ENGINE_AUTO:
+            return self.engine
+        if records <= self.bulk_threshold or self.cache_ttl:
+            return ENGINE_REST
+        if is_bulk_query(soql_query) and not self.download_binaries:
+            return ENGINE_BULK
+        if is_splittable(soql_query) and self.checkpoint is None:
+            return ENGINE_PARALLEL
+        return ENGINE_REST
+
+    def execute_bulk(
+        self,
+        salesforce: "Salesforce",
+        soql_query: str,
+        context: ExecutionContext,
+        include_deleted: bool = False,
+    ) -> Entities:
+        """Execute the query as Bulk API 2.0 query job"""
+        query = BulkQuery(salesforce, soql_query, include_deleted=include_deleted)
+        with self.metrics.phase("bulk job"):
+            locator = self.resume_job(query)
+            if not locator:
+                query.submit()
+                query.wait()
+        on_chunk: Callable[[str], None] | None = None
+        if self.checkpoint is not None:
+            checkpoint, job_id = self.checkpoint, str(query.job_id)
+            checkpoint.save(job_id=job_id, locator=locator)
+            on_chunk = partial(checkpoint.save_locator, job_id)
+        rows: Iterator[list[str]] = self.metrics.iter_phase(
+            query.iter_rows(locator, on_chunk), "download"
+        )
+        header = next(rows, [])
+        projector = Projector(header, get_object_name(soql_query))
+        self.log.info(f"Bulk query job {query.job_id} finished, streaming results.")
         if self.dataset:
-            write_to_dataset(self.dataset, io.StringIO(json.dumps(result, indent=2)))
+            rows = self.get_dataset_writer(context).tee_rows(header, rows)
+        entities = self.metrics.iter_phase(projector.project_row(rows), "convert")
+        return Entities(entities=entities, schema=projector.schema)
+
+    def resume_job(self, query: BulkQuery) -> str:
+        """Continue the query job of the checkpoint and get its result locator
+
+        Returns an empty locator, if there is no job to continue (or it is not available
+        anymore).
+        """
+        from simple_salesforce.exceptions import SalesforceError  # noqa: PLC0415
+
+        progress = self.checkpoint.progress if self.checkpoint is not None else {}
+        if not progress.get("job_id"):
+            return ""
+        query.job_id = progress["job_id"]
+        try:
+            query.wait()
+        except SalesforceError as error:
+            self.log.warning(f"Bulk query job can not be resumed, starting over: {error}")
+            query.job_id = None
+            return ""
+        self.log.info(f"Resume bulk query job {query.job_id} at locator {progress['locator']}")
+        return str(progress["locator"])
+
+    def query_pages(
+        self, salesforce: "Salesforce", soql_query: str, include_deleted: bool = False
+    ) -> Generator[dict]:
+        """Query the result pages, or read them from the result cache (if configured)
+
+        On a cache miss, the pages are stored in the cache while they are consumed.
+        """
+        from simple_salesforce.exceptions import SalesforceError  # noqa: PLC0415
 
-        return Entities(entities=entities, schema=schema)
+        pages = self.metrics.iter_phase(
+            self.iter_pages(salesforce, soql_query, include_deleted), "query"
+        )
+        if not self.cache_ttl:
+            return pages
+        cache = get_result_cache(self.cache_ttl)
+        key = cache.get_key(salesforce.sf_instance, self.username, include_deleted, soql_query)
+        try:
+            with self.metrics.phase("cache probe"):
+                current = probe(salesforce, soql_query, include_deleted)
+        except SalesforceError as error:
+            self.log.warning(f"Query result can not be cached: {error}")
+            return pages
+        cached = cache.get(key, current)
+        if cached is not None:
+            self.log.info(f"Serving {current.count} records from the result cache.")
+            return self.metrics.iter_phase(cached, "cache")
+        return cache.put(key, current, pages)
+
+    def iter_pages(
+        self, salesforce: "Salesforce", soql_query: str, include_deleted: bool = False
+    ) -> Iterator[dict]:
+        """Query the result pages, from the cursor of the checkpoint on (if there is one)"""
+        from simple_salesforce.exceptions import SalesforceError  # noqa: PLC0415
+
+        progress = self.checkpoint.progress if self.checkpoint is not None else {}
+        url = progress.get("next_records_url")
+        if url:
+            try:
+                page = salesforce.query_more(url, identifier_is_url=True)
+            except SalesforceError as error:
+                self.log.warning(f"Query cursor can not be resumed, starting over: {error}")
+                progress.clear()
+            else:
+                self.log.info(f"Resume query after {progress.get('records', 0)} records")
+                return iter_more_pages(salesforce, page)
+        return iter_query_pages(salesforce, soql_query, include_deleted)
+
+    def execute_parallel(
+        self,
+        salesforce: "Salesforce",
+        soql_query: str,
+        context: ExecutionContext,
+        include_deleted: bool = False,
+    ) -> Entities:
+        """Execute the query in Id chunks on a pool of workers"""
+        query = ChunkedQuery(
+            salesforce,
+            soql_query,
+            chunks=self.chunks,
+            workers=self.workers,
+            ordered=self.ordered,
+            include_deleted=include_deleted,
+        )
+        with self.metrics.phase("query"):
+            queries = query.get_queries()
+        self.log.info(f"Fetching {len(queries)} chunks with {query.workers} workers.")
+        chunk_pages = self.metrics.iter_phase(query.iter_pages(queries), "query")
+        pages = self.download_pages(
+            salesforce, report_chunks(chunk_pages, len(queries), context), context
+        )
+        first_page = next((page for page in pages if page["records"]), None)
+        records = first_page["records"] if first_page else []
+        projector = get_projector(records, soql_query)
+        if first_page is not None:
+            pages = self.tee_pages(chain([first_page], pages), context)
+        entities = self.metrics.iter_phase(iter_entities([], pages, projector), "convert")
+        return Entities(entities=entities, schema=projector.schema)
+
+    def execute_queries(self, salesforce: "Salesforce", context: ExecutionContext) -> Entities:
+        """Execute several queries concurrently and emit their records as one stream"""
+        query = MultiQuery(salesforce, self.queries, workers=self.workers)
+        with self.metrics.phase("query"):
+            first_pages = query.get_first_pages()
+        projector = TaggedProjector(
+            get_labels(self.queries),
+            [
+                get_projector(page["records"], soql_query)
+                for page, soql_query in zip(first_pages, self.queries, strict=True)
+            ],
+        )
+        self.log.info(f"Executing {len(self.queries)} queries with {query.workers} workers.")
+        pages = self.tee_pages(
+            self.metrics.iter_phase(query.iter_pages(first_pages), "query"), context
+        )
+        entities = (
+            entity
+            for page in pages
+            for entity in projector.project(page[QUERY_INDEX], page["records"])
+        )
+        return Entities(
+            entities=self.metrics.iter_phase(entities, "convert"), schema=projector.schema
+        )
+
+    def download_pages(
+        self, salesforce: "Salesforce", pages: Iterator[dict], context: ExecutionContext
+    ) -> Iterator[dict]:
+        """Download the binaries of the pages (if configured) while passing them"""
+        if not self.download_binaries:
+            return pages
+        downloader = BinaryDownloader(
+            salesforce,
+            context.task.project_id(),
+            user=context.user,
+            prefix=self.binary_resource_prefix,
+            workers=self.workers,
+        )
+        self.log.info(f"Downloading binaries with {downloader.workers} workers.")
+        return self.metrics.iter_phase(downloader.iter_pages(pages), "binaries")
+
+    def get_dataset_writer(self, context: ExecutionContext) -> DatasetWriter:
+        """Get a writer which uploads the records to the configured dataset"""
+        self.log.info(f"Writing records to dataset {self.dataset} ({self.dataset_format}).")
+        return DatasetWriter(self.dataset, context.user, self.dataset_format)
+
+    def tee_pages(self, pages: Iterator[dict], context: ExecutionContext) -> Iterator[dict]:
+        """Upload the records of the pages to the dataset (if configured) while passing them"""
+        if not self.dataset:
+            return pages
+        return self.get_dataset_writer(context).tee_pages(pages)
+
+    def report_metrics(
+        self, entities: Iterator[Entity], context: ExecutionContext
+    ) -> Iterator[Entity]:
+        """Pass the entities through and report the metrics after the last one"""
+        count = 0
+        for entity in entities:
+            count += 1
+            yield entity
+        summary = [*self.plan_summary, *self.metrics.get_summary()]
+        self.log.info(f"Read {count} records: {dict(summary)}")
+        context.report.update(
+            ExecutionReport(
+                entity_count=count,
+                operation="read",
+                summary=summary,
+                warnings=self.plan_warnings,
+            )
+        )
+        export_metrics(
+            {
+                "plugin": "SoqlQuery",
+                "task": get_task_key(context),
+                "engine": self.engine,
+                "entities": count,
+                **self.metrics.to_dict(),
+            }
+        )
@@ -0,0 +1,138 @@
+"""Test configuration (stand-in server, benchmark options and result summary)"""
+
+from collections import Counter
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+
+import pytest
+
+from cmem_plugin_salesforce.helper import metadata, session
+from cmem_plugin_salesforce.helper.metadata import DescribeCache
+from cmem_plugin_salesforce.helper.metrics import format_bytes
+from tests.mock_server import MockServer
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurement of a benchmark run"""
+
+    name: str
+    records: int
+    seconds: float
+    calls: Counter[str]
+    transferred: int
+
+    @property
+    def rate(self) -> float:
+        """Get the throughput in records per second"""
+        return self.records / self.seconds if self.seconds else 0.0
+
+
+BENCHMARK_RESULTS = pytest.StashKey[list[BenchmarkResult]]()
+RecordBenchmark = Callable[[str, int, float, Counter[str], int], None]
+StartServer = Callable[..., MockServer]
+"""Start a stand-in server with the options of `MockServer` (records, page size, ...)"""
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the benchmark options"""
+    group = parser.getgroup("benchmark", "offline benchmarks with the local stand-in server")
+    group.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="Run the benchmarks with large record volumes (marked with 'benchmark').",
+    )
+    group.addoption(
+        "--benchmark-latency",
+        type=float,
+        default=0.0,
+        help="Latency of each request to the stand-in server in seconds (default: 0).",
+    )
+    group.addoption(
+        "--benchmark-bandwidth",
+        type=float,
+        default=0.0,
+        help="Bandwidth of the stand-in server in bytes per second (default: 0, unlimited).",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Register the benchmark marker"""
+    config.addinivalue_line("markers", "benchmark: benchmark with a large record volume")
+    config.stash[BENCHMARK_RESULTS] = []
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    """Skip the benchmarks, unless requested"""
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks need the --benchmark option")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def start_server(monkeypatch: pytest.MonkeyPatch) -> Iterator[StartServer]:
+    """Provide a function which starts a stand-in server used by the plugins
+
+    The session pool and the describe cache are replaced, so no sessions or object
+    metadata are shared between tests. The servers are stopped after the test.
+    """
+    servers: list[MockServer] = []
+
+    def start(**options: object) -> MockServer:
+        server = MockServer(**options)  # type: ignore[arg-type]
+        servers.append(server.__enter__())
+        monkeypatch.setattr(session, "SESSION_POOL", server.pool())
+        monkeypatch.setattr(metadata, "DESCRIBE_CACHE", DescribeCache())
+        return server
+
+    yield start
+    for server in servers:
+        server.__exit__()
+
+
+@pytest.fixture
+def benchmark_latency(request: pytest.FixtureRequest) -> float:
+    """Get the configured latency of the stand-in server"""
+    return float(request.config.getoption("--benchmark-latency"))
+
+
+@pytest.fixture
+def benchmark_bandwidth(request: pytest.FixtureRequest) -> float:
+    """Get the configured bandwidth of the stand-in server"""
+    return float(request.config.getoption("--benchmark-bandwidth"))
+
+
+@pytest.fixture
+def record_benchmark(request: pytest.FixtureRequest) -> RecordBenchmark:
+    """Get a function which records a benchmark result for the summary"""
+
+    def record(
+        name: str, records: int, seconds: float, calls: Counter[str], transferred: int
+    ) -> None:
+        result = BenchmarkResult(name, records, seconds, Counter(calls), transferred)
+        request.config.stash[BENCHMARK_RESULTS].append(result)
+
+    return record
+
+
+def pytest_terminal_summary(terminalreporter: pytest.TerminalReporter) -> None:
+    """Show the results of the benchmarks (throughput, transferred bytes and API calls)"""
+    results = terminalreporter.config.stash.get(BENCHMARK_RESULTS, [])
+    if not results:
+        return
+    terminalreporter.section("benchmark results")
+    terminalreporter.line(
+        f"{'benchmark':<40} {'records':>10} {'seconds':>9} {'records/s':>11} {'transfer':>10}"
+        "  api calls"
+    )
+    for result in results:
+        calls = ", ".join(f"{name}={count}" for name, count in sorted(result.calls.items()))
+        terminalreporter.line(
+            f"{result.name:<40} {result.records:>10} {result.seconds:>9.2f} "
+            f"{result.rate:>11,.0f} {format_bytes(result.transferred):>10}  {calls}"
+        )
+    terminalreporter.line("Peak memory per benchmark is reported with the --memray option.")
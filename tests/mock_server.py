@@ -0,0 +1,746 @@
+"""Local stand-in for the Salesforce APIs used by the plugins"""
+
+import csv
+import gzip
+import io
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from datetime import UTC, datetime, timedelta
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, overload
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+import requests
+from simple_salesforce import Salesforce
+
+from cmem_plugin_salesforce.helper.session import SessionPool
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+INSTANCE = "test.my.salesforce.com"
+API = r"/services/data/v[0-9.]+"
+ASYNC_API = r"/services/async/[0-9.]+"
+SELECT = re.compile(r"SELECT\s+(?P<fields>.+?)\s+FROM\s+(?P<object>\w+)", re.IGNORECASE)
+ID_CONDITION = re.compile(r"Id\s*(?P<operator>>=|<)\s*'(?P<value>\w+)'")
+ORDER_BY_ID = re.compile(r"ORDER BY Id (?P<direction>ASC|DESC)", re.IGNORECASE)
+TIMESTAMP_CONDITION = re.compile(
+    r"(?P<field>SystemModstamp|LastModifiedDate)\s*(?P<operator>>|<=)\s*(?P<value>[\dT:Z-]+)"
+)
+PROBE = re.compile(
+    r"SELECT COUNT\(Id\) (?P<count>\w+), MAX\((?P<field>\w+)\) (?P<max>\w+) FROM", re.IGNORECASE
+)
+COUNT = re.compile(r"SELECT COUNT\(\) FROM", re.IGNORECASE)
+LIMIT = re.compile(r"LIMIT (?P<limit>\d+)", re.IGNORECASE)
+LOGIN_FIELD = re.compile(r"<n1:(?P<name>username|password)>(?P<value>.*?)</n1:\1>", re.DOTALL)
+LOGIN_RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">
+<soapenv:Body><loginResponse><result>
+<serverUrl>https://{instance}/services/Soap/u/59.0/00D000000000001</serverUrl>
+<sessionId>{session_id}</sessionId>
+</result></loginResponse></soapenv:Body></soapenv:Envelope>"""
+LOGIN_FAULT = """<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"
+ xmlns:sf="urn:fault.partner.soap.sforce.com"><soapenv:Body><soapenv:Fault>
+<faultcode>INVALID_LOGIN</faultcode><detail><sf:LoginFault>
+<sf:exceptionCode>INVALID_LOGIN</sf:exceptionCode>
+<sf:exceptionMessage>Invalid username, password, security token.</sf:exceptionMessage>
+</sf:LoginFault></detail></soapenv:Fault></soapenv:Body></soapenv:Envelope>"""
+
+
+class LocalSession(requests.Session):
+    """Requests session which sends all requests to the local server"""
+
+    def __init__(self, netloc: str) -> None:
+        super().__init__()
+        self.netloc = netloc
+
+    def request(self, method: str | bytes, url: str | bytes, *args, **kwargs) -> requests.Response:  # type: ignore[no-untyped-def, override]  # noqa: ANN002, ANN003
+        """Rewrite the URL to the local server and send the request"""
+        parts = urlsplit(str(url))
+        local_url = urlunsplit(("http", self.netloc, parts.path, parts.query, parts.fragment))
+        return super().request(method, local_url, *args, **kwargs)
+
+
+class GeneratedRecords(Sequence[dict[str, Any]]):
+    """Large record volumes, which are created on access instead of being stored
+
+    Generated records are never deleted, all have the same fields and are in Id order.
+    """
+
+    fields = ("Id", "FirstName", "LastName", "Email", "Company", "SystemModstamp")
+    start = datetime(2026, 1, 1, tzinfo=UTC)
+
+    def __init__(self, size: int, prefix: str = "00Q") -> None:
+        self.size = size
+        self.prefix = prefix
+
+    def __len__(self) -> int:
+        """Get the number of records"""
+        return self.size
+
+    @overload
+    def __getitem__(self, index: int) -> dict[str, Any]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[dict[str, Any]]: ...
+
+    def __getitem__(self, index: int | slice) -> dict[str, Any] | list[dict[str, Any]]:
+        """Get a record or a list of records"""
+        if isinstance(index, slice):
+            return [self.create(_) for _ in range(*index.indices(self.size))]
+        if not -self.size <= index < self.size:
+            raise IndexError(index)
+        return self.create(index % self.size)
+
+    def create(self, index: int) -> dict[str, Any]:
+        """Create the record at an index"""
+        modified = self.start + timedelta(seconds=index)
+        return {
+            "Id": f"{self.prefix}{index + 1:012d}",
+            "FirstName": f"Jane {index}",
+            "LastName": f"Doe {index}",
+            "Email": f"jane.doe.{index}@example.org",
+            "Company": f"Company {index % 1000}",
+            "SystemModstamp": modified.strftime("%Y-%m-%dT%H:%M:%S.000+0000"),
+        }
+
+
+def nest(record: dict[str, Any], fields: list[str], object_name: str) -> dict[str, Any]:
+    """Create a REST API style record (relationship fields are nested objects)"""
+    result: dict[str, Any] = {"attributes": {"type": object_name}}
+    for field in fields:
+        target = result
+        *relations, name = field.split(".")
+        for relation in relations:
+            target = target.setdefault(relation, {"attributes": {"type": relation}})
+        target[name] = record.get(field)
+    return result
+
+
+class MockServer:
+    """Salesforce REST, Bulk API and Bulk API 2.0 stand-in running in a background thread
+
+    Records are given per object as flat dicts (relationship fields use dotted keys).
+    Every handled request is counted in `calls` by its endpoint name (and reported as
+    API usage in the `Sforce-Limit-Info` header, on top of `api_used`). Error
+    responses (e.g. throttling) can be queued for the next requests with `fail`.
+    Logins are accepted for all users in `users` (username: password and token) or
+    for any non-empty username, if no users are given.
+
+    Fields are described as text, unless another type is given in `field_types`.
+
+    Responses are gzip compressed if the client accepts it, compressed request bodies
+    are decoded (and counted by encoding in `encodings`).
+
+    For benchmarks, records can be `GeneratedRecords`, every request can be delayed by
+    `latency` seconds, the transfer of request and response bodies can be limited to a
+    `bandwidth` in bytes per second and upserts can be answered without storing the
+    records (`persist=False`), so that the memory of the server does not grow with the
+    volume.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        records: Mapping[str, Sequence[dict[str, Any]]] | None = None,
+        page_size: int = 2000,
+        users: dict[str, str] | None = None,
+        latency: float = 0.0,
+        persist: bool = True,
+        bandwidth: float = 0.0,
+    ) -> None:
+        self.records: dict[str, Sequence[dict[str, Any]]] = dict(records or {})
+        self.page_size = page_size
+        self.users = users
+        self.latency = latency
+        self.persist = persist
+        self.bandwidth = bandwidth
+        self.encodings: Counter[str] = Counter()
+        self.created = 0
+        self.api_used = 0
+        self.api_max = 15000
+        self.errors: list[tuple[int, dict[str, str], Any]] = []
+        self.locked: Counter[str] = Counter()
+        self.blobs: dict[str, bytes] = {}
+        self.field_types: dict[str, str] = {}
+        self.session_ids = {"SESSION"}
+        self.metadata_modified = time.time()
+        self.calls: Counter[str] = Counter()
+        self.cursors: dict[str, tuple[list[str], Sequence[dict[str, Any]], str]] = {}
+        self.jobs: dict[str, dict[str, Any]] = {}
+        self.batches: dict[str, list[dict[str, Any]]] = {}
+        self.routes: list[tuple[str, re.Pattern, Callable]] = [
+            ("POST", re.compile(r"/services/Soap/u/[0-9.]+"), self.login),
+            (
+                "GET",
+                re.compile(rf"{API}/query/(?P<cursor>[\w-]+)-(?P<offset>\d+)"),
+                self.query_more,
+            ),
+            ("GET", re.compile(rf"{API}/?"), self.resources),
+            ("GET", re.compile(rf"{API}/(?P<resource>query|queryAll)/?"), self.query),
+            ("GET", re.compile(rf"{API}/sobjects/(?P<name>\w+)/deleted/?"), self.get_deleted),
+            ("GET", re.compile(rf"{API}/sobjects/(?P<name>\w+)/describe/?"), self.describe),
+            (
+                "GET",
+                re.compile(rf"{API}/sobjects/(?P<name>\w+)/(?P<id>\w+)/(?P<field>\w+)"),
+                self.get_blob,
+            ),
+            ("POST", re.compile(rf"{API}/composite/batch"), self.composite_batch),
+            (
+                "PATCH",
+                re.compile(rf"{API}/composite/sobjects/(?P<name>\w+)/(?P<key>\w+)"),
+                self.upsert_collection,
+            ),
+            ("POST", re.compile(rf"{API}/jobs/query"), self.create_query_job),
+            ("GET", re.compile(rf"{API}/jobs/query/(?P<job>\w+)/results"), self.query_results),
+            ("GET", re.compile(rf"{API}/jobs/query/(?P<job>\w+)"), self.get_query_job),
+            ("POST", re.compile(rf"{API}/jobs/ingest"), self.create_ingest_job),
+            ("PUT", re.compile(rf"{API}/jobs/ingest/(?P<job>\w+)/batches"), self.upload_job_data),
+            (
+                "GET",
+                re.compile(rf"{API}/jobs/ingest/(?P<job>\w+)/(?P<result_type>\w+)/"),
+                self.ingest_results,
+            ),
+            ("PATCH", re.compile(rf"{API}/jobs/ingest/(?P<job>\w+)"), self.close_ingest_job),
+            ("GET", re.compile(rf"{API}/jobs/ingest/(?P<job>\w+)"), self.get_ingest_job),
+            ("POST", re.compile(rf"{ASYNC_API}/job"), self.create_job),
+            ("POST", re.compile(rf"{ASYNC_API}/job/(?P<job>\w+)/batch"), self.add_batch),
+            (
+                "GET",
+                re.compile(rf"{ASYNC_API}/job/(?P<job>\w+)/batch/(?P<batch>\w+)/result"),
+                self.get_batch_result,
+            ),
+            (
+                "GET",
+                re.compile(rf"{ASYNC_API}/job/(?P<job>\w+)/batch/(?P<batch>\w+)"),
+                self.get_batch,
+            ),
+            ("POST", re.compile(rf"{ASYNC_API}/job/(?P<job>\w+)"), self.close_job),
+        ]
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "MockServer":
+        """Start the server"""
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Stop the server"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @property
+    def netloc(self) -> str:
+        """Get host and port of the server"""
+        host, port = self.httpd.server_address[:2]
+        return f"{host!s}:{port}"
+
+    def session(self) -> LocalSession:
+        """Get a requests session connected to this server"""
+        return LocalSession(self.netloc)
+
+    def pool(self) -> SessionPool:
+        """Get a session pool connected to this server"""
+        return SessionPool(session_factory=self.session)
+
+    def fail(
+        self,
+        status: int,
+        payload: list | dict,
+        count: int = 1,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        """Answer the next API requests with an error response"""
+        self.errors.extend([(status, dict(headers or {}), payload)] * count)
+
+    def expire_sessions(self) -> None:
+        """Invalidate all issued sessions"""
+        self.session_ids.clear()
+
+    def salesforce(self) -> Salesforce:
+        """Get a salesforce connection to this server"""
+        return Salesforce(session_id="SESSION", instance=INSTANCE, session=self.session())
+
+    def handler(self) -> type[BaseHTTPRequestHandler]:
+        """Create the request handler class bound to this server"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: object) -> None:
+                """Be quiet"""
+
+            def do_GET(self) -> None:
+                server.dispatch(self, "GET")
+
+            def do_POST(self) -> None:
+                server.dispatch(self, "POST")
+
+            def do_PUT(self) -> None:
+                server.dispatch(self, "PUT")
+
+            def do_PATCH(self) -> None:
+                server.dispatch(self, "PATCH")
+
+            def do_DELETE(self) -> None:
+                server.dispatch(self, "DELETE")
+
+        return Handler
+
+    def dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        """Handle a request and send the response"""
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        self.transfer(len(body))
+        encoding = handler.headers.get("Content-Encoding", "identity")
+        self.encodings[encoding] += 1
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        if self.latency:
+            time.sleep(self.latency)
+        status, headers, payload = self.route(handler, method, body)
+        if isinstance(payload, bytes):
+            content = payload
+        else:
+            content = json.dumps(payload).encode()
+            headers.setdefault("Content-Type", "application/json")
+        if content and "gzip" in handler.headers.get("Accept-Encoding", ""):
+            content = gzip.compress(content, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        self.transfer(len(content))
+        usage = f"api-usage={self.api_used + self.calls.total()}/{self.api_max}"
+        headers.setdefault("Sforce-Limit-Info", usage)
+        handler.send_response(status)
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
+
+    def transfer(self, size: int) -> None:
+        """Simulate the transfer time of a body at the configured bandwidth"""
+        if self.bandwidth and size:
+            time.sleep(size / self.bandwidth)
+
+    def route(
+        self, handler: BaseHTTPRequestHandler, method: str, body: bytes
+    ) -> tuple[int, dict[str, str], Any]:
+        """Route a request to the matching endpoint"""
+        url = urlsplit(handler.path)
+        params = {key: value[0] for key, value in parse_qs(url.query).items()}
+        for route_method, pattern, endpoint in self.routes:
+            match = pattern.fullmatch(url.path)
+            if route_method != method or not match:
+                continue
+            self.calls[endpoint.__name__] += 1
+            session_id = handler.headers.get("X-SFDC-Session") or handler.headers.get(
+                "Authorization", ""
+            ).removeprefix("Bearer ")
+            if endpoint != self.login and session_id not in self.session_ids:
+                error = {"errorCode": "INVALID_SESSION_ID", "message": "Session expired"}
+                return HTTPStatus.UNAUTHORIZED, {}, [error]
+            if endpoint != self.login and self.errors:
+                return self.errors.pop(0)
+            return endpoint(  # type: ignore[no-any-return]
+                params=params, body=body, headers=handler.headers, **match.groupdict()
+            )
+        return HTTPStatus.NOT_FOUND, {}, [{"errorCode": "NOT_FOUND"}]
+
+    def login(self, body: bytes, **_: Any) -> tuple[int, dict, bytes]:  # noqa: ANN401
+        """Handle a SOAP login request"""
+        fields = {_["name"]: _["value"] for _ in LOGIN_FIELD.finditer(body.decode())}
+        username, password = fields.get("username", ""), fields.get("password", "")
+        valid = username if self.users is None else self.users.get(username) == password
+        if not valid:
+            return (
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+                {"Content-Type": "text/xml"},
+                LOGIN_FAULT.encode(),
+            )
+        session_id = f"SESSION-{uuid.uuid4().hex}"
+        self.session_ids.add(session_id)
+        payload = LOGIN_RESPONSE.format(instance=INSTANCE, session_id=session_id)
+        return HTTPStatus.OK, {"Content-Type": "text/xml"}, payload.encode()
+
+    def describe(self, name: str, headers: Any, **_: Any) -> tuple[int, dict, Any]:  # noqa: ANN401
+        """Describe an object (with support for conditional requests)"""
+        since = headers.get("If-Modified-Since")
+        if since and parsedate_to_datetime(since).timestamp() >= int(self.metadata_modified):
+            return HTTPStatus.NOT_MODIFIED, {}, b""
+        names = {"Id"}
+        records = self.records.get(name, [])
+        if isinstance(records, GeneratedRecords):
+            names.update(records.fields)
+        else:
+            for record in records:
+                names.update(field for field in record if "." not in field)
+        fields = [
+            {
+                "name": field,
+                "type": "id" if field == "Id" else self.field_types.get(field, "string"),
+                "length": 18 if field == "Id" else 255,
+                "updateable": field != "Id",
+                "createable": field != "Id",
+                "nillable": field != "Id",
+            }
+            for field in sorted(names)
+        ]
+        headers = {"Last-Modified": formatdate(self.metadata_modified, usegmt=True)}
+        return HTTPStatus.OK, headers, {"name": name, "fields": fields}
+
+    def get_blob(self, id: str, **_: Any) -> tuple[int, dict, bytes]:  # noqa: A002, ANN401
+        """Get the content of a binary field (the binaries are given per record Id)"""
+        if id not in self.blobs:
+            return HTTPStatus.NOT_FOUND, {}, b""
+        return HTTPStatus.OK, {"Content-Type": "application/octet-stream"}, self.blobs[id]
+
+    def resources(self, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """List the resources of the REST API (the response has a Date header)"""
+        return HTTPStatus.OK, {}, {"query": "/services/data/v59.0/query"}
+
+    def get_deleted(self, name: str, params: dict[str, str], **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Get the records deleted in a time window (deletion time is the SystemModstamp)"""
+        start, end = datetime.fromisoformat(params["start"]), datetime.fromisoformat(params["end"])
+        deleted = [
+            {"id": record["Id"], "deletedDate": record["SystemModstamp"]}
+            for record in self.records.get(name, [])
+            if record.get("IsDeleted")
+            and start <= datetime.fromisoformat(record["SystemModstamp"]) <= end
+        ]
+        return HTTPStatus.OK, {}, {"deletedRecords": deleted}
+
+    def select(
+        self, soql_query: str, include_deleted: bool = False
+    ) -> tuple[list[str], Sequence[dict[str, Any]], str]:
+        """Get fields, records and object name of a (very simple) SOQL query
+
+        Supported are Id range and timestamp conditions, ordering by Id and a limit.
+        Records with `IsDeleted` set are only included on request. Generated records
+        are not copied, unless there are conditions.
+        """
+        match = SELECT.search(soql_query)
+        if not match:
+            raise ValueError(f"Unsupported query: {soql_query}")
+        fields = [field.strip() for field in match["fields"].split(",")]
+        records = self.records.get(match["object"], [])
+        if not include_deleted and not isinstance(records, GeneratedRecords):
+            records = [record for record in records if not record.get("IsDeleted")]
+        for condition in TIMESTAMP_CONDITION.finditer(soql_query):
+            field, bound = condition["field"], datetime.fromisoformat(condition["value"])
+            if condition["operator"] == ">":
+                records = [_ for _ in records if datetime.fromisoformat(_[field]) > bound]
+            else:
+                records = [_ for _ in records if datetime.fromisoformat(_[field]) <= bound]
+        for condition in ID_CONDITION.finditer(soql_query):
+            value = condition["value"]
+            if condition["operator"] == ">=":
+                records = [record for record in records if record["Id"][:15] >= value]
+            else:
+                records = [record for record in records if record["Id"][:15] < value]
+        order = ORDER_BY_ID.search(soql_query)
+        if order:
+            records = sorted(
+                records, key=lambda _: _["Id"], reverse=order["direction"].upper() == "DESC"
+            )
+        limit = LIMIT.search(soql_query)
+        if limit:
+            records = records[: int(limit["limit"])]
+        return fields, records, match["object"]
+
+    def page(self, cursor: str, offset: int) -> tuple[int, dict, dict]:
+        """Get a REST API query result page"""
+        fields, records, object_name = self.cursors[cursor]
+        end = offset + self.page_size
+        page: dict[str, Any] = {
+            "totalSize": len(records),
+            "done": end >= len(records),
+            "records": [nest(record, fields, object_name) for record in records[offset:end]],
+        }
+        if not page["done"]:
+            page["nextRecordsUrl"] = f"/services/data/v59.0/query/{cursor}-{end}"
+        return HTTPStatus.OK, {}, page
+
+    def query(self, params: dict[str, str], resource: str, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Start a REST API query (aggregate queries are only supported as cache probe)
+
+        Explain requests get a query plan, `COUNT()` queries the number of records.
+        """
+        if "explain" in params:
+            return HTTPStatus.OK, {}, self.explain(params["explain"])
+        if COUNT.match(params["q"]):
+            records = self.select(params["q"], include_deleted=resource == "queryAll")[1]
+            return HTTPStatus.OK, {}, {"totalSize": len(records), "done": True, "records": []}
+        probe = PROBE.match(params["q"])
+        if probe:
+            records = self.select(params["q"], include_deleted=resource == "queryAll")[1]
+            stamps = [record[probe["field"]] for record in records if record.get(probe["field"])]
+            aggregate = {probe["count"]: len(records), probe["max"]: max(stamps, default=None)}
+            return HTTPStatus.OK, {}, {"totalSize": 1, "done": True, "records": [aggregate]}
+        cursor = uuid.uuid4().hex
+        self.cursors[cursor] = self.select(params["q"], include_deleted=resource == "queryAll")
+        return self.page(cursor, 0)
+
+    def explain(self, soql_query: str) -> dict[str, Any]:
+        """Get the query plan of a query (conditions on Id or SystemModstamp are indexed)"""
+        _, records, object_name = self.select(soql_query)
+        indexed = ID_CONDITION.search(soql_query) or "SystemModstamp >" in soql_query
+        plan = {
+            "cardinality": len(records),
+            "fields": [],
+            "leadingOperationType": "Index" if indexed else "TableScan",
+            "notes": [],
+            "relativeCost": 0.1 if indexed else 2.0,
+            "sobjectCardinality": len(self.records.get(object_name, [])),
+            "sobjectType": object_name,
+        }
+        return {"plans": [plan], "sourceQuery": soql_query}
+
+    def composite_batch(self, body: bytes, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Execute the query subrequests of a Composite Batch request"""
+        results: list[dict[str, Any]] = []
+        for subrequest in json.loads(body)["batchRequests"]:
+            url = urlsplit(subrequest["url"])
+            params = {key: value[0] for key, value in parse_qs(url.query).items()}
+            resource = url.path.rstrip("/").rsplit("/", 1)[-1]
+            payload: Any
+            try:
+                status, _headers, payload = self.query(params=params, resource=resource)
+            except ValueError as error:
+                status = HTTPStatus.BAD_REQUEST
+                payload = [{"errorCode": "MALFORMED_QUERY", "message": str(error)}]
+            results.append({"statusCode": status, "result": payload})
+        has_errors = any(result["statusCode"] >= HTTPStatus.BAD_REQUEST for result in results)
+        return HTTPStatus.OK, {}, {"hasErrors": has_errors, "results": results}
+
+    def query_more(self, cursor: str, offset: str, **_: Any) -> tuple[int, dict, Any]:  # noqa: ANN401
+        """Get the next REST API query page (unknown cursors are expired)"""
+        if cursor not in self.cursors:
+            error = {"errorCode": "INVALID_QUERY_LOCATOR", "message": "invalid query locator"}
+            return HTTPStatus.BAD_REQUEST, {}, [error]
+        return self.page(cursor, int(offset))
+
+    def create_query_job(self, body: bytes, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Create a Bulk API 2.0 query job"""
+        job = json.loads(body)
+        job.update(id=uuid.uuid4().hex[:18], state="UploadComplete")
+        self.jobs[job["id"]] = job
+        return HTTPStatus.OK, {}, job
+
+    def get_query_job(self, job: str, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Get the Bulk API 2.0 query job info (completes on the second poll)"""
+        info = self.jobs[job]
+        info["state"] = "JobComplete" if info["state"] == "InProgress" else "InProgress"
+        return HTTPStatus.OK, {}, info
+
+    def query_results(
+        self,
+        job: str,
+        params: dict[str, str],
+        **_: Any,  # noqa: ANN401
+    ) -> tuple[int, dict, bytes]:
+        """Get a chunk of Bulk API 2.0 query job results as CSV"""
+        info = self.jobs[job]
+        fields, records, _object_name = self.select(
+            info["query"], include_deleted=info["operation"] == "queryAll"
+        )
+        offset = int(params.get("locator", "0"))
+        end = offset + int(params.get("maxRecords", "50000"))
+        chunk = records[offset:end]
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(fields)
+        writer.writerows([[record.get(field) or "" for field in fields] for record in chunk])
+        headers = {
+            "Content-Type": "text/csv",
+            "Sforce-Locator": str(end) if end < len(records) else "null",
+            "Sforce-NumberOfRecords": str(len(chunk)),
+        }
+        return HTTPStatus.OK, headers, output.getvalue().encode()
+
+    def create_job(self, body: bytes, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Create a Bulk API job"""
+        job = json.loads(body)
+        job.update(id=uuid.uuid4().hex[:18], state="Open")
+        self.jobs[job["id"]] = job
+        return HTTPStatus.CREATED, {}, job
+
+    def close_job(self, job: str, body: bytes, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Close a Bulk API job"""
+        self.jobs[job].update(json.loads(body))
+        return HTTPStatus.OK, {}, self.jobs[job]
+
+    def add_batch(self, job: str, body: bytes, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Add a batch to a Bulk API job (which is processed immediately)"""
+        info = self.jobs[job]
+        batch = uuid.uuid4().hex[:18]
+        self.batches[batch] = [self.write(info, record) for record in json.loads(body)]
+        return HTTPStatus.CREATED, {}, {"id": batch, "jobId": job, "state": "Queued"}
+
+    def get_batch(self, job: str, batch: str, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Get the state of a batch"""
+        return HTTPStatus.OK, {}, {"id": batch, "jobId": job, "state": "Completed"}
+
+    def get_batch_result(self, batch: str, **_: Any) -> tuple[int, dict, list]:  # noqa: ANN401
+        """Get the results of a batch (only kept until read, if records are not stored)"""
+        if not self.persist:
+            return HTTPStatus.OK, {}, self.batches.pop(batch)
+        return HTTPStatus.OK, {}, self.batches[batch]
+
+    def write(self, job: dict[str, Any], record: dict[str, Any]) -> dict[str, Any]:
+        """Write a record with the operation of a bulk job"""
+        if job["operation"] in ("delete", "hardDelete"):
+            return self.delete(job["object"], record, hard=job["operation"] == "hardDelete")
+        return self.upsert(job["object"], record, job.get("externalIdFieldName", "Id"))
+
+    def get_lock_error(self, record: dict[str, Any]) -> dict[str, Any] | None:
+        """Get the result of a record with a locked value (fails once per lock)"""
+        locked = next((value for value in record.values() if self.locked[value] > 0), None)
+        if locked is None:
+            return None
+        self.locked[locked] -= 1
+        error = {
+            "statusCode": "UNABLE_TO_LOCK_ROW",
+            "message": "unable to obtain exclusive access to this record",
+            "fields": [],
+        }
+        return {"id": None, "success": False, "created": False, "errors": [error]}
+
+    def delete(self, object_name: str, record: dict[str, Any], hard: bool) -> dict[str, Any]:
+        """Delete a record (hard deletes skip the recycle bin)"""
+        locked = self.get_lock_error(record)
+        if locked is not None:
+            return locked
+        records = self.records.get(object_name, [])
+        if not isinstance(records, list):
+            raise TypeError(f"Records of {object_name} are read-only")
+        existing = next(
+            (_ for _ in records if _["Id"] == record["Id"] and not _.get("IsDeleted")), None
+        )
+        if existing is None:
+            error = {
+                "statusCode": "ENTITY_IS_DELETED",
+                "message": "entity is deleted",
+                "fields": [],
+            }
+            return {"id": record["Id"], "success": False, "created": False, "errors": [error]}
+        if hard:
+            records.remove(existing)
+        else:
+            existing["IsDeleted"] = True
+        return {"id": record["Id"], "success": True, "created": False, "errors": []}
+
+    def upsert(self, object_name: str, record: dict[str, Any], key: str) -> dict[str, Any]:
+        """Create or update a record identified by the key field
+
+        Records with a locked value fail with `UNABLE_TO_LOCK_ROW` (once per lock).
+        """
+        locked = self.get_lock_error(record)
+        if locked is not None:
+            return locked
+        if not self.persist:
+            self.created += 1
+            record_id = record.get("Id") or f"{object_name[:3].upper()}{self.created:012d}"
+            return {"id": record_id, "success": True, "created": not record.get("Id"), "errors": []}
+        records = self.records.setdefault(object_name, [])
+        if not isinstance(records, list):
+            raise TypeError(f"Records of {object_name} are read-only")
+        if record.get(key):
+            existing = next((_ for _ in records if _.get(key) == record[key]), None)
+            if existing is None and key == "Id":
+                error = {
+                    "statusCode": "INVALID_CROSS_REFERENCE_KEY",
+                    "message": f"invalid cross reference id: {record[key]}",
+                    "fields": [],
+                }
+                return {"id": None, "success": False, "created": False, "errors": [error]}
+            if existing is not None:
+                existing.update(record)
+                return {"id": existing["Id"], "success": True, "created": False, "errors": []}
+        record_id = f"{object_name[:3].upper()}{len(records) + 1:012d}"
+        records.append({**record, "Id": record_id})
+        return {"id": record_id, "success": True, "created": True, "errors": []}
+
+    def upsert_collection(
+        self,
+        name: str,
+        key: str,
+        body: bytes,
+        **_: Any,  # noqa: ANN401
+    ) -> tuple[int, dict, list]:
+        """Upsert the records of a sObject Collections request"""
+        records = json.loads(body)["records"]
+        results = [
+            self.upsert(name, {k: v for k, v in record.items() if k != "attributes"}, key)
+            for record in records
+        ]
+        return HTTPStatus.OK, {}, results
+
+    def create_ingest_job(self, body: bytes, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Create a Bulk API 2.0 ingest job"""
+        job = json.loads(body)
+        job.update(id=uuid.uuid4().hex[:18], state="Open", data=b"", results=[])
+        self.jobs[job["id"]] = job
+        return HTTPStatus.OK, {}, {k: v for k, v in job.items() if k not in ("data", "results")}
+
+    def upload_job_data(self, job: str, body: bytes, **_: Any) -> tuple[int, dict, bytes]:  # noqa: ANN401
+        """Upload the CSV data of an ingest job"""
+        self.jobs[job]["data"] += body
+        return HTTPStatus.CREATED, {}, b""
+
+    def close_ingest_job(self, job: str, body: bytes, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Complete the upload of an ingest job (which is processed immediately)"""
+        info = self.jobs[job]
+        info.update(json.loads(body))
+        rows = list(csv.DictReader(io.StringIO(info["data"].decode())))
+        info["results"] = [
+            (row, self.write(info, {key: value for key, value in row.items() if value}))
+            for row in rows
+        ]
+        info["data"] = b""
+        info["state"] = "InProgress"
+        return HTTPStatus.OK, {}, {"id": job, "state": "UploadComplete"}
+
+    def get_ingest_job(self, job: str, **_: Any) -> tuple[int, dict, dict]:  # noqa: ANN401
+        """Get the ingest job info (completes on the second poll)"""
+        info = self.jobs[job]
+        info["state"] = "JobComplete" if info["state"] == "InProgress" else "InProgress"
+        return HTTPStatus.OK, {}, {k: v for k, v in info.items() if k not in ("data", "results")}
+
+    def ingest_results(
+        self,
+        job: str,
+        result_type: str,
+        **_: Any,  # noqa: ANN401
+    ) -> tuple[int, dict, bytes]:
+        """Get the successful, failed or unprocessed records of an ingest job as CSV"""
+        results = self.jobs[job]["results"]
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        fields = list(results[0][0]) if results else []
+        if result_type == "successfulResults":
+            writer.writerow(["sf__Id", "sf__Created", *fields])
+            for row, result in results:
+                if result["success"]:
+                    created = str(result["created"]).lower()
+                    writer.writerow([result["id"], created, *row.values()])
+        elif result_type == "failedResults":
+            writer.writerow(["sf__Id", "sf__Error", *fields])
+            for row, result in results:
+                if not result["success"]:
+                    error = result["errors"][0]
+                    message = f"{error['statusCode']}:{error['message']}"
+                    writer.writerow([result["id"] or "", message, *row.values()])
+        else:
+            writer.writerow(fields)
+        info = self.jobs[job]
+        if not self.persist and result_type == "failedResults" and info["state"] == "JobComplete":
+            # the failed results are read last, if the job is complete
+            info["results"] = []
+        return HTTPStatus.OK, {"Content-Type": "text/csv"}, output.getvalue().encode()
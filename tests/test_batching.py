@@ -0,0 +1,76 @@
+"""Test batching and pipelining of record streams"""
+
+import threading
+from collections.abc import Iterator
+
+from cmem_plugin_salesforce.helper.batching import (
+    ResultSummary,
+    get_record_size,
+    iter_batches,
+    iter_pipelined,
+)
+
+
+def test_batches_by_count() -> None:
+    """Test that batches are limited by the number of records"""
+    records = [{"Name": f"{index}"} for index in range(5)]
+    batches = list(iter_batches(records, max_records=2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [record for batch in batches for record in batch] == records
+
+
+def test_batches_by_size() -> None:
+    """Test that batches are limited by the payload size"""
+    records = [{"Name": "x" * 10} for _ in range(4)]
+    size = get_record_size(records[0])
+    assert [len(batch) for batch in iter_batches(records, max_bytes=2 * size)] == [2, 2]
+    assert [len(batch) for batch in iter_batches(records, max_bytes=1)] == [1, 1, 1, 1]
+    assert list(iter_batches([])) == []
+
+
+def test_batches_are_built_lazily() -> None:
+    """Test that records are only read as far as needed for the next batch"""
+    consumed = []
+
+    def records() -> Iterator[dict[str, str]]:
+        for index in range(10):
+            consumed.append(index)
+            yield {"Name": f"{index}"}
+
+    batches = iter_batches(records(), max_records=3)
+    next(batches)
+    assert consumed == [0, 1, 2, 3]
+
+
+def test_pipeline_overlaps() -> None:
+    """Test that the next item is produced while the previous one is processed"""
+    processing = threading.Event()
+    produced_while_processing = []
+
+    def items() -> Iterator[int]:
+        yield 1
+        processing.wait(timeout=5)
+        produced_while_processing.append(processing.is_set())
+        yield 2
+
+    def function(item: int) -> int:
+        processing.set()
+        return item * 10
+
+    assert list(iter_pipelined(items(), function)) == [10, 20]
+    assert produced_while_processing == [True]
+
+
+def test_result_summary() -> None:
+    """Test the incremental result counts"""
+    summary = ResultSummary()
+    summary.add([{"success": True, "created": True, "errors": []}])
+    summary.add(
+        [
+            {"success": True, "created": False, "errors": []},
+            {"success": False, "created": False, "errors": ["LOCKED"]},
+        ]
+    )
+    assert (summary.created, summary.updated, summary.failed) == (1, 1, 1)
+    assert summary.total == 3  # noqa: PLR2004
+    assert summary.error_messages == {"LOCKED"}
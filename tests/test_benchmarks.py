@@ -0,0 +1,129 @@
+"""Offline benchmarks of the plugins with the local stand-in server
+
+Only the smallest volume runs by default (as smoke test). The larger volumes run with
+`pytest --benchmark tests/test_benchmarks.py`, add `--memray` for the peak memory,
+`--benchmark-latency=0.05` to simulate the latency of a remote org and
+`--benchmark-bandwidth=2000000` to simulate a WAN link of 2 MB/s. Each benchmark runs
+with and without gzip compression of the transport (`identity`), the transferred
+bytes show the bandwidth savings.
+"""
+
+import time
+from collections.abc import Callable, Iterator
+
+import pytest
+from cmem_plugin_base.dataintegration.entity import Entities, Entity, EntityPath, EntitySchema
+
+from cmem_plugin_salesforce.helper.compression import COMPRESSION_ENV
+from cmem_plugin_salesforce.workflow.operations import SobjectCreate
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import RecordBenchmark, StartServer
+from tests.mock_server import GeneratedRecords, MockServer
+from tests.utils import TestExecutionContext
+
+VOLUMES = [
+    1_000,
+    pytest.param(10_000, marks=pytest.mark.benchmark),
+    pytest.param(100_000, marks=pytest.mark.benchmark),
+    pytest.param(1_000_000, marks=pytest.mark.benchmark),
+]
+FIELDS = ["FirstName", "LastName", "Email", "Company"]
+QUERY = "SELECT Id, FirstName, LastName, Email, Company FROM Lead"
+MEMORY_LIMIT = "100 MB"
+"""Peak memory limit (with --memray), independent of the volume as results are streamed"""
+
+
+ENCODINGS = ["gzip", "identity"]
+
+
+@pytest.fixture
+def start_server(
+    start_server: StartServer, benchmark_latency: float, benchmark_bandwidth: float
+) -> Callable[[int], MockServer]:
+    """Provide a function which starts a stand-in server with a number of leads"""
+
+    def start(volume: int) -> MockServer:
+        return start_server(
+            records={"Lead": GeneratedRecords(volume)},
+            latency=benchmark_latency,
+            persist=False,
+            bandwidth=benchmark_bandwidth,
+        )
+
+    return start
+
+
+def get_entities(volume: int) -> Entities:
+    """Create lazy input entities for new leads"""
+    leads = GeneratedRecords(volume)
+
+    def entities() -> Iterator[Entity]:
+        for index in range(volume):
+            lead = leads.create(index)
+            yield Entity(uri=f"urn:lead:{index}", values=[[lead[field]] for field in FIELDS])
+
+    schema = EntitySchema(type_uri="", paths=[EntityPath(field) for field in FIELDS])
+    return Entities(entities=entities(), schema=schema)
+
+
+def get_transferred(plugin: SoqlQuery | SobjectCreate) -> int:
+    """Get the bytes sent and received by the last execution of a plugin"""
+    data = plugin.metrics.to_dict()
+    return int(data["bytes_sent"] + data["bytes_received"])
+
+
+@pytest.mark.limit_memory(MEMORY_LIMIT)
+@pytest.mark.parametrize("encoding", ENCODINGS)
+@pytest.mark.parametrize("engine", ["rest", "bulk"])
+@pytest.mark.parametrize("volume", VOLUMES)
+def test_query(  # noqa: PLR0913
+    monkeypatch: pytest.MonkeyPatch,
+    start_server: Callable[[int], MockServer],
+    record_benchmark: RecordBenchmark,
+    volume: int,
+    engine: str,
+    encoding: str,
+) -> None:
+    """Benchmark the query of all leads"""
+    monkeypatch.setenv(COMPRESSION_ENV, str(encoding == "gzip"))
+    server = start_server(volume)
+    plugin = SoqlQuery(
+        username="user", password="", security_token="", soql_query=QUERY, engine=engine
+    )
+    server.calls.clear()
+    start = time.perf_counter()
+    result = plugin.execute([], TestExecutionContext())
+    count = sum(1 for _ in result.entities)
+    seconds = time.perf_counter() - start
+    assert count == volume
+    name = f"SoqlQuery[{engine}-{volume}-{encoding}]"
+    record_benchmark(name, count, seconds, server.calls, get_transferred(plugin))
+
+
+@pytest.mark.limit_memory(MEMORY_LIMIT)
+@pytest.mark.parametrize("encoding", ENCODINGS)
+@pytest.mark.parametrize("engine", ["bulk", "bulk2"])
+@pytest.mark.parametrize("volume", VOLUMES)
+def test_upsert(  # noqa: PLR0913
+    monkeypatch: pytest.MonkeyPatch,
+    start_server: Callable[[int], MockServer],
+    record_benchmark: RecordBenchmark,
+    volume: int,
+    engine: str,
+    encoding: str,
+) -> None:
+    """Benchmark the creation of leads"""
+    monkeypatch.setenv(COMPRESSION_ENV, str(encoding == "gzip"))
+    server = start_server(0)
+    plugin = SobjectCreate(
+        username="user", password="", security_token="", salesforce_object="Lead", engine=engine
+    )
+    server.calls.clear()
+    context = TestExecutionContext()
+    start = time.perf_counter()
+    plugin.execute([get_entities(volume)], context)
+    seconds = time.perf_counter() - start
+    assert server.created == volume
+    assert context.report.reports[-1].entity_count == volume
+    name = f"SobjectCreate[{engine}-{volume}-{encoding}]"
+    record_benchmark(name, volume, seconds, server.calls, get_transferred(plugin))
@@ -0,0 +1,113 @@
+"""Test the parallel download of binary fields"""
+
+import hashlib
+import threading
+from typing import IO, Any
+
+import pytest
+
+from cmem_plugin_salesforce.helper import binary
+from cmem_plugin_salesforce.helper.binary import get_blob_fields, get_resource_name
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
+
+API = "/services/data/v59.0"
+BLOBS = {f"068{index:012d}": bytes([index]) * (index * 100_000) for index in range(1, 6)}
+VERSIONS = [
+    {
+        "Id": version_id,
+        "Title": f"Document {index}",
+        "FileExtension": "pdf",
+        "VersionData": f"{API}/sobjects/ContentVersion/{version_id}/VersionData",
+    }
+    for index, version_id in enumerate(BLOBS, start=1)
+]
+
+
+class Resources:
+    """Stand-in for the resource upload which reads the streams in small chunks"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.files: dict[tuple[str, str], bytes] = {}
+
+    def __call__(self, project_id: str, resource_name: str, file: IO, user: Any) -> None:  # noqa: ANN401, ARG002
+        """Read the stream (as the streamed PUT request does)"""
+        content = b""
+        while chunk := file.read(8192):
+            content += chunk
+        with self.lock:
+            self.files[(project_id, resource_name)] = content
+
+
+@pytest.fixture
+def resources(monkeypatch: pytest.MonkeyPatch) -> Resources:
+    """Replace the resource upload"""
+    stand_in = Resources()
+    monkeypatch.setattr(binary, "upload_resource", stand_in)
+    return stand_in
+
+
+@pytest.fixture
+def server(start_server: StartServer) -> MockServer:
+    """Provide a stand-in server with content versions (in pages of two)"""
+    records = {"ContentVersion": [dict(version) for version in VERSIONS]}
+    mock_server = start_server(records=records, page_size=2)
+    mock_server.blobs.update(BLOBS)
+    return mock_server
+
+
+def test_blob_fields() -> None:
+    """Test the detection of binary fields and the resource names"""
+    records: list[dict[str, Any]] = [
+        {"Id": "1", "Body": None},
+        {"Id": "2", "Body": f"{API}/sobjects/Note/2/Body"},
+    ]
+    assert get_blob_fields(records) == ["Body"]
+    assert get_blob_fields([{"Id": "1", "Name": "Body"}]) == []
+    url = VERSIONS[0]["VersionData"]
+    assert get_resource_name("sf-", url) == f"sf-ContentVersion-{VERSIONS[0]['Id']}-VersionData"
+    assert get_resource_name("", url, "pdf").endswith("-VersionData.pdf")
+    with pytest.raises(ValueError, match="Not a binary field URL"):
+        get_resource_name("", "https://example.org/")
+
+
+@pytest.mark.parametrize("engine", ["rest", "parallel"])
+def test_binaries_are_downloaded(server: MockServer, resources: Resources, engine: str) -> None:
+    """Test that all binaries are streamed to resources and described by the entities"""
+    plugin = SoqlQuery(
+        username="user",
+        password="",
+        security_token="",
+        soql_query="SELECT Id, Title, FileExtension, VersionData FROM ContentVersion",
+        engine=engine,
+        download_binaries=True,
+    )
+    output = plugin.execute([], TestExecutionContext())
+    paths = [path.path for path in output.schema.paths]
+    assert paths[-3:] == ["VersionDataSize", "VersionDataSha256", "VersionDataResource"]
+    rows = [dict(zip(paths, entity.values, strict=True)) for entity in output.entities]
+    assert len(rows) == len(VERSIONS)
+    assert server.calls["get_blob"] == len(BLOBS)
+    for row in rows:
+        content = BLOBS[row["Id"][0]]
+        name = f"salesforce-ContentVersion-{row['Id'][0]}-VersionData.pdf"
+        assert row["VersionDataSize"] == [str(len(content))]
+        assert row["VersionDataSha256"] == [hashlib.sha256(content).hexdigest()]
+        assert row["VersionDataResource"] == [name]
+        assert resources.files[("project", name)] == content
+
+
+def test_download_validation(server: MockServer) -> None:  # noqa: ARG001
+    """Test that binaries can not be downloaded with the Bulk API"""
+    with pytest.raises(ValueError, match="with the Bulk API"):
+        SoqlQuery(
+            username="user",
+            password="",
+            security_token="",
+            soql_query="SELECT Id, Body FROM Attachment",
+            engine="bulk",
+            download_binaries=True,
+        )
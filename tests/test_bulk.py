@@ -0,0 +1,94 @@
+"""Test the Bulk API 2.0 helpers against a local stand-in server"""
+
+import pytest
+
+from cmem_plugin_salesforce.helper.bulk import BulkQuery
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
+
+CONTACTS: list[dict[str, str | None]] = [
+    {"Id": f"003{index:015d}", "Name": f"Name {index}", "Email": f"c{index}@example.org"}
+    for index in range(5)
+]
+CONTACTS[1]["Name"] = 'Multi\nline, "quoted"'
+CONTACTS[2]["Email"] = None
+
+
+@pytest.fixture
+def server(start_server: StartServer) -> MockServer:
+    """Provide a stand-in server connected to the SOQL query plugin"""
+    return start_server(records={"Contact": CONTACTS}, page_size=2)
+
+
+def test_bulk_query_streams_chunks(server: MockServer) -> None:
+    """Test submitting, polling and streaming a query job"""
+    query = BulkQuery(
+        server.salesforce(), "SELECT Id, Name, Email FROM Contact", chunk_size=2, poll_interval=0
+    )
+    rows = list(query.execute())
+    assert rows[0] == ["Id", "Name", "Email"]
+    assert rows[1:] == [
+        [contact["Id"], contact["Name"], contact["Email"] or ""] for contact in CONTACTS
+    ]
+    assert server.calls["query_results"] == 3  # noqa: PLR2004
+    assert server.calls["get_query_job"] == 2  # noqa: PLR2004
+
+
+def test_bulk_engine(server: MockServer) -> None:
+    """Test the explicit selection of the Bulk API engine"""
+    plugin = SoqlQuery(
+        username="",
+        password="",
+        security_token="",
+        soql_query="SELECT Id, Email FROM Contact",
+        engine="bulk",
+    )
+    result = plugin.execute([], TestExecutionContext())
+    assert [path.path for path in result.schema.paths] == ["Id", "Email"]
+    values = [entity.values for entity in result.entities]
+    assert values[2] == [[CONTACTS[2]["Id"]], []]
+    assert len(values) == len(CONTACTS)
+    assert server.calls["query"] == 0
+
+
+@pytest.mark.parametrize(("threshold", "bulk_jobs"), [(3, 1), (10, 0)])
+def test_auto_engine(server: MockServer, threshold: int, bulk_jobs: int) -> None:
+    """Test the automatic engine selection based on the result size"""
+    plugin = SoqlQuery(
+        username="",
+        password="",
+        security_token="",
+        soql_query="SELECT Id FROM Contact",
+        bulk_threshold=threshold,
+    )
+    result = plugin.execute([], TestExecutionContext())
+    assert [entity.values[0][0] for entity in result.entities] == [_["Id"] for _ in CONTACTS]
+    assert server.calls["create_query_job"] == bulk_jobs
+
+
+def test_auto_engine_unsupported_query(server: MockServer) -> None:
+    """Test that queries which the Bulk API does not support stay with the REST API"""
+    plugin = SoqlQuery(
+        username="",
+        password="",
+        security_token="",
+        soql_query="SELECT Id FROM Contact GROUP BY Id",
+        bulk_threshold=3,
+    )
+    result = plugin.execute([], TestExecutionContext())
+    assert len(list(result.entities)) == len(CONTACTS)
+    assert server.calls["create_query_job"] == 0
+
+
+def test_unknown_engine(server: MockServer) -> None:  # noqa: ARG001
+    """Test validation of the engine parameter"""
+    with pytest.raises(ValueError, match="Unknown query engine"):
+        SoqlQuery(
+            username="",
+            password="",
+            security_token="",
+            soql_query="SELECT Id FROM Contact",
+            engine="x",
+        )
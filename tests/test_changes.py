@@ -0,0 +1,83 @@
+"""Test the change detection of write operations"""
+
+from pathlib import Path
+
+import pytest
+
+from cmem_plugin_salesforce.helper.changes import get_record_hash
+from cmem_plugin_salesforce.helper.state import STATE_DIR_ENV
+from cmem_plugin_salesforce.workflow.operations import SobjectCreate
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.test_sobjectcreate import get_entities
+from tests.utils import TestExecutionContext
+
+LEADS = [{"Id": f"00Q{index:012d}", "LastName": f"Doe {index}"} for index in range(1, 4)]
+
+
+@pytest.fixture
+def server(
+    start_server: StartServer, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> MockServer:
+    """Provide a stand-in server with some leads and a state directory"""
+    monkeypatch.setenv(STATE_DIR_ENV, str(tmp_path))
+    return start_server(records={"Lead": [dict(lead) for lead in LEADS]})
+
+
+def test_record_hash() -> None:
+    """Test that the hash ignores key fields, empty fields and the field order"""
+    record = {"Id": "00Q1", "LastName": "Doe", "Email": "doe@example.org"}
+    same = {"Email": "doe@example.org", "LastName": "Doe", "Phone": ""}
+    assert get_record_hash(record, "Id") == get_record_hash(same, "Id")
+    assert get_record_hash(record, "Id") != get_record_hash({**same, "LastName": "Roe"}, "Id")
+
+
+@pytest.mark.parametrize("engine", ["bulk", "bulk2", "collections"])
+def test_unchanged_records_are_skipped(server: MockServer, engine: str) -> None:
+    """Test that only changed records are written again"""
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        engine=engine,
+        skip_unchanged=True,
+    )
+    rows = [(LEADS[0]["Id"], "Updated"), (LEADS[1]["Id"], "Doe 2")]
+    plugin.execute([get_entities(rows)], TestExecutionContext())
+    calls = server.calls.total()
+
+    context = TestExecutionContext()
+    plugin.execute([get_entities(rows)], context)
+    final = context.report.reports[-1]
+    assert final.entity_count == 0
+    assert ("No. of unchanged entities skipped", "2") in final.summary
+    assert server.calls.total() == calls  # no writes (the description is cached)
+
+    rows[1] = (LEADS[1]["Id"], "Changed")
+    context = TestExecutionContext()
+    plugin.execute([get_entities(rows)], context)
+    final = context.report.reports[-1]
+    assert final.entity_count == 1
+    assert ("No. of unchanged entities skipped", "1") in final.summary
+    assert server.records["Lead"][1]["LastName"] == "Changed"
+
+
+def test_failed_records_are_not_skipped(server: MockServer) -> None:
+    """Test that records are sent again if their last write failed"""
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        skip_unchanged=True,
+        retries=0,
+    )
+    server.locked["Updated"] = 1
+    rows = [(LEADS[0]["Id"], "Updated")]
+    plugin.execute([get_entities(rows)], TestExecutionContext())
+    assert server.records["Lead"][0]["LastName"] == "Doe 1"
+    context = TestExecutionContext()
+    plugin.execute([get_entities(rows)], context)
+    assert context.report.reports[-1].entity_count == 1
+    assert server.records["Lead"][0]["LastName"] == "Updated"
@@ -0,0 +1,187 @@
+"""Test the checkpoints of resumable executions"""
+
+import json
+from collections.abc import Iterator
+from itertools import islice
+from pathlib import Path
+
+import pytest
+from cmem_plugin_base.dataintegration.entity import Entities, Entity, EntityPath, EntitySchema
+
+from cmem_plugin_salesforce.helper.bulk import BulkQuery
+from cmem_plugin_salesforce.helper.checkpoint import CHECKPOINT_FILE, Checkpoint
+from cmem_plugin_salesforce.helper.state import STATE_DIR_ENV, StateStore
+from cmem_plugin_salesforce.workflow.operations import SobjectCreate
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
+
+LEADS = [{"Id": f"00Q{index:012d}", "LastName": f"Doe {index}"} for index in range(1, 6)]
+QUERY = "SELECT Id, LastName FROM Lead"
+KEY = "project/task"
+
+
+@pytest.fixture
+def server(
+    start_server: StartServer, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> MockServer:
+    """Provide a stand-in server with leads (in pages of two)"""
+    monkeypatch.setenv(STATE_DIR_ENV, str(tmp_path))
+    return start_server(records={"Lead": [dict(lead) for lead in LEADS]}, page_size=2)
+
+
+def get_checkpoints(tmp_path: Path) -> dict:
+    """Read the stored checkpoints"""
+    path = tmp_path / CHECKPOINT_FILE
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def get_names(entities: Iterator[Entity]) -> list[str]:
+    """Get the last names of lead entities"""
+    return [entity.values[1][0] for entity in entities]
+
+
+def test_query_is_resumed(server: MockServer, tmp_path: Path) -> None:
+    """Test that a failed query continues after the last consumed page"""
+    plugin = SoqlQuery(
+        username="user", password="", security_token="", soql_query=QUERY, resume=True
+    )
+    entities = plugin.execute([], TestExecutionContext()).entities
+    assert get_names(islice(entities, 3)) == ["Doe 1", "Doe 2", "Doe 3"]
+    entities.close()  # the execution fails while the second page is consumed
+    progress = get_checkpoints(tmp_path)[KEY]["progress"]
+    assert progress["records"] == 2  # noqa: PLR2004
+
+    entities = plugin.execute([], TestExecutionContext()).entities
+    assert get_names(entities) == ["Doe 3", "Doe 4", "Doe 5"]
+    assert server.calls["query"] == 1
+    assert get_checkpoints(tmp_path) == {}
+    assert len(get_names(plugin.execute([], TestExecutionContext()).entities)) == len(LEADS)
+
+
+def test_expired_cursor(server: MockServer, tmp_path: Path) -> None:  # noqa: ARG001
+    """Test that the query starts over if the cursor of the checkpoint expired"""
+    plugin = SoqlQuery(
+        username="user", password="", security_token="", soql_query=QUERY, resume=True
+    )
+    entities = plugin.execute([], TestExecutionContext()).entities
+    next(islice(entities, 2, None))
+    entities.close()
+    store = StateStore(tmp_path / CHECKPOINT_FILE)
+    entry = store.get(KEY)
+    entry["progress"]["next_records_url"] = "/services/data/v59.0/query/expired-2"
+    store.put(KEY, entry)
+    entities = plugin.execute([], TestExecutionContext()).entities
+    assert len(get_names(entities)) == len(LEADS)
+
+
+def test_bulk_query_is_resumed(server: MockServer, tmp_path: Path) -> None:
+    """Test that the results of a bulk query job continue at the stored locator"""
+    checkpoint = Checkpoint(StateStore(tmp_path / CHECKPOINT_FILE), KEY, "fingerprint")
+    query = BulkQuery(server.salesforce(), QUERY, chunk_size=2, poll_interval=0)
+    query.submit()
+    query.wait()
+    rows = query.iter_rows(on_chunk=lambda locator: checkpoint.save_locator("job", locator))
+    assert [row[1] for row in islice(rows, 4)] == ["LastName", "Doe 1", "Doe 2", "Doe 3"]
+    assert checkpoint.progress == {"job_id": "job", "locator": "2"}
+
+    resumed = BulkQuery(server.salesforce(), QUERY, chunk_size=2, poll_interval=0)
+    resumed.job_id = query.job_id
+    rows = resumed.iter_rows("2", on_chunk=lambda locator: checkpoint.save_locator("job", locator))
+    assert [row[1] for row in rows] == ["LastName", "Doe 3", "Doe 4", "Doe 5"]
+    assert Checkpoint(checkpoint.store, KEY, "fingerprint").progress == {}
+
+
+def test_resume_validation() -> None:
+    """Test that only single, non-incremental queries can be resumed"""
+    with pytest.raises(ValueError, match="can be resumed"):
+        SoqlQuery(
+            username="",
+            password="",
+            security_token="",
+            soql_query=QUERY,
+            engine="parallel",
+            resume=True,
+        )
+    with pytest.raises(ValueError, match="can not be resumed"):
+        SoqlQuery(
+            username="",
+            password="",
+            security_token="",
+            soql_query=QUERY,
+            incremental=True,
+            resume=True,
+        )
+
+
+def get_failing_entities(rows: int, fail_at: int | None = None) -> Entities:
+    """Create new leads, the reading of the input fails at the given row"""
+
+    def entities() -> Iterator[Entity]:
+        for index in range(rows):
+            if index == fail_at:
+                raise ConnectionError("Input not available")
+            yield Entity(uri=f"urn:lead:{index}", values=[[f"New {index}"]])
+
+    return Entities(
+        entities=entities(), schema=EntitySchema(type_uri="", paths=[EntityPath("LastName")])
+    )
+
+
+def test_write_is_resumed(server: MockServer, tmp_path: Path) -> None:
+    """Test that a failed write skips the rows of the written batches on the next run"""
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        batch_size=2,
+        engine="bulk",
+        resume=True,
+    )
+    with pytest.raises(ConnectionError):
+        plugin.execute([get_failing_entities(8, fail_at=5)], TestExecutionContext())
+    assert get_checkpoints(tmp_path)[KEY]["progress"] == {"input": 0, "rows": 2, "retry": []}
+    written = len(server.records["Lead"]) - len(LEADS)
+
+    context = TestExecutionContext()
+    plugin.execute([get_failing_entities(8)], context)
+    created = len(server.records["Lead"]) - len(LEADS) - written
+    assert context.report.reports[-1].summary[0] == ("No. of entities created in Salesforce", "6")
+    assert created == 6  # noqa: PLR2004
+    assert get_checkpoints(tmp_path) == {}
+
+
+def test_delete_is_resumed(server: MockServer, tmp_path: Path) -> None:
+    """Test that a failed delete with ingest jobs only saves the progress of finished jobs"""
+    ids = [lead["Id"] for lead in LEADS]
+
+    def entities(fail_at: int | None = None) -> Iterator[Entity]:
+        for index, record_id in enumerate(ids):
+            if index == fail_at:
+                raise ConnectionError("Input not available")
+            yield Entity(uri=f"urn:lead:{index}", values=[[record_id]])
+
+    schema = EntitySchema(type_uri="", paths=[EntityPath("Id")])
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        batch_size=1,
+        workers=2,
+        operation="delete",
+        resume=True,
+    )
+    with pytest.raises(ConnectionError):
+        plugin.execute([Entities(entities(fail_at=4), schema)], TestExecutionContext())
+    rows = get_checkpoints(tmp_path)[KEY]["progress"]["rows"]
+    deleted = [lead["Id"] for lead in server.records["Lead"] if lead.get("IsDeleted")]
+    assert deleted[:rows] == ids[:rows]
+    jobs = server.calls["create_ingest_job"]
+
+    plugin.execute([Entities(entities(), schema)], TestExecutionContext())
+    assert all(lead.get("IsDeleted") for lead in server.records["Lead"])
+    assert server.calls["create_ingest_job"] - jobs == len(ids) - rows
+    assert get_checkpoints(tmp_path) == {}
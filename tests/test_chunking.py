@@ -0,0 +1,91 @@
+"""Test the parallel extraction in Id chunks"""
+
+import pytest
+
+from cmem_plugin_salesforce.helper.chunking import (
+    ChunkedQuery,
+    id_to_int,
+    int_to_id,
+    split_id_range,
+)
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
+
+ACCOUNTS = [
+    {"Id": int_to_id(id_to_int("001000000000000") + _ * 7), "Name": f"A{_}"} for _ in range(50)
+]
+
+
+@pytest.fixture
+def server(start_server: StartServer) -> MockServer:
+    """Provide a stand-in server connected to the SOQL query plugin"""
+    return start_server(records={"Account": ACCOUNTS}, page_size=4)
+
+
+def test_id_conversion() -> None:
+    """Test conversion of 15 and 18 characters Ids"""
+    assert int_to_id(id_to_int("0015g00000ABCdeAAH")) == "0015g00000ABCde"
+    assert id_to_int("001000000000001") - id_to_int("001000000000000") == 1
+    assert id_to_int("00100000000000a") > id_to_int("00100000000000Z")
+
+
+def test_split_id_range() -> None:
+    """Test splitting an Id range into chunks"""
+    first, last = "001000000000000", "0010000000000zz"
+    boundaries = split_id_range(first, last, 4)
+    assert len(boundaries) == 3  # noqa: PLR2004
+    assert [first, *boundaries, last] == sorted([first, *boundaries, last])
+    assert split_id_range(first, first, 4) == []
+
+
+def test_chunked_queries(server: MockServer) -> None:
+    """Test the generation of Id range sub-queries"""
+    query = ChunkedQuery(
+        server.salesforce(), "SELECT Id FROM Account WHERE Name != 'x'", 3, 2, ordered=True
+    )
+    queries = query.get_queries()
+    assert len(queries) == 3  # noqa: PLR2004
+    assert queries[0].startswith("SELECT Id FROM Account WHERE (Name != 'x') AND (Id < '")
+    assert "Id >= '" in queries[1]
+    assert "Id < '" in queries[1]
+    assert queries[2].endswith("')")
+    assert "Id < '" not in queries[2]
+
+
+def test_chunked_query_rejects_limit(server: MockServer) -> None:
+    """Test that queries which can not be split are rejected"""
+    with pytest.raises(ValueError, match="LIMIT"):
+        ChunkedQuery(server.salesforce(), "SELECT Id FROM Account LIMIT 5", 3, 2, ordered=True)
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+@pytest.mark.usefixtures("server")
+def test_parallel_engine(ordered: bool) -> None:
+    """Test the parallel extraction with ordered and unordered merge"""
+    plugin = SoqlQuery(
+        username="",
+        password="",
+        security_token="",
+        soql_query="SELECT Id, Name FROM Account",
+        engine="parallel",
+        chunks=5,
+        workers=3,
+        ordered=ordered,
+    )
+    context = TestExecutionContext()
+    result = plugin.execute([], context)
+    assert [path.path for path in result.schema.paths] == ["Id", "Name"]
+    ids = [entity.values[0][0] for entity in result.entities]
+    expected = [account["Id"] for account in ACCOUNTS]
+    if ordered:
+        assert ids == expected
+    else:
+        assert sorted(ids) == expected
+    chunk_report, metrics_report = context.report.reports[-2:]
+    assert chunk_report.entity_count == len(ACCOUNTS)
+    assert len(chunk_report.summary) == 5  # noqa: PLR2004
+    assert all(value.endswith("(done)") for _, value in chunk_report.summary)
+    assert metrics_report.entity_count == len(ACCOUNTS)
+    assert "Time: query" in dict(metrics_report.summary)
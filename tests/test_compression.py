@@ -0,0 +1,73 @@
+"""Test the gzip compression of the transport"""
+
+import gzip
+
+import pytest
+
+from cmem_plugin_salesforce.helper.compression import COMPRESSION_ENV, encode_request
+from cmem_plugin_salesforce.workflow.operations import SobjectCreate
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import GeneratedRecords, MockServer
+from tests.test_sobjectcreate import get_entities
+from tests.utils import TestExecutionContext
+
+UPLOAD_URL = "https://example.my.salesforce.com/services/data/v59.0/jobs/ingest/750A/batches"
+QUERY = "SELECT Id, FirstName, LastName, Email, Company FROM Lead"
+
+
+@pytest.fixture
+def server(start_server: StartServer) -> MockServer:
+    """Provide a stand-in server with some generated leads"""
+    return start_server(records={"Lead": list(GeneratedRecords(500))})
+
+
+def test_encode_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that only large bulk upload bodies are compressed"""
+    data = b"Id,LastName\n" * 1000
+    upload = encode_request("PUT", UPLOAD_URL, {"data": data, "headers": {"X-Test": "1"}})
+    assert upload["headers"] == {
+        "X-Test": "1",
+        "Accept-Encoding": "gzip, deflate",
+        "Content-Encoding": "gzip",
+    }
+    assert gzip.decompress(upload["data"]) == data
+    assert "Content-Encoding" not in encode_request("PUT", UPLOAD_URL, {"data": b"x"})["headers"]
+    query = encode_request(b"GET", b"https://example.org/services/data/v59.0/query", {})
+    assert query == {"headers": {"Accept-Encoding": "gzip, deflate"}}
+
+    monkeypatch.setenv(COMPRESSION_ENV, "false")
+    upload = encode_request("PUT", UPLOAD_URL, {"data": data})
+    assert upload == {"data": data, "headers": {"Accept-Encoding": "identity"}}
+
+
+def test_bulk_uploads_are_compressed(server: MockServer) -> None:
+    """Test that bulk uploads are sent with gzip content encoding"""
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        engine="bulk2",
+    )
+    rows = [("", f"Doe {index}") for index in range(500)]
+    plugin.execute([get_entities(rows)], TestExecutionContext())
+    assert len(server.records["Lead"]) == 500 + len(rows)
+    assert server.encodings["gzip"] == 1
+
+
+def test_responses_are_compressed(server: MockServer, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that compressed responses are decoded and save transferred bytes"""
+    received = {}
+    for enabled in ("true", "false"):
+        monkeypatch.setenv(COMPRESSION_ENV, enabled)
+        for engine in ("rest", "bulk"):
+            plugin = SoqlQuery(
+                username="user", password="", security_token="", soql_query=QUERY, engine=engine
+            )
+            entities = list(plugin.execute([], TestExecutionContext()).entities)
+            assert len(entities) == len(server.records["Lead"])
+            assert entities[-1].values[1] == ["Jane 499"]
+            received[(enabled, engine)] = plugin.metrics.to_dict()["bytes_received"]
+    for engine in ("rest", "bulk"):
+        assert received[("true", engine)] * 3 < received[("false", engine)]
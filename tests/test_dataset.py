@@ -0,0 +1,118 @@
+"""Test the streaming upload of query results to a dataset"""
+
+import json
+from typing import IO, Any
+
+import pytest
+
+from cmem_plugin_salesforce.helper import dataset
+from cmem_plugin_salesforce.helper.dataset import (
+    DatasetWriter,
+    IteratorReader,
+    iter_json_array,
+    iter_ndjson,
+)
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
+
+LEADS = [{"Id": f"00Q{index:012d}", "LastName": f"Doe {index}"} for index in range(5)]
+
+
+class Upload:
+    """Stand-in for the dataset upload which reads the stream in small chunks"""
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.dataset_id = ""
+
+    def __call__(self, dataset_id: str, file_resource: IO, context: Any) -> None:  # noqa: ANN401, ARG002
+        """Read the stream"""
+        self.dataset_id = dataset_id
+        with file_resource as file:
+            while chunk := file.read(16):
+                self.chunks.append(chunk)
+
+    @property
+    def content(self) -> bytes:
+        """Get the uploaded content"""
+        return b"".join(self.chunks)
+
+
+@pytest.fixture
+def upload(monkeypatch: pytest.MonkeyPatch) -> Upload:
+    """Replace the dataset upload"""
+    stand_in = Upload()
+    monkeypatch.setattr(dataset, "write_to_dataset", stand_in)
+    return stand_in
+
+
+@pytest.fixture
+def server(start_server: StartServer) -> MockServer:
+    """Provide a stand-in server with some leads"""
+    return start_server(records={"Lead": LEADS}, page_size=2)
+
+
+def test_serialization() -> None:
+    """Test JSON array and NDJSON serialization of record batches"""
+    batches = [[{"a": 1}, {"b": 2}], [], [{"c": 3}]]
+    assert json.loads(b"".join(iter_json_array(batches))) == [{"a": 1}, {"b": 2}, {"c": 3}]
+    assert json.loads(b"".join(iter_json_array([]))) == []
+    assert b"".join(iter_ndjson(batches)) == b'{"a": 1}\n{"b": 2}\n{"c": 3}\n'
+
+
+def test_iterator_reader() -> None:
+    """Test reading an iterator of chunks as a file"""
+    reader = IteratorReader(iter([b"abc", b"", b"defg"]))
+    assert reader.read(2) == b"ab"
+    assert reader.read() == b"cdefg"
+    assert reader.read() == b""
+
+
+def test_writer_streams_while_producing(upload: Upload) -> None:
+    """Test that records are uploaded while they are produced"""
+    writer = DatasetWriter("project:dataset")
+    pages = writer.tee_pages({"records": [{"Id": f"{index}"}]} for index in range(100))
+    next(pages)
+    for _ in range(50):
+        next(pages)
+    assert upload.chunks
+    assert len(list(pages)) == 49  # noqa: PLR2004
+    assert len(json.loads(upload.content)) == 100  # noqa: PLR2004
+
+
+def test_upload_error_is_raised() -> None:
+    """Test that an error of the upload stops the producer"""
+
+    def failing(*_: object) -> None:
+        raise RuntimeError("upload failed")
+
+    writer = DatasetWriter("project:dataset", upload=failing)
+    with pytest.raises(RuntimeError, match="upload failed"):
+        list(writer.tee_pages({"records": [{"Id": "1"}]} for _ in range(100)))
+
+
+@pytest.mark.usefixtures("server")
+@pytest.mark.parametrize(("engine", "dataset_format"), [("rest", "json"), ("bulk", "ndjson")])
+def test_plugin_writes_records(upload: Upload, engine: str, dataset_format: str) -> None:
+    """Test that the plugin writes the fetched records to the dataset"""
+    plugin = SoqlQuery(
+        username="user",
+        password="",
+        security_token="",
+        soql_query="SELECT Id, LastName FROM Lead",
+        dataset="project:dataset",
+        dataset_format=dataset_format,
+        engine=engine,
+    )
+    result = plugin.execute([], TestExecutionContext())
+    assert len(list(result.entities)) == len(LEADS)
+    if dataset_format == "json":
+        records = json.loads(upload.content)
+    else:
+        records = [json.loads(line) for line in upload.content.splitlines()]
+    assert [(record["Id"], record["LastName"]) for record in records] == [
+        (lead["Id"], lead["LastName"]) for lead in LEADS
+    ]
+    assert upload.dataset_id == "project:dataset"
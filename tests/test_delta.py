@@ -0,0 +1,145 @@
+"""Test the incremental (delta) extraction"""
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from cmem_plugin_salesforce.helper import delta
+from cmem_plugin_salesforce.helper.delta import DeltaSync, get_server_time
+from cmem_plugin_salesforce.helper.state import STATE_DIR_ENV, StateStore
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
+
+START = datetime(2026, 10, 1, 12, 0, tzinfo=UTC)
+QUERY = "SELECT Id, LastName FROM Lead"
+
+
+def timestamp(time: datetime) -> str:
+    """Format a time like Salesforce timestamps"""
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+
+
+class Clock:
+    """Server time stand-in which is advanced by the tests"""
+
+    def __init__(self) -> None:
+        self.now = START
+
+    def __call__(self, *_: object) -> datetime:
+        """Get the current time"""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    """Replace the server time"""
+    server_clock = Clock()
+    monkeypatch.setattr(delta, "get_server_time", server_clock)
+    return server_clock
+
+
+@pytest.fixture
+def server(
+    start_server: StartServer, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> MockServer:
+    """Provide a stand-in server with leads modified before the start time"""
+    leads = [
+        {
+            "Id": f"00Q{index:012d}",
+            "LastName": f"Doe {index}",
+            "SystemModstamp": timestamp(START - timedelta(hours=1)),
+            "IsDeleted": False,
+        }
+        for index in range(1, 4)
+    ]
+    monkeypatch.setenv(STATE_DIR_ENV, str(tmp_path))
+    return start_server(records={"Lead": leads})
+
+
+def run(deletions: str = "none", engine: str = "rest", query: str = QUERY) -> list[list[str]]:
+    """Execute the plugin in incremental mode and get the entity values"""
+    plugin = SoqlQuery(
+        username="user",
+        password="",
+        security_token="",
+        soql_query=query,
+        engine=engine,
+        incremental=True,
+        deletions=deletions,
+    )
+    result = plugin.execute([], TestExecutionContext())
+    paths = [path.path for path in result.schema.paths]
+    return [
+        [
+            f"{path}={value[0] if value else ''}"
+            for path, value in zip(paths, entity.values, strict=True)
+        ]
+        for entity in result.entities
+    ]
+
+
+@pytest.mark.usefixtures("clock")
+def test_server_time(server: MockServer) -> None:
+    """Test that the server time is taken from the Date header"""
+    now = datetime.now(tz=UTC)
+    assert abs(get_server_time(server.salesforce()) - now) < timedelta(minutes=1)
+
+
+@pytest.mark.parametrize("engine", ["rest", "bulk"])
+def test_only_changes_are_emitted(server: MockServer, clock: Clock, engine: str) -> None:
+    """Test that later runs only emit records changed since the last run"""
+    assert len(run(engine=engine)) == 3  # noqa: PLR2004
+    assert run(engine=engine) == []
+    lead = server.records["Lead"][1]
+    lead["LastName"] = "Changed"
+    lead["SystemModstamp"] = timestamp(clock.now + timedelta(seconds=1))
+    clock.now += timedelta(minutes=5)
+    assert run(engine=engine) == [[f"Id={lead['Id']}", "LastName=Changed"]]
+    assert run(engine=engine) == []
+
+
+@pytest.mark.usefixtures("clock")
+def test_query_change_resets_watermark(server: MockServer) -> None:
+    """Test that a changed query is extracted completely again"""
+    run()
+    assert len(run(query="SELECT Id FROM Lead")) == 3  # noqa: PLR2004
+    assert server.calls["query"] == 2  # noqa: PLR2004
+
+
+def test_watermark_is_committed_after_consumption(server: MockServer, tmp_path: Path) -> None:
+    """Test that the watermark is only stored when all results were read"""
+    state = StateStore(tmp_path / "state.json")
+    sync = DeltaSync(server.salesforce(), QUERY, state, "task")
+    query = sync.get_query()
+    assert query.startswith(f"{QUERY} WHERE SystemModstamp <= ")
+    assert state.get("task") == {}
+    sync.commit()
+    assert state.get("task")["watermark"] == sync.upper.strftime("%Y-%m-%dT%H:%M:%SZ")  # type: ignore[union-attr]
+    second = DeltaSync(server.salesforce(), QUERY, state, "task")
+    assert second.lower == sync.upper
+    assert f"SystemModstamp > {state.get('task')['watermark']} AND" in second.get_query()
+
+
+def test_incremental_rejects_limit(server: MockServer, tmp_path: Path) -> None:
+    """Test that queries with LIMIT can not be executed incrementally"""
+    state = StateStore(tmp_path / "state.json")
+    with pytest.raises(ValueError, match=r"LIMIT or OFFSET"):
+        DeltaSync(server.salesforce(), f"{QUERY} LIMIT 10", state, "task")
+
+
+@pytest.mark.parametrize("deletions", ["query_all", "get_deleted"])
+def test_deletions(server: MockServer, clock: Clock, deletions: str) -> None:
+    """Test that deleted records are emitted with IsDeleted"""
+    first = run(deletions=deletions)
+    assert first[0][-1] == "IsDeleted=false"
+    lead = server.records["Lead"][0]
+    lead["IsDeleted"] = True
+    lead["SystemModstamp"] = timestamp(clock.now + timedelta(seconds=1))
+    clock.now += timedelta(minutes=5)
+    rows = run(deletions=deletions)
+    assert len(rows) == 1
+    assert rows[0][0] == f"Id={lead['Id']}"
+    assert rows[0][-1] == "IsDeleted=true"
@@ -0,0 +1,82 @@
+"""Test the Bulk API 2.0 ingest jobs"""
+
+import threading
+from typing import Any
+
+import pytest
+
+from cmem_plugin_salesforce.helper.ingest import BulkIngest, IngestJob, to_csv
+from tests.mock_server import MockServer
+
+
+def test_to_csv() -> None:
+    """Test the CSV serialization of records with different columns"""
+    records = [{"LastName": 'Doe, "Jane"'}, {"Id": "00Q000000000001", "LastName": "Roe"}]
+    assert to_csv(records) == b'LastName,Id\n"Doe, ""Jane""",\nRoe,00Q000000000001\n'
+
+
+def test_bounded_concurrency(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that at most `workers` jobs run at the same time"""
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def run(job: IngestJob, records: list[dict[str, Any]]) -> IngestJob:
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        threading.Event().wait(0.05)
+        with lock:
+            running[0] -= 1
+        job.info = {"records": len(records)}
+        return job
+
+    monkeypatch.setattr(IngestJob, "run", run)
+    ingest = BulkIngest(None, "Lead", workers=2)  # type: ignore[arg-type]
+    batches = [[{"LastName": f"{index}"}] for index in range(6)]
+    jobs = list(ingest.execute(batches))
+    assert len(jobs) == 6  # noqa: PLR2004
+    assert peak[0] == 2  # noqa: PLR2004
+
+
+def test_jobs_in_batch_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that jobs which finish early are yielded after the jobs of earlier batches"""
+    first_done = threading.Event()
+    finished: list[str] = []
+
+    def run(job: IngestJob, records: list[dict[str, Any]]) -> IngestJob:
+        name = records[0]["LastName"]
+        if name == "0":
+            first_done.wait(0.2)
+        else:
+            first_done.set()
+        finished.append(name)
+        job.info = {"id": name}
+        return job
+
+    monkeypatch.setattr(IngestJob, "run", run)
+    ingest = BulkIngest(None, "Lead", workers=3)  # type: ignore[arg-type]
+    batches = [[{"LastName": f"{index}"}] for index in range(5)]
+    jobs = [job.info["id"] for job in ingest.execute(batches)]
+    assert finished[0] != "0"
+    assert jobs == ["0", "1", "2", "3", "4"]
+
+
+def test_ingest_job_results() -> None:
+    """Test a job run with streamed successful and failed results"""
+    with MockServer(records={"Lead": [{"Id": "00Q000000000001", "LastName": "Doe"}]}) as server:
+        job = IngestJob(server.salesforce(), "Lead", poll_interval=0)
+        job.run([{"Id": "00Q000000000001", "LastName": "Roe"}, {"Id": "00Q000000000009"}])
+        assert job.info["state"] == "JobComplete"
+        outcomes = list(job.iter_outcomes())
+        assert outcomes[0] == {
+            "id": "00Q000000000001",
+            "success": True,
+            "created": False,
+            "errors": [],
+            "record": {"Id": "00Q000000000001", "LastName": "Roe"},
+        }
+        assert not outcomes[1]["success"]
+        assert outcomes[1]["record"] == {"Id": "00Q000000000009"}
+        assert outcomes[1]["errors"][0].startswith("INVALID_CROSS_REFERENCE_KEY")
+        assert server.calls["get_ingest_job"] == 1
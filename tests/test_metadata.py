@@ -0,0 +1,94 @@
+"""Test the describe metadata cache"""
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from cmem_plugin_salesforce.helper.metadata import (
+    CACHE_DIR_ENV,
+    DescribeCache,
+    get_cache_directory,
+)
+from tests.mock_server import MockServer
+
+LEADS = [{"Id": "00Q000000000001", "FirstName": "Jane", "LastName": "Doe"}]
+
+
+@pytest.fixture
+def server() -> Iterator[MockServer]:
+    """Provide a stand-in server"""
+    with MockServer(records={"Lead": LEADS, "Contact": LEADS}) as mock_server:
+        yield mock_server
+
+
+def test_field_index(server: MockServer) -> None:
+    """Test the field index of a description"""
+    description = DescribeCache().get(server.salesforce(), "Lead")
+    assert description.name == "Lead"
+    assert set(description.fields) == {"Id", "FirstName", "LastName"}
+    assert description.fields["Id"].type == "id"
+    assert not description.fields["Id"].updateable
+    assert description.fields["LastName"].length == 255  # noqa: PLR2004
+
+
+def test_cache_hit_within_ttl(server: MockServer) -> None:
+    """Test that a fresh entry is served from memory"""
+    cache = DescribeCache()
+    salesforce = server.salesforce()
+    assert cache.get(salesforce, "Lead") is cache.get(salesforce, "Lead")
+    assert server.calls["describe"] == 1
+
+
+def test_revalidation(server: MockServer) -> None:
+    """Test that expired entries are revalidated with a conditional request"""
+    cache = DescribeCache(ttl=0)
+    salesforce = server.salesforce()
+    first = cache.get(salesforce, "Lead")
+    second = cache.get(salesforce, "Lead")
+    assert server.calls["describe"] == 2  # noqa: PLR2004
+    assert second.describe is first.describe
+    server.metadata_modified += 10
+    third = cache.get(salesforce, "Lead")
+    assert third.describe is not first.describe
+
+
+def test_lru_eviction(server: MockServer) -> None:
+    """Test that the least recently used entry is evicted"""
+    cache = DescribeCache(max_entries=1)
+    salesforce = server.salesforce()
+    cache.get(salesforce, "Lead")
+    cache.get(salesforce, "Contact")
+    assert [key[2] for key in cache.entries] == ["Contact"]
+
+
+def test_cache_per_user(server: MockServer) -> None:
+    """Test that the descriptions of different users are cached separately"""
+    cache = DescribeCache()
+    salesforce = server.salesforce()
+    first = cache.get(salesforce, "Lead", "jane")
+    assert cache.get(salesforce, "Lead", "john") is not first
+    assert cache.get(salesforce, "Lead", "jane") is first
+    assert server.calls["describe"] == 2  # noqa: PLR2004
+
+
+def test_disk_cache(server: MockServer, tmp_path: Path) -> None:
+    """Test that entries are persisted and revalidated after a restart"""
+    salesforce = server.salesforce()
+    DescribeCache(directory=tmp_path).get(salesforce, "Lead")
+    assert len(list(tmp_path.glob("describe-*-Lead.json"))) == 1
+    DescribeCache(directory=tmp_path).get(salesforce, "Lead")
+    assert server.calls["describe"] == 1
+    description = DescribeCache(directory=tmp_path, ttl=0).get(salesforce, "Lead")
+    assert server.calls["describe"] == 2  # noqa: PLR2004
+    assert set(description.fields) == {"Id", "FirstName", "LastName"}
+
+
+def test_lazy_cache_directory(
+    server: MockServer, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the configured cache directory is resolved when an entry is saved"""
+    cache = DescribeCache(directory=get_cache_directory)
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+    cache.get(server.salesforce(), "Lead", "jane")
+    assert len(list(tmp_path.glob("describe-*-Lead.json"))) == 1
@@ -0,0 +1,111 @@
+"""Test the execution metrics"""
+
+import json
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from cmem_plugin_salesforce.helper.metrics import (
+    METRICS_FILE_ENV,
+    MeteredSession,
+    Metrics,
+    format_bytes,
+)
+from cmem_plugin_salesforce.workflow.operations import SobjectCreate
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.test_sobjectcreate import get_entities
+from tests.utils import TestExecutionContext
+
+LEADS = [{"Id": f"00Q{index:012d}", "LastName": f"Doe {index}"} for index in range(1, 6)]
+
+
+@pytest.fixture
+def server(
+    start_server: StartServer, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> MockServer:
+    """Provide a stand-in server with some leads and a metrics file"""
+    monkeypatch.setenv(METRICS_FILE_ENV, str(tmp_path / "metrics.jsonl"))
+    return start_server(records={"Lead": [dict(lead) for lead in LEADS]}, page_size=2)
+
+
+def test_nested_phases_are_exclusive() -> None:
+    """Test that the time of nested phases is not counted for the outer phase"""
+    metrics = Metrics()
+
+    def slow_items() -> Iterator[int]:
+        for item in range(3):
+            time.sleep(0.02)
+            yield item
+
+    with metrics.phase("outer"):
+        items = list(metrics.iter_phase(slow_items(), "inner"))
+    assert items == [0, 1, 2]
+    assert metrics.phases["inner"] >= 0.06  # noqa: PLR2004
+    assert metrics.phases["outer"] < 0.02  # noqa: PLR2004
+
+
+def test_format_bytes() -> None:
+    """Test the formatting of byte counts"""
+    assert format_bytes(512) == "512 B"
+    assert format_bytes(2048) == "2.0 KiB"
+    assert format_bytes(3 * 1024**3) == "3.0 GiB"
+
+
+def test_query_metrics(server: MockServer, tmp_path: Path) -> None:
+    """Test that a query reports its phases, requests and API usage after the last entity"""
+    plugin = SoqlQuery(
+        username="user", password="", security_token="", soql_query="SELECT Id FROM Lead"
+    )
+    context = TestExecutionContext()
+    result = plugin.execute([], context)
+    assert context.report.reports == []
+    assert len(list(result.entities)) == len(LEADS)
+    report = context.report.reports[-1]
+    summary = dict(report.summary)
+    assert report.entity_count == len(LEADS)
+    assert {"Time: login", "Time: query", "Time: convert"} <= set(summary)
+    assert summary["HTTP requests"] == "4"  # login and three pages
+    assert summary["API usage"] == f"{server.calls.total()}/15000 requests (24h)"
+    exported = json.loads((tmp_path / "metrics.jsonl").read_text())
+    assert exported["plugin"] == "SoqlQuery"
+    assert exported["task"] == "project/task"
+    assert exported["entities"] == len(LEADS)
+    assert exported["requests"] == 4  # noqa: PLR2004
+    assert exported["bytes_received"] > 0
+
+
+def test_upsert_metrics(server: MockServer, tmp_path: Path) -> None:
+    """Test that an upsert reports its phases and the transferred bytes"""
+    plugin = SobjectCreate(
+        username="user", password="", security_token="", salesforce_object="Lead", engine="bulk"
+    )
+    context = TestExecutionContext()
+    plugin.execute([get_entities([("", "New"), ("", "Newer")])], context)
+    summary = dict(context.report.reports[-1].summary)
+    assert {"Time: describe", "Time: serialize", "Time: bulk job"} <= set(summary)
+    exported = json.loads((tmp_path / "metrics.jsonl").read_text())
+    assert exported["plugin"] == "SobjectCreate"
+    assert exported["created"] == 2  # noqa: PLR2004
+    assert exported["requests"] == sum(server.calls.values())
+    assert exported["bytes_sent"] > 0
+
+
+def test_streams_are_released(server: MockServer) -> None:
+    """Test that consumed streamed responses are counted and not kept"""
+    metrics = Metrics()
+    salesforce = server.salesforce()
+    salesforce.session = MeteredSession(salesforce.session, metrics)
+    url = f"{salesforce.base_url}query/"
+    params = {"q": "SELECT Id, LastName FROM Lead"}
+    response = salesforce.session.get(url, params=params, headers=salesforce.headers, stream=True)
+    assert len(metrics.streams) == 1
+    assert response.content
+    assert metrics.get_bytes_received() > 0
+    assert metrics.streams == []
+    salesforce.session.get(url, params=params, headers=salesforce.headers, stream=True).close()
+    salesforce.session.get(url, params=params, headers=salesforce.headers)
+    assert metrics.streams == []
@@ -0,0 +1,90 @@
+"""Test the concurrent execution of several queries"""
+
+from collections import Counter
+
+import pytest
+from simple_salesforce.exceptions import SalesforceOperationError
+
+from cmem_plugin_salesforce.helper.query import split_queries
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
+
+LEADS = [{"Id": f"00Q{index:012d}", "LastName": f"Doe {index}"} for index in range(1, 6)]
+CONTACTS = [{"Id": "003000000000001", "Name": "Roe"}]
+
+
+@pytest.fixture
+def server(start_server: StartServer) -> MockServer:
+    """Provide a stand-in server with leads (in pages of two) and a contact"""
+    records = {"Lead": [dict(lead) for lead in LEADS], "Contact": [dict(_) for _ in CONTACTS]}
+    return start_server(records=records, page_size=2)
+
+
+def get_plugin(soql_query: str, **kwargs: object) -> SoqlQuery:
+    """Create the plugin for a query text"""
+    return SoqlQuery(
+        username="user",
+        password="",
+        security_token="",
+        soql_query=soql_query,
+        **kwargs,  # type: ignore[arg-type]
+    )
+
+
+def test_split_queries() -> None:
+    """Test that statements are split at semicolons outside of string literals"""
+    text = "SELECT Id FROM Lead WHERE LastName = 'a; b';\n\nSELECT Id FROM Contact;"
+    assert split_queries(text) == [
+        "SELECT Id FROM Lead WHERE LastName = 'a; b'",
+        "SELECT Id FROM Contact",
+    ]
+    assert split_queries("SELECT Id FROM Lead") == ["SELECT Id FROM Lead"]
+
+
+def test_queries_are_tagged(server: MockServer) -> None:
+    """Test that the records of all queries are emitted as one tagged stream"""
+    plugin = get_plugin(
+        "SELECT Id, LastName FROM Lead; SELECT Id, Name FROM Contact; SELECT Id FROM Lead LIMIT 1"
+    )
+    context = TestExecutionContext()
+    result = plugin.execute([], context)
+    paths = [path.path for path in result.schema.paths]
+    assert paths == ["query", "Id", "LastName", "Name"]
+    entities = list(result.entities)
+    assert Counter(entity.values[0][0] for entity in entities) == {
+        "Lead (1)": 5,
+        "Contact": 1,
+        "Lead (2)": 1,
+    }
+    contact = next(entity for entity in entities if entity.values[0] == ["Contact"])
+    assert contact.uri == "urn:salesforce:Contact:003000000000001"
+    assert contact.values == [["Contact"], ["003000000000001"], [], ["Roe"]]
+    assert server.calls["composite_batch"] == 1
+    assert server.calls["query"] == 0
+    assert server.calls["query_more"] == 2  # noqa: PLR2004
+    assert context.report.reports[-1].entity_count == len(entities)
+
+
+def test_many_queries_are_batched(server: MockServer) -> None:
+    """Test that at most 25 queries are sent in one batch request"""
+    plugin = get_plugin(";".join(["SELECT Id FROM Contact"] * 30))
+    assert len(list(plugin.execute([], TestExecutionContext()).entities)) == 30  # noqa: PLR2004
+    assert server.calls["composite_batch"] == 2  # noqa: PLR2004
+
+
+def test_failed_query(server: MockServer) -> None:  # noqa: ARG001
+    """Test that the error of a query is raised"""
+    plugin = get_plugin("SELECT Id FROM Contact; DELETE Contact")
+    with pytest.raises(SalesforceOperationError, match=r"Query 2 failed: MALFORMED_QUERY"):
+        plugin.execute([], TestExecutionContext())
+
+
+def test_multi_query_validation(server: MockServer) -> None:  # noqa: ARG001
+    """Test that several queries need the REST API and can not be incremental"""
+    queries = "SELECT Id FROM Lead; SELECT Id FROM Contact"
+    with pytest.raises(ValueError, match=r"REST API"):
+        get_plugin(queries, engine="bulk")
+    with pytest.raises(ValueError, match=r"incrementally"):
+        get_plugin(queries, incremental=True)
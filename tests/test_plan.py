@@ -0,0 +1,117 @@
+"""Test the query plan check and the engine selection"""
+
+from pathlib import Path
+
+import pytest
+
+from cmem_plugin_salesforce.helper.bulk import is_bulk_query
+from cmem_plugin_salesforce.helper.plan import get_limit, is_splittable
+from cmem_plugin_salesforce.helper.query import get_count_query
+from cmem_plugin_salesforce.helper.state import STATE_DIR_ENV
+from cmem_plugin_salesforce.workflow import soql_query
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
+
+LEADS = [{"Id": f"00Q{index:012d}", "LastName": f"Doe {index}"} for index in range(1, 6)]
+QUERY = "SELECT Id, LastName FROM Lead"
+
+
+@pytest.fixture
+def server(start_server: StartServer) -> MockServer:
+    """Provide a stand-in server with leads"""
+    return start_server(records={"Lead": [dict(lead) for lead in LEADS]})
+
+
+def test_query_analysis() -> None:
+    """Test the count query and the engine support of queries"""
+    query = "SELECT Id FROM Lead WHERE Name = 'LIMIT 1' ORDER BY Name LIMIT 10"
+    assert get_count_query(query) == "SELECT COUNT() FROM Lead WHERE Name = 'LIMIT 1'"
+    assert get_limit(query) == 10  # noqa: PLR2004
+    assert get_limit(QUERY) is None
+    assert is_bulk_query(query)
+    assert not is_splittable(query)
+    assert is_splittable(QUERY)
+    assert not is_bulk_query("SELECT Id, (SELECT Id FROM Contacts) FROM Account")
+    assert not is_bulk_query("SELECT FIELDS(STANDARD) FROM Account")
+    assert not is_bulk_query("SELECT Name, COUNT(Id) FROM Account GROUP BY Name")
+
+
+@pytest.mark.parametrize(
+    ("query", "records", "engine"),
+    [
+        (QUERY, 2, "rest"),
+        (QUERY, 3, "bulk"),
+        ("SELECT FIELDS(STANDARD) FROM Lead", 3, "parallel"),
+        ("SELECT Name, COUNT(Id) FROM Lead GROUP BY Name", 3, "rest"),
+    ],
+)
+def test_engine_selection(query: str, records: int, engine: str) -> None:
+    """Test that the engine is selected by the number of records and the query"""
+    plugin = SoqlQuery(
+        username="", password="", security_token="", soql_query=query, bulk_threshold=2
+    )
+    assert plugin.select_engine(query, records) == engine
+
+
+def test_full_scan_is_reported(server: MockServer) -> None:
+    """Test that a large, non-selective query is reported and executed as bulk query"""
+    plugin = SoqlQuery(
+        username="user",
+        password="",
+        security_token="",
+        soql_query=QUERY,
+        bulk_threshold=2,
+        query_plan="count",
+    )
+    context = TestExecutionContext()
+    entities = plugin.execute([], context).entities
+    assert "TableScan" in context.report.reports[0].warnings[0]
+    assert len(list(entities)) == len(LEADS)
+    assert server.calls["create_query_job"] == 1
+    assert server.calls["query"] == 2  # explain and count  # noqa: PLR2004
+    report = context.report.reports[-1]
+    assert ("Estimated records", "5") in report.summary
+    assert report.warnings == context.report.reports[0].warnings
+
+
+def test_selective_query(server: MockServer) -> None:
+    """Test that a selective query with few records is executed with the REST API"""
+    query = f"{QUERY} WHERE Id >= '00Q000000000004'"
+    plugin = SoqlQuery(
+        username="user",
+        password="",
+        security_token="",
+        soql_query=query,
+        bulk_threshold=2,
+        query_plan="explain",
+    )
+    context = TestExecutionContext()
+    assert len(list(plugin.execute([], context).entities)) == 2  # noqa: PLR2004
+    assert server.calls["create_query_job"] == 0
+    assert context.report.reports[-1].warnings == []
+    assert ("Query plan", "Index") in context.report.reports[-1].summary
+
+
+@pytest.mark.parametrize("resume", [False, True])
+def test_auto_engine_switch(
+    server: MockServer, monkeypatch: pytest.MonkeyPatch, tmp_path: Path, resume: bool
+) -> None:
+    """Test that the first page selects the parallel engine for a non-bulk query
+
+    Resumable executions stay with the REST API.
+    """
+    monkeypatch.setenv(STATE_DIR_ENV, str(tmp_path))
+    monkeypatch.setattr(soql_query, "is_bulk_query", lambda _: False)
+    plugin = SoqlQuery(
+        username="user",
+        password="",
+        security_token="",
+        soql_query=QUERY,
+        bulk_threshold=2,
+        resume=resume,
+    )
+    assert len(list(plugin.execute([], TestExecutionContext()).entities)) == len(LEADS)
+    assert server.calls["create_query_job"] == 0
+    assert (server.calls["query"] == 1) == resume
@@ -0,0 +1,73 @@
+"""Test the projection of result records to entities"""
+
+from cmem_plugin_salesforce.helper.projection import Projector, convert, get_paths
+
+RECORD = {
+    "attributes": {"type": "Contact"},
+    "Id": "003000000000001AAA",
+    "LastName": "Doe",
+    "Email": None,
+    "NumberOfEmployees": 12,
+    "Score": 1.5,
+    "HasOptedOutOfEmail": False,
+    "Account": {
+        "attributes": {"type": "Account"},
+        "Name": "ACME",
+        "Owner": {"attributes": {"type": "User"}, "Alias": "jdoe"},
+    },
+    "ReportsTo": None,
+}
+
+
+def test_relationship_paths_are_flattened() -> None:
+    """Test that nested relationship records become dotted columns"""
+    assert get_paths(RECORD, ["reportsto.LastName"]) == [
+        "Id",
+        "LastName",
+        "Email",
+        "NumberOfEmployees",
+        "Score",
+        "HasOptedOutOfEmail",
+        "Account.Name",
+        "Account.Owner.Alias",
+        "ReportsTo.LastName",
+    ]
+
+
+def test_type_aware_conversion() -> None:
+    """Test the conversion of JSON values"""
+    assert convert("text") == ["text"]
+    assert convert(None) == []
+    assert convert(True) == ["true"]
+    assert convert(7) == ["7"]
+    assert convert(0.1) == ["0.1"]
+    assert convert({"city": "Leipzig"}) == ['{"city": "Leipzig"}']
+
+
+def test_project_records() -> None:
+    """Test values and deterministic URIs of projected records"""
+    projector = Projector.from_record(RECORD, "Contact", ["ReportsTo.LastName"])
+    entity = next(projector.project([RECORD]))
+    assert entity.uri == "urn:salesforce:Contact:003000000000001AAA"
+    assert entity.values == [
+        ["003000000000001AAA"],
+        ["Doe"],
+        [],
+        ["12"],
+        ["1.5"],
+        ["false"],
+        ["ACME"],
+        ["jdoe"],
+        [],
+    ]
+    assert [path.path for path in projector.schema.paths] == projector.paths
+
+
+def test_project_rows() -> None:
+    """Test the projection of Bulk API CSV rows"""
+    projector = Projector(["Name", "Id"], "Lead")
+    entities = list(projector.project_row([["Doe", "00Q000000000001"], ["", ""]]))
+    assert entities[0].uri == "urn:salesforce:Lead:00Q000000000001"
+    assert entities[0].values == [["Doe"], ["00Q000000000001"]]
+    assert entities[1].uri.startswith("urn:uuid:")
+    assert entities[1].values == [[], []]
@@ -0,0 +1,104 @@
+"""Test the result cache of repeated queries"""
+
+from pathlib import Path
+
+import pytest
+
+from cmem_plugin_salesforce.helper.query import get_probe_query, normalize_query
+from cmem_plugin_salesforce.helper.result_cache import DATA_SUFFIX, Probe, ResultCache
+from cmem_plugin_salesforce.helper.state import STATE_DIR_ENV
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
+
+ACCOUNTS = [
+    {
+        "Id": f"001{index:012d}",
+        "Name": f"Account {index}",
+        "SystemModstamp": f"2026-10-0{index}T12:00:00.000+0000",
+    }
+    for index in range(1, 6)
+]
+QUERY = "SELECT Id, Name FROM Account"
+
+
+@pytest.fixture
+def server(
+    start_server: StartServer, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> MockServer:
+    """Provide a stand-in server with accounts (in pages of two)"""
+    monkeypatch.setenv(STATE_DIR_ENV, str(tmp_path))
+    return start_server(records={"Account": [dict(account) for account in ACCOUNTS]}, page_size=2)
+
+
+def test_probe_query() -> None:
+    """Test the normalization and the probe of queries"""
+    assert normalize_query(" SELECT  Id,\n Name FROM Account WHERE Name = 'A  B' ") == (
+        "SELECT Id, Name FROM Account WHERE Name = 'A  B'"
+    )
+    assert get_probe_query("SELECT Id FROM Account WHERE Name = 'A' ORDER BY Name LIMIT 5") == (
+        "SELECT COUNT(Id) records, MAX(SystemModstamp) modstamp FROM Account WHERE Name = 'A'"
+    )
+
+
+def test_cached_results(server: MockServer) -> None:
+    """Test that unchanged results are served from the cache"""
+    plugin = SoqlQuery(
+        username="user", password="", security_token="", soql_query=QUERY, cache_ttl=600
+    )
+    first = [entity.values for entity in plugin.execute([], TestExecutionContext()).entities]
+    assert len(first) == len(ACCOUNTS)
+    assert (server.calls["query"], server.calls["query_more"]) == (2, 2)
+
+    query = QUERY.replace(" ", "  ")
+    plugin = SoqlQuery(
+        username="user", password="", security_token="", soql_query=query, cache_ttl=600
+    )
+    second = [entity.values for entity in plugin.execute([], TestExecutionContext()).entities]
+    assert second == first
+    assert (server.calls["query"], server.calls["query_more"]) == (3, 2)
+    assert "cache" in plugin.metrics.to_dict()["phases"]
+
+    server.records["Account"][0]["SystemModstamp"] = "2026-10-17T12:00:00.000+0000"
+    plugin.execute([], TestExecutionContext()).entities.close()
+    third = [entity.values for entity in plugin.execute([], TestExecutionContext()).entities]
+    assert third == first
+    assert (server.calls["query"], server.calls["query_more"]) == (7, 4)
+
+
+@pytest.mark.parametrize("query_plan", ["none", "count"])
+def test_large_result_is_cached(server: MockServer, query_plan: str) -> None:
+    """Test that a result above the Bulk API threshold is cached (with the REST API)"""
+    plugin = SoqlQuery(
+        username="user",
+        password="",
+        security_token="",
+        soql_query=QUERY,
+        cache_ttl=600,
+        bulk_threshold=3,
+        query_plan=query_plan,
+    )
+    first = [entity.values for entity in plugin.execute([], TestExecutionContext()).entities]
+    assert len(first) == len(ACCOUNTS)
+    queries = (server.calls["query"], server.calls["query_more"])
+
+    second = [entity.values for entity in plugin.execute([], TestExecutionContext()).entities]
+    assert second == first
+    assert server.calls["create_query_job"] == 0
+    assert server.calls["query_more"] == queries[1]
+    assert server.calls["query"] == queries[0] + (1 if query_plan == "none" else 3)
+
+
+def test_eviction(tmp_path: Path) -> None:
+    """Test that incomplete results are not stored and old entries are evicted"""
+    cache = ResultCache(tmp_path, ttl=600, max_bytes=100)
+    pages = [{"totalSize": 1, "done": True, "records": [{"Id": "1", "Name": "x" * 100}]}]
+    current = Probe(1, None)
+    cache.put("first", current, pages).close()
+    assert cache.get("first", current) is None
+    assert list(cache.put("first", current, pages)) == pages
+    assert list(cache.get("first", current) or []) == pages
+    assert cache.get("first", Probe(2, None)) is None
+    list(cache.put("second", current, pages))
+    assert [path.name for path in tmp_path.glob(f"*{DATA_SUFFIX}")] == [f"second{DATA_SUFFIX}"]
@@ -0,0 +1,101 @@
+"""Test the retry of transient record failures"""
+
+import pytest
+
+from cmem_plugin_salesforce.helper import retry
+from cmem_plugin_salesforce.helper.retry import (
+    get_error_code,
+    group_records,
+    is_transient,
+    iter_grouped,
+)
+from cmem_plugin_salesforce.workflow.operations import SobjectCreate
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.test_sobjectcreate import get_entities
+from tests.utils import TestExecutionContext
+
+LEADS = [{"Id": f"00Q{index:012d}", "LastName": f"Doe {index}"} for index in range(1, 4)]
+
+
+@pytest.fixture
+def server(start_server: StartServer, monkeypatch: pytest.MonkeyPatch) -> MockServer:
+    """Provide a stand-in server with some leads and a short retry delay"""
+    monkeypatch.setattr(retry, "INITIAL_DELAY", 0.01)
+    return start_server(records={"Lead": [dict(lead) for lead in LEADS]})
+
+
+def test_transient_errors() -> None:
+    """Test the detection of transient errors in both result formats"""
+    lock = {"statusCode": "UNABLE_TO_LOCK_ROW", "message": "unable to obtain exclusive access"}
+    assert get_error_code(lock) == "UNABLE_TO_LOCK_ROW"
+    assert get_error_code("INVALID_FIELD:No such column") == "INVALID_FIELD"
+    assert is_transient({"errors": [lock]})
+    assert is_transient({"errors": ["UNABLE_TO_LOCK_ROW:unable to obtain exclusive access"]})
+    assert is_transient({"errors": ["Job 750 Failed: Request timed out"]})
+    assert not is_transient({"errors": [lock, "INVALID_FIELD:No such column"]})
+    assert not is_transient({"errors": []})
+
+
+def test_records_are_grouped_by_parent() -> None:
+    """Test that retried records of the same parent are put next to each other"""
+    records = [
+        {"Id": "3", "AccountId": "B"},
+        {"Id": "1", "AccountId": "A"},
+        {"Id": "2", "AccountId": "B"},
+        {"Id": "4", "AccountId": "A"},
+    ]
+    assert [record["Id"] for record in group_records(records)] == ["1", "4", "3", "2"]
+    assert group_records(records[:1]) == records[:1]
+    grouped = iter_grouped(records, 2)
+    assert [record["Id"] for record in grouped] == ["1", "3", "4", "2"]
+
+
+@pytest.mark.parametrize("engine", ["bulk", "bulk2"])
+def test_transient_failures_are_retried(server: MockServer, engine: str) -> None:
+    """Test that only the records with a transient error are written again"""
+    server.locked["New"] = 2
+    plugin = SobjectCreate(
+        username="user", password="", security_token="", salesforce_object="Lead", engine=engine
+    )
+    context = TestExecutionContext()
+    rows = [("", "New"), ("", "Newer"), (LEADS[0]["Id"], "Updated")]
+    output = plugin.execute([get_entities(rows)], context)
+    assert output is not None
+    assert list(output.entities) == []
+    assert [lead["LastName"] for lead in server.records["Lead"][3:]] == ["Newer", "New"]
+    final = context.report.reports[-1]
+    assert final.entity_count == len(rows)
+    assert final.summary[:3] == [
+        ("No. of entities created in Salesforce", "2"),
+        ("No. of entities updated in Salesforce", "1"),
+        ("No. of retried entities", "2"),
+    ]
+    assert final.warnings == []
+
+
+def test_permanent_failures_are_output(server: MockServer) -> None:
+    """Test that failed records are the output once the retries are used up"""
+    server.locked["New"] = 5
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        retries=1,
+    )
+    context = TestExecutionContext()
+    rows = [("", "New"), ("00Q999999999999", "Unknown"), ("", "Newer")]
+    output = plugin.execute([get_entities(rows)], context)
+    assert output is not None
+    paths = [path.path for path in output.schema.paths]
+    assert paths == ["Id", "LastName", "errorStatusCode", "errorMessage", "attempts"]
+    failed = [dict(zip(paths, entity.values, strict=True)) for entity in output.entities]
+    assert [(row["LastName"], row["errorStatusCode"], row["attempts"]) for row in failed] == [
+        (["Unknown"], ["INVALID_CROSS_REFERENCE_KEY"], ["1"]),
+        (["New"], ["UNABLE_TO_LOCK_ROW"], ["2"]),
+    ]
+    assert server.locked["New"] == 3  # noqa: PLR2004
+    final = context.report.reports[-1]
+    assert final.warnings[0] == "2 entities failed to create/update in Salesforce"
+    assert final.warnings[1].startswith("Errors: INVALID_CROSS_REFERENCE_KEY (1), ")
@@ -0,0 +1,92 @@
+"""Test the typed serialization of input rows"""
+
+import pytest
+
+from cmem_plugin_salesforce.helper.metadata import ObjectDescription
+from cmem_plugin_salesforce.helper.serializer import (
+    INVALID_TYPE,
+    STRING_TOO_LONG,
+    InvalidValueError,
+    RecordSerializer,
+)
+
+FIELDS = {
+    "Id": "id",
+    "LastName": "string",
+    "HasOptedOutOfEmail": "boolean",
+    "NumberOfEmployees": "int",
+    "AnnualRevenue": "currency",
+    "Birthdate": "date",
+    "LastTransferDate": "datetime",
+    "Interests__c": "multipicklist",
+}
+COLUMNS = list(FIELDS)
+DESCRIPTION = ObjectDescription(
+    {
+        "name": "Lead",
+        "fields": [
+            {"name": name, "type": field_type, "length": 10 if field_type == "string" else 0}
+            for name, field_type in FIELDS.items()
+        ],
+    },
+    last_modified="",
+    fetched=0.0,
+)
+
+
+def test_values_are_coerced() -> None:
+    """Test that values are converted to the formats of their field types"""
+    serializer = RecordSerializer(COLUMNS, DESCRIPTION, "Id")
+    record = serializer.serialize(
+        [
+            [],
+            ["Doe", "Jr."],
+            ["Yes"],
+            [" 42.0 "],
+            ["1.5E+3"],
+            ["2024-02-29T10:00:00"],
+            ["2024-02-29T10:00:00+02:00"],
+            ["Golf", "Tennis"],
+        ]
+    )
+    assert record == {
+        "LastName": "Doe,Jr.",
+        "HasOptedOutOfEmail": "true",
+        "NumberOfEmployees": "42",
+        "AnnualRevenue": "1500",
+        "Birthdate": "2024-02-29",
+        "LastTransferDate": "2024-02-29T08:00:00.000Z",
+        "Interests__c": "Golf;Tennis",
+    }
+    empty = serializer.serialize([["00Q000000000001"], [], [], [], [], [], [], []])
+    assert empty["Id"] == "00Q000000000001"
+    assert set(empty.values()) == {"00Q000000000001", ""}
+
+
+@pytest.mark.parametrize(
+    ("column", "value", "status_code"),
+    [
+        ("Id", "1", INVALID_TYPE),
+        ("LastName", "Much too long", STRING_TOO_LONG),
+        ("HasOptedOutOfEmail", "maybe", INVALID_TYPE),
+        ("NumberOfEmployees", "4.2", INVALID_TYPE),
+        ("AnnualRevenue", "NaN", INVALID_TYPE),
+        ("Birthdate", "29.02.2024", INVALID_TYPE),
+        ("LastTransferDate", "yesterday", INVALID_TYPE),
+    ],
+)
+def test_invalid_values(column: str, value: str, status_code: str) -> None:
+    """Test that values which do not match their fields are rejected"""
+    serializer = RecordSerializer(COLUMNS, DESCRIPTION, "Id")
+    values = [[value] if name == column else [] for name in COLUMNS]
+    with pytest.raises(InvalidValueError) as raised:
+        serializer.serialize(values)
+    assert raised.value.to_error()["statusCode"] == status_code
+    assert raised.value.to_error()["fields"] == [column]
+
+    rejected: list[dict] = []
+    assert list(serializer.iter_records([values, [[] for _ in COLUMNS]], rejected)) == [
+        dict.fromkeys(COLUMNS[1:], "")
+    ]
+    assert rejected[0]["record"][column] == value
+    assert not rejected[0]["success"]
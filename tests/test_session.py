@@ -0,0 +1,145 @@
+"""Test the shared session pool"""
+
+import subprocess
+import sys
+from collections.abc import Iterator
+
+import pytest
+from cmem_plugin_base.dataintegration.description import Plugin
+from simple_salesforce.exceptions import SalesforceAuthenticationFailed
+
+from cmem_plugin_salesforce.helper import session
+from cmem_plugin_salesforce.helper.api import request
+from cmem_plugin_salesforce.helper.session import SessionPool, validate_credentials
+from cmem_plugin_salesforce.workflow.operations import SobjectCreate
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
+
+USERNAME = "user@example.org"
+PASSWORD = "secret"  # noqa: S105
+TOKEN = "TOKEN"  # noqa: S105
+
+
+@pytest.fixture
+def server() -> Iterator[MockServer]:
+    """Provide a stand-in server with one user"""
+    records = {"Lead": [{"Id": "00Q000000000001", "LastName": "Doe"}]}
+    with MockServer(records=records, users={USERNAME: PASSWORD + TOKEN}) as mock_server:
+        yield mock_server
+
+
+@pytest.fixture
+def pool(server: MockServer, monkeypatch: pytest.MonkeyPatch) -> SessionPool:
+    """Provide the shared session pool connected to the stand-in server"""
+    session_pool = server.pool()
+    monkeypatch.setattr(session, "SESSION_POOL", session_pool)
+    return session_pool
+
+
+def test_session_is_reused(pool: SessionPool) -> None:
+    """Test that a second connection does not login again"""
+    first = pool.connect(USERNAME, PASSWORD, TOKEN)
+    second = pool.connect(USERNAME, PASSWORD, TOKEN)
+    assert pool.logins == 1
+    assert first.session_id == second.session_id
+    assert first.session.http is second.session.http  # type: ignore[attr-defined]
+
+
+def test_credentials_are_part_of_the_key(pool: SessionPool) -> None:
+    """Test that a cached session is not shared with wrong credentials"""
+    pool.connect(USERNAME, PASSWORD, TOKEN)
+    with pytest.raises(SalesforceAuthenticationFailed):
+        pool.connect(USERNAME, "wrong", TOKEN)
+
+
+def test_expired_session_is_renewed(server: MockServer, pool: SessionPool) -> None:
+    """Test the transparent re-authentication on INVALID_SESSION_ID"""
+    first = pool.connect(USERNAME, PASSWORD, TOKEN)
+    second = pool.connect(USERNAME, PASSWORD, TOKEN)
+    server.expire_sessions()
+    assert first.query("SELECT Id FROM Lead")["totalSize"] == 1
+    assert pool.logins == 2  # noqa: PLR2004
+    response = request(
+        second, "GET", f"{second.base_url}query/", params={"q": "SELECT Id FROM Lead"}
+    )
+    assert response.json()["totalSize"] == 1
+    assert pool.logins == 2  # noqa: PLR2004
+    assert first.session_id == second.session_id
+
+
+def test_idle_session_expires(server: MockServer) -> None:
+    """Test that sessions idle for longer than the timeout are replaced"""
+    pool = SessionPool(session_factory=server.session, timeout=0)
+    pool.connect(USERNAME, PASSWORD, TOKEN)
+    pool.connect(USERNAME, PASSWORD, TOKEN)
+    assert pool.logins == 2  # noqa: PLR2004
+
+
+def test_plugins_share_one_login(pool: SessionPool) -> None:
+    """Test that both plugins get their connection from the pool"""
+    plugin = SoqlQuery(
+        username=USERNAME,
+        password=PASSWORD,
+        security_token=TOKEN,
+        soql_query="SELECT Id, LastName FROM Lead",
+    )
+    assert len(list(plugin.execute([], TestExecutionContext()).entities)) == 1
+    SobjectCreate(
+        username=USERNAME, password=PASSWORD, security_token=TOKEN, salesforce_object="Lead"
+    ).get_connection()
+    assert pool.logins == 1
+
+
+def test_plugins_connect_lazily(server: MockServer, pool: SessionPool) -> None:
+    """Test that creating the plugins does not login"""
+    SoqlQuery(username=USERNAME, password="", security_token="", soql_query="SELECT Id FROM Lead")
+    SobjectCreate(username=USERNAME, password="", security_token="", salesforce_object="Lead")
+    assert server.calls["login"] == 0
+    assert pool.logins == 0
+
+
+def test_failed_check_is_cached(server: MockServer, pool: SessionPool) -> None:
+    """Test that a failed credential check is repeated without a login"""
+    for _ in range(2):
+        with pytest.raises(SalesforceAuthenticationFailed):
+            validate_credentials(USERNAME, "wrong", TOKEN)
+    assert server.calls["login"] == 1
+    validate_credentials(USERNAME, PASSWORD, TOKEN)
+    validate_credentials(USERNAME, PASSWORD, TOKEN)
+    assert pool.logins == 1
+
+
+def test_check_credentials_action(server: MockServer, pool: SessionPool) -> None:
+    """Test the credential check action of both plugins"""
+    query = SoqlQuery(
+        username=USERNAME, password=PASSWORD, security_token=TOKEN, soql_query="SELECT Id FROM Lead"
+    )
+    create = SobjectCreate(
+        username=USERNAME,
+        password="wrong",  # noqa: S106
+        security_token=TOKEN,
+        salesforce_object="Lead",
+    )
+    actions = {_.plugin_class: [action.name for action in _.actions] for _ in Plugin.plugins}
+    assert actions[SoqlQuery] == actions[SobjectCreate] == ["check_credentials"]
+    assert query.check_credentials() == f"Login as `{USERNAME}` successful."
+    for _ in range(2):
+        with pytest.raises(SalesforceAuthenticationFailed):
+            create.check_credentials()
+    assert server.calls["login"] == 2  # noqa: PLR2004
+    assert pool.logins == 1
+
+
+def test_plugin_import_is_lightweight() -> None:
+    """Test that importing the plugins does not load simple_salesforce"""
+    code = (
+        "import sys\n"
+        "import cmem_plugin_salesforce.workflow.operations\n"
+        "import cmem_plugin_salesforce.workflow.soql_query\n"
+        "print('simple_salesforce' in sys.modules)"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
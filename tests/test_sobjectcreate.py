@@ -1,18 +1,356 @@
 """test sobjectcreate"""
 
+from collections.abc import Iterator
+from typing import Any
+
 import pytest
+from cmem_plugin_base.dataintegration.entity import Entities, Entity, EntityPath, EntitySchema
 from simple_salesforce.exceptions import SalesforceAuthenticationFailed
 
+from cmem_plugin_salesforce.helper import session
+from cmem_plugin_salesforce.helper.batching import DEFAULT_DELETE_BATCH_SIZE
 from cmem_plugin_salesforce.workflow.operations import SobjectCreate
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
+
+LEADS = [{"Id": f"00Q{index:012d}", "LastName": f"Doe {index}"} for index in range(1, 4)]
+
+
+@pytest.fixture
+def server(start_server: StartServer) -> MockServer:
+    """Provide a stand-in server with some leads"""
+    return start_server(records={"Lead": [dict(lead) for lead in LEADS]})
+
 
+def get_entities(rows: list[tuple[str, str]], consumed: list[int] | None = None) -> Entities:
+    """Create input entities with Id and LastName (empty Id creates a new lead)"""
 
-def test_invalid_credentials() -> None:
+    def entities() -> Iterator[Entity]:
+        for index, (record_id, last_name) in enumerate(rows):
+            if consumed is not None:
+                consumed.append(index)
+            yield Entity(
+                uri=f"urn:lead:{index}", values=[[record_id] if record_id else [], [last_name]]
+            )
+
+    schema = EntitySchema(type_uri="", paths=[EntityPath("Id"), EntityPath("LastName")])
+    return Entities(entities=entities(), schema=schema)
+
+
+def test_invalid_credentials(monkeypatch: pytest.MonkeyPatch) -> None:
     """Test plugin execution"""
-    with pytest.raises(SalesforceAuthenticationFailed):
-        SobjectCreate(username="", password="", security_token="", salesforce_object="Lead")
+    plugin = SobjectCreate(
+        username="user",
+        password="wrong",  # noqa: S106
+        security_token="",
+        salesforce_object="Lead",
+    )
+    with MockServer(users={"user": "secret"}) as server:
+        monkeypatch.setattr(session, "SESSION_POOL", server.pool())
+        with pytest.raises(SalesforceAuthenticationFailed):
+            plugin.execute([get_entities([("", "Doe")])], TestExecutionContext())
 
 
 def test_sobject_required() -> None:
     """Validate Required fields"""
     with pytest.raises(ValueError, match=r"Salesforce Object API Name is required."):
         SobjectCreate(username="", password="", security_token="", salesforce_object="")
+
+
+def test_batch_size_validation() -> None:
+    """Validate the batch size limits"""
+    with pytest.raises(ValueError, match=r"Batch size must be positive"):
+        SobjectCreate(
+            username="", password="", security_token="", salesforce_object="Lead", batch_size=0
+        )
+
+
+def test_upsert_in_batches(server: MockServer) -> None:
+    """Test that entities are upserted in batches with incremental reports"""
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        batch_size=2,
+        engine="bulk",
+    )
+    rows = [(LEADS[0]["Id"], "Updated"), ("", "New"), ("", "Newer"), ("00Q999999999999", "X")]
+    context = TestExecutionContext()
+    plugin.execute([get_entities(rows)], context)
+    assert server.calls["add_batch"] == 2  # noqa: PLR2004
+    assert server.records["Lead"][0]["LastName"] == "Updated"
+    assert len(server.records["Lead"]) == 5  # noqa: PLR2004
+    reports = context.report.reports
+    assert [report.entity_count for report in reports] == [0, 2, 4, 4]
+    final = reports[-1]
+    assert final.operation == "read"
+    assert final.summary[:2] == [
+        ("No. of entities created in Salesforce", "2"),
+        ("No. of entities updated in Salesforce", "1"),
+    ]
+    assert final.warnings[0] == "1 entities failed to create/update in Salesforce"
+    assert "INVALID_CROSS_REFERENCE_KEY" in final.warnings[1]
+
+
+def test_entities_are_read_lazily(server: MockServer) -> None:
+    """Test that the input is read batch by batch, ahead of the upload by one batch"""
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        batch_size=1,
+        engine="bulk",
+    )
+    consumed: list[int] = []
+    results = plugin.process(get_entities([("", f"New {index}") for index in range(6)], consumed))
+    first = list(next(results))
+    assert first[0]["created"]
+    assert len(consumed) < 6  # noqa: PLR2004
+    assert len(list(results)) == 5  # noqa: PLR2004
+    assert server.calls["create_job"] == 6  # noqa: PLR2004
+
+
+def test_bulk2_ingest_jobs(server: MockServer) -> None:
+    """Test the upsert with concurrent Bulk API 2.0 ingest jobs"""
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        batch_size=2,
+        engine="bulk2",
+        workers=2,
+    )
+    rows = [(LEADS[0]["Id"], "Updated"), ("", "New"), ("", "Newer"), ("00Q999999999999", "X")]
+    context = TestExecutionContext()
+    plugin.execute([get_entities(rows)], context)
+    assert server.calls["create_ingest_job"] == 2  # noqa: PLR2004
+    assert server.calls["ingest_results"] == 4  # noqa: PLR2004
+    assert server.records["Lead"][0]["LastName"] == "Updated"
+    final = context.report.reports[-1]
+    assert final.entity_count == 4  # noqa: PLR2004
+    assert final.summary[:2] == [
+        ("No. of entities created in Salesforce", "2"),
+        ("No. of entities updated in Salesforce", "1"),
+    ]
+    assert "INVALID_CROSS_REFERENCE_KEY" in final.warnings[1]
+
+
+def test_external_id_field(server: MockServer) -> None:
+    """Test the upsert with an external ID field as key"""
+    server.records["Lead"][1]["Email"] = "known@example.org"
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        engine="bulk2",
+        external_id_field="Email",
+    )
+    schema = EntitySchema(type_uri="", paths=[EntityPath("Email"), EntityPath("LastName")])
+    entities = [
+        Entity(uri="urn:lead:1", values=[["known@example.org"], ["Known"]]),
+        Entity(uri="urn:lead:2", values=[["new@example.org"], ["Unknown"]]),
+    ]
+    results = [
+        result
+        for batch in plugin.process(Entities(entities=iter(entities), schema=schema))
+        for result in batch
+    ]
+    assert [result["created"] for result in results] == [False, True]
+    assert server.records["Lead"][1]["LastName"] == "Known"
+    assert server.jobs[next(iter(server.jobs))]["externalIdFieldName"] == "Email"
+
+
+def test_external_id_field_must_be_in_input(server: MockServer) -> None:
+    """Test that the external ID field is validated against the input"""
+    server.records["Lead"][1]["Email"] = "known@example.org"
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        external_id_field="Email",
+    )
+    with pytest.raises(ValueError, match=r"External ID field Email is not in the input"):
+        list(plugin.process(get_entities([("", "Doe")])))
+
+
+def test_collections_engine(server: MockServer) -> None:
+    """Test that small inputs are upserted with concurrent sObject Collections requests"""
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        batch_size=2,
+    )
+    rows = [(LEADS[0]["Id"], "Updated"), ("", "New"), ("", "Newer"), ("00Q999999999999", "X")]
+    context = TestExecutionContext()
+    plugin.execute([get_entities(rows)], context)
+    assert server.calls["upsert_collection"] == 2  # noqa: PLR2004
+    assert server.calls["create_job"] == 0
+    assert server.records["Lead"][0]["LastName"] == "Updated"
+    assert sorted(lead["LastName"] for lead in server.records["Lead"][3:]) == ["New", "Newer"]
+    final = context.report.reports[-1]
+    assert final.entity_count == 4  # noqa: PLR2004
+    assert final.summary[:2] == [
+        ("No. of entities created in Salesforce", "2"),
+        ("No. of entities updated in Salesforce", "1"),
+    ]
+    assert "INVALID_CROSS_REFERENCE_KEY" in final.warnings[1]
+
+
+def test_auto_engine_threshold(server: MockServer) -> None:
+    """Test that inputs above the threshold are upserted with the Bulk API"""
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        collections_threshold=2,
+    )
+    rows = [("", "New"), ("", "Newer"), ("", "Newest")]
+    plugin.execute([get_entities(rows)], TestExecutionContext())
+    assert server.calls["create_job"] == 1
+    assert server.calls["upsert_collection"] == 0
+    assert len(server.records["Lead"]) == len(LEADS) + len(rows)
+
+
+def test_invalid_rows_are_rejected(server: MockServer) -> None:
+    """Test that rows with values which do not match their field types are not uploaded"""
+    server.records["Lead"][0]["NumberOfEmployees"] = "10"
+    server.field_types["NumberOfEmployees"] = "int"
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        engine="bulk2",
+    )
+    schema = EntitySchema(
+        type_uri="", paths=[EntityPath("LastName"), EntityPath("NumberOfEmployees")]
+    )
+    entities = [
+        Entity(uri="urn:lead:1", values=[["Valid"], ["12.0"]]),
+        Entity(uri="urn:lead:2", values=[["Invalid"], ["many"]]),
+    ]
+    context = TestExecutionContext()
+    output = plugin.execute([Entities(entities=iter(entities), schema=schema)], context)
+    assert server.calls["create_ingest_job"] == 1
+    assert [lead["LastName"] for lead in server.records["Lead"][len(LEADS) :]] == ["Valid"]
+    assert server.records["Lead"][-1]["NumberOfEmployees"] == "12"
+    assert output is not None
+    failed = [entity.values for entity in output.entities]
+    assert failed == [
+        [
+            ["Invalid"],
+            ["many"],
+            ["INVALID_TYPE_ON_FIELD_IN_RECORD"],
+            ["'many' is not a number"],
+            ["1"],
+        ]
+    ]
+    assert "INVALID_TYPE_ON_FIELD_IN_RECORD (1)" in context.report.reports[-1].warnings[1]
+
+
+def test_delete_with_ingest_jobs(server: MockServer) -> None:
+    """Test that the records of the input Ids are deleted with concurrent ingest jobs"""
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        batch_size=1,
+        operation="delete",
+    )
+    rows = [(LEADS[0]["Id"], ""), (LEADS[1]["Id"], ""), ("", "No Id"), ("00Q999999999999", "")]
+    context = TestExecutionContext()
+    output = plugin.execute([get_entities(rows)], context)
+    assert server.calls["create_ingest_job"] == 3  # noqa: PLR2004
+    assert [lead.get("IsDeleted", False) for lead in server.records["Lead"]] == [
+        True,
+        True,
+        False,
+    ]
+    final = context.report.reports[-1]
+    assert final.entity_count == 4  # noqa: PLR2004
+    assert final.summary[0] == ("No. of entities deleted in Salesforce", "2")
+    assert "2 entities failed to delete" in final.warnings[0]
+    assert output is not None
+    codes = [entity.values[2][0] for entity in output.entities]
+    assert sorted(codes) == ["ENTITY_IS_DELETED", "REQUIRED_FIELD_MISSING"]
+
+
+def test_delete_by_parent(server: MockServer, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the Ids to delete are ordered by the parent references of the input"""
+    batches: list[list[dict[str, str]]] = []
+    delete = SobjectCreate.delete
+
+    def record_delete(plugin: SobjectCreate, batch: list[dict[str, str]]) -> list[dict[str, Any]]:
+        batches.append(batch)
+        return delete(plugin, batch)
+
+    monkeypatch.setattr(SobjectCreate, "delete", record_delete)
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        engine="bulk",
+        operation="delete",
+    )
+    assert plugin.batch_size == DEFAULT_DELETE_BATCH_SIZE
+    plugin.batch_size = 2
+    parents = [[LEADS[1]["Id"]], [], [LEADS[0]["Id"]]]
+    rows = [[[lead["Id"]], parent] for lead, parent in zip(LEADS, parents, strict=True)]
+    schema = EntitySchema(type_uri="", paths=[EntityPath("Id"), EntityPath("MasterRecordId")])
+    entities = (Entity(uri=f"urn:lead:{index}", values=row) for index, row in enumerate(rows))
+    plugin.execute([Entities(entities=entities, schema=schema)], TestExecutionContext())
+    ids = [[record["Id"] for record in batch] for batch in batches]
+    assert ids == [[LEADS[1]["Id"], LEADS[2]["Id"]], [LEADS[0]["Id"]]]
+    assert all(lead["IsDeleted"] for lead in server.records["Lead"])
+
+
+def test_hard_delete(server: MockServer) -> None:
+    """Test that records are hard deleted with the Bulk API (without recycle bin)"""
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        engine="bulk",
+        operation="hardDelete",
+    )
+    plugin.execute(
+        [get_entities([(LEADS[0]["Id"], ""), (LEADS[2]["Id"], "")])], TestExecutionContext()
+    )
+    assert server.calls["create_job"] == 1
+    assert [lead["Id"] for lead in server.records["Lead"]] == [LEADS[1]["Id"]]
+
+
+def test_delete_validation(server: MockServer) -> None:  # noqa: ARG001
+    """Test that deletes need Ids and a Bulk API engine"""
+    with pytest.raises(ValueError, match="only be deleted with the Bulk API"):
+        SobjectCreate(
+            username="",
+            password="",
+            security_token="",
+            salesforce_object="Lead",
+            engine="collections",
+            operation="delete",
+        )
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        operation="delete",
+    )
+    schema = EntitySchema(type_uri="", paths=[EntityPath("LastName")])
+    entities = Entities(entities=iter([]), schema=schema)
+    with pytest.raises(ValueError, match="no Id path"):
+        plugin.execute([entities], TestExecutionContext())
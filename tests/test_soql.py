@@ -1,18 +1,105 @@
 """Plugin tests."""
 
+from collections import OrderedDict
+
 import pytest
 from simple_salesforce.exceptions import SalesforceAuthenticationFailed
 
+from cmem_plugin_salesforce.helper import session
+from cmem_plugin_salesforce.helper.query import iter_query_pages
 from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.mock_server import MockServer
+from tests.utils import TestExecutionContext
 
 
-def test_invalid_credentials() -> None:
+def test_invalid_credentials(monkeypatch: pytest.MonkeyPatch) -> None:
     """Test plugin execution"""
-    with pytest.raises(SalesforceAuthenticationFailed):
-        SoqlQuery(
-            username="",
-            password="",
-            security_token="",
-            dataset="",
-            soql_query="SELECT Id, Name FROM Contact",
-        )
+    plugin = SoqlQuery(
+        username="user",
+        password="wrong",  # noqa: S106
+        security_token="",
+        dataset="",
+        soql_query="SELECT Id, Name FROM Contact",
+    )
+    with MockServer(users={"user": "secret"}) as server:
+        monkeypatch.setattr(session, "SESSION_POOL", server.pool())
+        with pytest.raises(SalesforceAuthenticationFailed):
+            plugin.execute([], TestExecutionContext())
+
+
+class PagedSalesforce:
+    """Salesforce stand-in serving a query result in pages"""
+
+    def __init__(self, total: int, page_size: int) -> None:
+        self.pages = [
+            [
+                OrderedDict(attributes={"type": "Contact"}, Id=f"003{index:015d}", Name=f"N{index}")
+                for index in range(start, min(start + page_size, total))
+            ]
+            for start in range(0, total, page_size)
+        ] or [[]]
+        self.requested = 0
+
+    def _page(self, index: int) -> dict:
+        self.requested += 1
+        done = index == len(self.pages) - 1
+        total = sum(len(_) for _ in self.pages)
+        page = {"totalSize": total, "done": done, "records": self.pages[index]}
+        if not done:
+            page["nextRecordsUrl"] = f"/services/data/v59.0/query/01g-{index + 1}"
+        return page
+
+    def query(self, query: str, include_deleted: bool = False) -> dict:  # noqa: ARG002
+        """Return the first page"""
+        return self._page(0)
+
+    def query_more(self, next_records_identifier: str, identifier_is_url: bool) -> dict:
+        """Return the page referenced by the next records URL"""
+        assert identifier_is_url
+        return self._page(int(next_records_identifier.rsplit("-", 1)[1]))
+
+
+@pytest.fixture
+def paged_salesforce(monkeypatch: pytest.MonkeyPatch) -> PagedSalesforce:
+    """Patch the plugin to use a paged salesforce stand-in"""
+    salesforce = PagedSalesforce(total=25, page_size=10)
+    monkeypatch.setattr(session, "connect", lambda **_: salesforce)
+    return salesforce
+
+
+def test_iter_query_pages(paged_salesforce: PagedSalesforce) -> None:
+    """Test that pages are fetched lazily"""
+    pages = iter_query_pages(paged_salesforce, "SELECT Id, Name FROM Contact")  # type: ignore[arg-type]
+    assert paged_salesforce.requested == 0
+    assert len(next(pages)["records"]) == 10  # noqa: PLR2004
+    assert paged_salesforce.requested == 1
+    assert [len(page["records"]) for page in pages] == [10, 5]
+    assert paged_salesforce.requested == 3  # noqa: PLR2004
+
+
+def test_execute_streams_entities(paged_salesforce: PagedSalesforce) -> None:
+    """Test that entities are created while pages arrive"""
+    plugin = SoqlQuery(
+        username="", password="", security_token="", soql_query="SELECT Id, Name FROM Contact"
+    )
+    result = plugin.execute([], TestExecutionContext())
+    assert [path.path for path in result.schema.paths] == ["Id", "Name"]
+    assert paged_salesforce.requested == 1
+    entities = iter(result.entities)
+    first = next(entities)
+    assert first.values == [["003000000000000000"], ["N0"]]
+    assert paged_salesforce.requested == 1
+    assert len(list(entities)) == 24  # noqa: PLR2004
+    assert paged_salesforce.requested == 3  # noqa: PLR2004
+
+
+def test_execute_empty_result(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that an empty result yields an empty collection"""
+    salesforce = PagedSalesforce(total=0, page_size=10)
+    monkeypatch.setattr(session, "connect", lambda **_: salesforce)
+    plugin = SoqlQuery(
+        username="", password="", security_token="", soql_query="SELECT Id FROM Contact"
+    )
+    result = plugin.execute([], TestExecutionContext())
+    assert result.schema.paths == []
+    assert list(result.entities) == []
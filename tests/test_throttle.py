@@ -0,0 +1,163 @@
+"""Test the adaptive rate control"""
+
+import sys
+import time
+from http import HTTPStatus
+
+import pytest
+import requests
+
+from cmem_plugin_salesforce.helper import throttle
+from cmem_plugin_salesforce.helper.batching import DEFAULT_BATCH_SIZE
+from cmem_plugin_salesforce.helper.composite import MAX_COLLECTION_SIZE
+from cmem_plugin_salesforce.helper.throttle import ApiLimitError, RateLimiter
+from cmem_plugin_salesforce.workflow.operations import SobjectCreate
+from cmem_plugin_salesforce.workflow.soql_query import SoqlQuery
+from tests.conftest import StartServer
+from tests.mock_server import MockServer
+from tests.test_sobjectcreate import get_entities
+from tests.utils import TestExecutionContext
+
+LEADS = [{"Id": f"00Q{index:012d}", "LastName": f"Doe {index}"} for index in range(1, 4)]
+BUSY = {"errorCode": "SERVER_UNAVAILABLE", "message": "Server busy"}
+
+
+@pytest.fixture
+def server(start_server: StartServer, monkeypatch: pytest.MonkeyPatch) -> MockServer:
+    """Provide a stand-in server with some leads and a short backoff"""
+    monkeypatch.setattr(throttle, "INITIAL_BACKOFF", 0.01)
+    return start_server(records={"Lead": [dict(lead) for lead in LEADS]})
+
+
+def get_response(status: int, usage: str = "", payload: bytes = b"[]") -> requests.Response:
+    """Create a response with an optional API usage header"""
+    response = requests.Response()
+    response.status_code = status
+    response._content = payload  # noqa: SLF001
+    if usage:
+        response.headers["Sforce-Limit-Info"] = f"api-usage={usage}"
+    return response
+
+
+def test_concurrency_adapts_to_throttling() -> None:
+    """Test that throttling halves the concurrency, which recovers with successes"""
+    limiter = RateLimiter(max_concurrency=8)
+    limiter.acquire()
+    assert limiter.release(get_response(HTTPStatus.SERVICE_UNAVAILABLE)) is True
+    assert limiter.concurrency == 4  # noqa: PLR2004
+    limiter.resume_at = 0.0
+    for _ in range(4):
+        limiter.acquire()
+        assert limiter.release(get_response(HTTPStatus.OK)) is False
+    assert limiter.concurrency == 5  # noqa: PLR2004
+
+
+def test_concurrent_request_limit_is_throttling() -> None:
+    """Test that only the daily limit is not retried"""
+    limiter = RateLimiter()
+    concurrent = b'[{"errorCode": "REQUEST_LIMIT_EXCEEDED", "message": "ConcurrentPerOrgLongTxn"}]'
+    daily = b'[{"errorCode": "REQUEST_LIMIT_EXCEEDED", "message": "TotalRequests Limit exceeded."}]'
+    limiter.acquire()
+    assert limiter.release(get_response(HTTPStatus.FORBIDDEN, "10/100", concurrent)) is True
+    limiter.resume_at = 0.0
+    limiter.acquire()
+    assert limiter.release(get_response(HTTPStatus.FORBIDDEN, "10/100", daily)) is False
+    with pytest.raises(ApiLimitError):
+        limiter.acquire(reserve=0)
+
+
+def test_requests_are_paced_near_the_reserve(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the remaining requests above the reserve are spread over time"""
+    monkeypatch.setattr(throttle, "PACING_HORIZON", 100.0)
+    limiter = RateLimiter()
+    limiter.acquire()
+    limiter.release(get_response(HTTPStatus.OK, "1000/15000"))
+    assert limiter.get_rate(reserve=10) is None
+    assert limiter.get_batch_size(200, 10000, reserve=10) == 200  # noqa: PLR2004
+    limiter.acquire()
+    limiter.release(get_response(HTTPStatus.OK, "13000/15000"))
+    assert limiter.get_rate(reserve=10) == pytest.approx(5.0)
+    assert limiter.get_batch_size(200, 10000, reserve=10) == 10000  # noqa: PLR2004
+    limiter.acquire(reserve=10)
+    limiter.release(get_response(HTTPStatus.OK))
+    start = time.monotonic()
+    limiter.acquire(reserve=10)
+    assert time.monotonic() - start == pytest.approx(0.2, abs=0.1)
+    with pytest.raises(ApiLimitError, match="reserved"):
+        limiter.acquire(reserve=15)
+
+
+def test_throttled_requests_are_retried(server: MockServer) -> None:
+    """Test that a query is retried with backoff when the server is busy"""
+    plugin = SoqlQuery(
+        username="user", password="", security_token="", soql_query="SELECT Id FROM Lead"
+    )
+    server.fail(HTTPStatus.SERVICE_UNAVAILABLE, [BUSY], count=2)
+    context = TestExecutionContext()
+    assert len(list(plugin.execute([], context).entities)) == len(LEADS)
+    assert server.calls["query"] == 3  # noqa: PLR2004
+    summary = dict(context.report.reports[-1].summary)
+    assert summary["Throttled requests"] == "2"
+
+
+def test_reserve_stops_the_task(server: MockServer) -> None:
+    """Test that the task fails instead of using the reserved API requests"""
+    plugin = SoqlQuery(
+        username="user",
+        password="",
+        security_token="",
+        soql_query="SELECT Id FROM Lead",
+        api_reserve=20,
+    )
+    server.api_used = 12000
+    list(plugin.execute([], TestExecutionContext()).entities)
+    with pytest.raises(ApiLimitError):
+        plugin.execute([], TestExecutionContext())
+
+
+def test_paced_writes_use_larger_batches(
+    server: MockServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the batch size grows to the maximum while requests are paced"""
+    monkeypatch.setattr(throttle, "PACING_HORIZON", 1.0)
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        batch_size=1,
+        engine="bulk",
+        api_reserve=0,
+    )
+    server.api_used = 14000
+    rows = [("", "New"), ("", "Newer"), ("", "Newest")]
+    plugin.execute([get_entities(rows)], TestExecutionContext())
+    assert server.calls["add_batch"] == 1
+    assert len(server.records["Lead"]) == len(LEADS) + len(rows)
+
+
+def test_batch_size_per_engine(server: MockServer, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the batch size is limited by the engine selected for the write"""
+    monkeypatch.setattr(throttle, "PACING_HORIZON", 1.0)
+    plugin = SobjectCreate(
+        username="user",
+        password="",
+        security_token="",
+        salesforce_object="Lead",
+        batch_size=500,
+        api_reserve=0,
+    )
+    assert plugin.get_batch_size("bulk2") == 500  # noqa: PLR2004
+    server.api_used = 14000
+    plugin.execute([get_entities([("", "New")])], TestExecutionContext())
+    assert plugin.get_batch_size("collections") == MAX_COLLECTION_SIZE
+    assert plugin.get_batch_size("bulk") == DEFAULT_BATCH_SIZE
+    assert plugin.get_batch_size("bulk2") == sys.maxsize
+
+
+def test_api_reserve_validation() -> None:
+    """Validate the API reserve percentage"""
+    with pytest.raises(ValueError, match=r"API reserve"):
+        SobjectCreate(
+            username="", password="", security_token="", salesforce_object="Lead", api_reserve=100
+        )
@@ -0,0 +1,51 @@
+"""Testing utilities"""
+
+from cmem_plugin_base.dataintegration.context import (
+    ExecutionContext,
+    ExecutionReport,
+    ReportContext,
+    TaskContext,
+)
+
+
+class TestReportContext(ReportContext):
+    """Report context which keeps all updates"""
+
+    __test__ = False
+
+    def __init__(self) -> None:
+        self.reports: list[ExecutionReport] = []
+
+    def update(self, report: ExecutionReport) -> None:
+        """Keep the report"""
+        self.reports.append(report)
+
+
+class TestTaskContext(TaskContext):
+    """Task context with fixed identifiers"""
+
+    __test__ = False
+
+    def __init__(self, project_id: str = "project", task_id: str = "task") -> None:
+        self._project_id = project_id
+        self._task_id = task_id
+
+    def project_id(self) -> str:
+        """Get the identifier of the project"""
+        return self._project_id
+
+    def task_id(self) -> str:
+        """Get the identifier of the task"""
+        return self._task_id
+
+
+class TestExecutionContext(ExecutionContext):
+    """Execution context without a connection to Corporate Memory"""
+
+    __test__ = False
+
+    def __init__(self) -> None:
+        self.report: TestReportContext = TestReportContext()
+        self.task = TestTaskContext()
+        self.user = None
+        self.workflow = None